@@ -2,8 +2,7 @@
 Configuration for Lifo4 EMS AI Service
 """
 
-from pydantic_settings import BaseSettings
-from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 
 
@@ -19,13 +18,25 @@ class Settings(BaseSettings):
     host: str = "0.0.0.0"
     port: int = 8001
     workers: int = 1
+    gzip_min_size: int = 4096  # responses smaller than this are sent uncompressed
+    gzip_level: int = 1  # compression runs on the event loop; 1 is ~15x cheaper than 9
+
+    # Startup
+    startup_concurrency: int = 0  # max models loaded at once (0 = no limit)
 
     # Backend API
     backend_url: str = "http://localhost:3001"
     backend_api_key: Optional[str] = None
 
+    # Multi-agent system
+    optimization_timeout: float = 30.0  # seconds to wait for /agents/optimization/run
+
+    # Self-optimization
+    ga_workers: int = 0  # processes running genetic optimizations per uvicorn worker (0 = CPUs / workers)
+
     # Redis
     redis_url: str = "redis://localhost:6379/1"
+    coordinator_state_backend: str = "memory"  # memory, redis (shared blackboard)
 
     # Database
     database_url: Optional[str] = None
@@ -34,6 +45,9 @@ class Settings(BaseSettings):
     yolo_model: str = "yolov8n.pt"  # nano model for speed
     yolo_confidence: float = 0.5
     yolo_iou_threshold: float = 0.45
+    yolo_tensorrt: bool = True  # run a cached TensorRT FP16 engine on CUDA
+    yolo_max_batch: int = 16  # images per batched forward pass
+    yolo_batch_wait_ms: float = 5.0  # how long a request waits for a batch to fill
 
     # Whisper settings
     whisper_model: str = "base"  # tiny, base, small, medium, large
@@ -43,6 +57,8 @@ class Settings(BaseSettings):
     max_image_size: int = 1920
     max_video_duration: int = 60  # seconds
     max_audio_duration: int = 30  # seconds
+    upload_spool_max_size: int = 8 * 1024 * 1024  # detection uploads up to this size stay in memory
+    anomaly_batch_chunk_size: int = 256  # systems analyzed per /anomaly/batch step
 
     # Model paths
     models_dir: str = "./models"
@@ -53,15 +69,17 @@ class Settings(BaseSettings):
     use_gpu: bool = True
     gpu_device: int = 0
 
-    class Config:
-        env_file = ".env"
-        env_prefix = "AI_"
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_prefix="AI_",
+        frozen=True,
+    )
 
 
-@lru_cache()
-def get_settings() -> Settings:
-    """Get cached settings instance."""
-    return Settings()
+# Built once at import; modules read attributes off this instance directly.
+settings = Settings()
 
 
-settings = get_settings()
+def get_settings() -> Settings:
+    """Return the process-wide settings instance (for use with ``Depends``)."""
+    return settings
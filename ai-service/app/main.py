@@ -3,11 +3,17 @@ Lifo4 EMS AI Service - FastAPI Application
 Person detection (YOLOv8), voice analysis (Whisper), battery anomaly detection
 """
 
+import asyncio
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from prometheus_client import make_asgi_app
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from prometheus_client import CollectorRegistry, make_asgi_app, multiprocess
 
 from app.config import settings
 from app.routers import detection, audio, anomaly, forecast
@@ -17,6 +23,7 @@ from app.routers import self_optimization
 from app.routers import agents
 from app.routers import nlp
 from app.routers import config_learning
+from app.services.self_optimization import genetic_optimizer
 from app.services.yolo_service import yolo_service
 from app.services.whisper_service import whisper_service
 from app.services.anomaly_service import anomaly_service
@@ -30,6 +37,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+PROMETHEUS_MULTIPROC = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Model-backed services loaded at startup and reported by /health
+MODEL_SERVICES = {
+    "yolo": yolo_service,
+    "whisper": whisper_service,
+    "anomaly": anomaly_service,
+    "forecast": forecast_service,
+    "digital_twin": pybamm_simulator,
+    "state_estimator": state_estimator,
+    "degradation_predictor": degradation_predictor,
+}
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -37,31 +57,106 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info(f"Starting {settings.app_name} v{settings.app_version}")
 
-    # Load ML models
-    logger.info("Loading YOLOv8 model...")
-    await yolo_service.load_model()
+    # CPU-bound decode/parse work from every router shares one pool; the
+    # image and byte decoders it runs release the GIL
+    app.state.decode_pool = ThreadPoolExecutor(
+        max_workers=os.cpu_count(), thread_name_prefix="decode"
+    )
+
+    # Genetic optimizations are pure-Python CPU work; run them in worker
+    # processes kept warm across requests. Spawned rather than forked, as
+    # this process holds threads and CUDA state by now. Every uvicorn worker
+    # has its own pool, so by default they split the CPUs between them
+    ga_workers = settings.ga_workers or max(1, os.cpu_count() // settings.workers)
+    app.state.ga_pool = ProcessPoolExecutor(
+        max_workers=ga_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=genetic_optimizer.warmup,
+        initargs=(max(1, os.cpu_count() // ga_workers),),
+    )
+    # Spawned workers only start on submit(); one no-op each gets them
+    # started (and warmed up) while the models load
+    ga_ready = [
+        asyncio.wrap_future(app.state.ga_pool.submit(os.getpid))
+        for _ in range(ga_workers)
+    ]
+
+    # Multi-agent coordinator is created on demand via POST /agents/initialize
+    app.state.coordinator = None
+
+    # Shared Redis connection pool for coordinator state (optional)
+    app.state.redis = None
+    if settings.coordinator_state_backend == "redis":
+        import redis.asyncio as aioredis
+        app.state.redis = aioredis.from_url(settings.redis_url)
+        logger.info("Coordinator blackboard backed by Redis")
+
+    models = MODEL_SERVICES
+    app.state.models = models
+
+    # Load ML models concurrently; loaders are I/O bound (disk reads, weight
+    # deserialization in executor threads), so startup costs max(load) not sum.
+    limiter = (
+        asyncio.Semaphore(settings.startup_concurrency)
+        if settings.startup_concurrency > 0 else None
+    )
+
+    async def load(name, service):
+        logger.info(f"Loading {name} model...")
+        if limiter is None:
+            return await service.load_model()
+        async with limiter:
+            return await service.load_model()
+
+    results = await asyncio.gather(
+        *(load(name, service) for name, service in models.items()),
+        return_exceptions=True,
+    )
+    for name, result in zip(models, results):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to load {name} model: {result}")
 
-    logger.info("Loading Whisper model...")
-    await whisper_service.load_model()
+    # Config learning services are otherwise built by the first request
+    config_learning.warmup()
 
-    logger.info("Loading anomaly detection model...")
-    await anomaly_service.load_model()
+    # NLP pipeline for the virtual assistant, shared by all /nlp requests
+    app.state.nlp = await nlp.create_services()
 
-    logger.info("Loading forecast model...")
-    await forecast_service.load_model()
+    for result in await asyncio.gather(*ga_ready, return_exceptions=True):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to start genetic optimizer workers: {result}")
+            break
 
-    logger.info("Loading digital twin services...")
-    await pybamm_simulator.load_model()
-    await state_estimator.load_model()
-    await degradation_predictor.load_model()
+    logger.info("Model loading complete")
 
-    logger.info("All models loaded successfully!")
+    # Warm up GPU-backed models so the first request sees steady-state latency
+    logger.info("Warming up models...")
+    await models["yolo"].warmup(iters=3)
+    await models["whisper"].warmup(iters=2)
+    await models["anomaly"].warmup()
 
     yield
 
     # Shutdown
     logger.info("Shutting down AI service...")
 
+    await models["yolo"].close()
+    await models["state_estimator"].close()
+    await app.state.nlp.close()
+    await self_optimization.close()
+    app.state.decode_pool.shutdown(wait=False, cancel_futures=True)
+    app.state.ga_pool.shutdown(wait=False, cancel_futures=True)
+
+    if app.state.coordinator is not None:
+        await app.state.coordinator.stop()
+        app.state.coordinator = None
+
+    if app.state.redis is not None:
+        await app.state.redis.aclose()
+
+    if PROMETHEUS_MULTIPROC:
+        multiprocess.mark_process_dead(os.getpid())
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -69,6 +164,7 @@ app = FastAPI(
     version=settings.app_version,
     description="AI/ML service for Lifo4 EMS - Person detection, voice analysis, battery analytics",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
@@ -80,8 +176,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Prometheus metrics
-metrics_app = make_asgi_app()
+# Compress large bodies (simulation series run to several MB of JSON)
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.gzip_min_size,
+    compresslevel=settings.gzip_level,
+)
+
+# Prometheus metrics; with several uvicorn workers each process writes to
+# PROMETHEUS_MULTIPROC_DIR and the scrape aggregates all of them
+if PROMETHEUS_MULTIPROC:
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    metrics_app = make_asgi_app(registry=registry)
+else:
+    metrics_app = make_asgi_app()
 app.mount("/metrics", metrics_app)
 
 # Include routers
@@ -105,13 +214,8 @@ async def health_check():
         "service": settings.app_name,
         "version": settings.app_version,
         "models": {
-            "yolo": yolo_service.is_loaded,
-            "whisper": whisper_service.is_loaded,
-            "anomaly": anomaly_service.is_loaded,
-            "forecast": forecast_service.is_loaded,
-            "digital_twin": pybamm_simulator.is_loaded,
-            "state_estimator": state_estimator.is_loaded,
-            "degradation_predictor": degradation_predictor.is_loaded,
+            name: service.is_loaded
+            for name, service in getattr(app.state, "models", {}).items()
         }
     }
 
@@ -147,4 +251,6 @@ if __name__ == "__main__":
         port=settings.port,
         reload=settings.debug,
         workers=settings.workers,
+        loop="uvloop",
+        http="httptools",
     )
@@ -3,13 +3,18 @@ Multi-Agent System API Router
 Endpoints for managing and interacting with the BESS multi-agent system.
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional, List
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, Any, Optional, List, Iterable, AsyncIterator, Callable, Tuple, Annotated
 from datetime import datetime
 from enum import Enum
 import asyncio
+import itertools
 import logging
+import time
+import uuid
+import orjson
 
 from ..services.agents import (
     BaseAgent,
@@ -22,14 +27,24 @@ from ..services.agents import (
     AgentCoordinator,
     CoordinationStrategy
 )
+from ..services.agents.base_agent import MessageType
 from ..services.agents.coordinator import AgentRole
+from ..services.agents.safety_agent import SafetyLevel, SafetyZone
+from ..config import settings
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/agents", tags=["Multi-Agent System"])
 
-# Global coordinator instance
-_coordinator: Optional[AgentCoordinator] = None
+# Short-lived cache for polled status endpoints:
+# endpoint -> (coordinator, registry_version, monotonic timestamp, encoded body)
+STATUS_CACHE_TTL_SECONDS = 0.5
+_status_cache: Dict[str, Tuple[AgentCoordinator, int, float, bytes]] = {}
+
+
+# Query-string lookups for safety event filters, keyed by lowercase name/value
+_SAFETY_LEVELS: Dict[str, SafetyLevel] = {m.name.lower(): m for m in SafetyLevel}
+_SAFETY_ZONES: Dict[str, SafetyZone] = {m.value.lower(): m for m in SafetyZone}
 
 
 class CoordinationStrategyEnum(str, Enum):
@@ -56,19 +71,28 @@ class PriorityEnum(str, Enum):
 
 # Request/Response Models
 
-class InitializeSystemRequest(BaseModel):
+class RequestModel(BaseModel):
+    """Base for request bodies: plain JSON input only, validated once on parse"""
+    model_config = ConfigDict(
+        extra="forbid",
+        from_attributes=False,
+        validate_assignment=False
+    )
+
+
+class InitializeSystemRequest(RequestModel):
     strategy: CoordinationStrategyEnum = CoordinationStrategyEnum.HIERARCHICAL
     auto_register_agents: bool = True
 
 
-class RegisterAgentRequest(BaseModel):
+class RegisterAgentRequest(RequestModel):
     agent_type: AgentTypeEnum
     agent_id: Optional[str] = None
     name: Optional[str] = None
     role: str = "worker"
 
 
-class CreateTaskRequest(BaseModel):
+class CreateTaskRequest(RequestModel):
     description: str
     required_capabilities: List[str]
     payload: Dict[str, Any] = Field(default_factory=dict)
@@ -76,20 +100,20 @@ class CreateTaskRequest(BaseModel):
     deadline_seconds: Optional[int] = None
 
 
-class SendMessageRequest(BaseModel):
+class SendMessageRequest(RequestModel):
     receiver_id: str
     topic: str
     payload: Dict[str, Any] = Field(default_factory=dict)
     priority: PriorityEnum = PriorityEnum.NORMAL
 
 
-class BroadcastRequest(BaseModel):
+class BroadcastRequest(RequestModel):
     topic: str
     payload: Dict[str, Any] = Field(default_factory=dict)
     priority: PriorityEnum = PriorityEnum.NORMAL
 
 
-class UpdateThresholdRequest(BaseModel):
+class UpdateThresholdRequest(RequestModel):
     zone: str
     parameter: str
     warning_low: Optional[float] = None
@@ -100,135 +124,235 @@ class UpdateThresholdRequest(BaseModel):
     critical_high: Optional[float] = None
 
 
-class OptimizationRequest(BaseModel):
+class OptimizationRequest(RequestModel):
     horizon_hours: int = 24
     objectives: List[str] = Field(default=["minimize_cost"])
     constraints: Dict[str, Any] = Field(default_factory=dict)
 
 
-class TelemetryData(BaseModel):
+class TelemetryData(RequestModel):
     cells: Optional[List[Dict[str, Any]]] = None
     modules: Optional[List[Dict[str, Any]]] = None
     system: Optional[Dict[str, Any]] = None
     environment: Optional[Dict[str, Any]] = None
 
 
-class BlackboardWriteRequest(BaseModel):
+class BlackboardWriteRequest(RequestModel):
     key: str
     value: Any
 
 
 # Helper Functions
 
-def get_coordinator() -> AgentCoordinator:
-    """Get the coordinator instance"""
-    global _coordinator
-    if _coordinator is None:
+def get_coordinator(request: Request) -> AgentCoordinator:
+    """Get the coordinator instance stored on the application state"""
+    coordinator = getattr(request.app.state, "coordinator", None)
+    if coordinator is None:
         raise HTTPException(
             status_code=503,
             detail="Multi-agent system not initialized. Call POST /agents/initialize first."
         )
-    return _coordinator
+    return coordinator
+
+
+def _lookup_lower(table: Dict[str, Any], key: Optional[str]) -> Optional[Any]:
+    """Case-insensitive table lookup; lowercases only when the exact key misses"""
+    if not key:
+        return None
+    value = table.get(key)
+    if value is None:
+        value = table.get(key.lower())
+    return value
+
+
+CoordinatorDep = Annotated[AgentCoordinator, Depends(get_coordinator, use_cache=True)]
 
 
 def priority_to_enum(priority: PriorityEnum) -> AgentPriority:
-    """Convert priority string to enum"""
-    mapping = {
-        PriorityEnum.CRITICAL: AgentPriority.CRITICAL,
-        PriorityEnum.HIGH: AgentPriority.HIGH,
-        PriorityEnum.NORMAL: AgentPriority.NORMAL,
-        PriorityEnum.LOW: AgentPriority.LOW,
-        PriorityEnum.BACKGROUND: AgentPriority.BACKGROUND
-    }
-    return mapping.get(priority, AgentPriority.NORMAL)
+    """Convert priority string to enum (member names are shared)"""
+    return AgentPriority[priority.name]
+
+
+def _cached_status(
+    name: str,
+    coordinator: AgentCoordinator,
+    build: Callable[[], Dict[str, Any]]
+) -> Response:
+    """Serve a status payload from cache while it is fresh and the registry unchanged"""
+    now = time.monotonic()
+    entry = _status_cache.get(name)
+    if (
+        entry is not None
+        and entry[0] is coordinator
+        and entry[1] == coordinator.registry_version
+        and now - entry[2] < STATUS_CACHE_TTL_SECONDS
+    ):
+        return Response(entry[3], media_type="application/json")
+
+    body = orjson.dumps(build())
+    _status_cache[name] = (coordinator, coordinator.registry_version, now, body)
+    return Response(body, media_type="application/json")
+
+
+async def _stream_json_array(items: Iterable[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Yield a JSON array one encoded element at a time"""
+    yield b"["
+    first = True
+    for item in items:
+        if not first:
+            yield b","
+        yield orjson.dumps(item)
+        first = False
+    yield b"]"
+
+
+async def _stream_tasks(coordinator: AgentCoordinator) -> AsyncIterator[bytes]:
+    """Encode the task listing incrementally instead of building it in memory"""
+    # Snapshot references so concurrent task updates between chunks are safe
+    pending = list(coordinator.pending_tasks.values())
+    active = list(coordinator.active_tasks.values())
+    completed = list(itertools.islice(
+        coordinator.completed_tasks,
+        max(0, len(coordinator.completed_tasks) - 20),
+        None
+    ))
+
+    yield b'{"pending":'
+    async for chunk in _stream_json_array(
+        {
+            "id": t.id,
+            "description": t.description,
+            "status": t.status,
+            "priority": t.priority.name,
+            "created_at": t.created_at
+        }
+        for t in pending
+    ):
+        yield chunk
+
+    yield b',"active":'
+    async for chunk in _stream_json_array(
+        {
+            "id": t.id,
+            "description": t.description,
+            "status": t.status,
+            "assigned_to": t.assigned_agent,
+            "started_at": t.started_at
+        }
+        for t in active
+    ):
+        yield chunk
+
+    yield b',"completed_recent":'
+    async for chunk in _stream_json_array(
+        {
+            "id": t.id,
+            "description": t.description,
+            "status": t.status,
+            "assigned_to": t.assigned_agent,
+            "completed_at": t.completed_at
+        }
+        for t in completed
+    ):
+        yield chunk
+
+    yield b',"stats":' + orjson.dumps(coordinator.task_stats) + b"}"
+
+
+async def _stream_events(events: Iterable[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Encode a safety event listing incrementally, with the count last"""
+    count = 0
+    yield b'{"events":['
+    for event in events:
+        if count:
+            yield b","
+        yield orjson.dumps(event)
+        count += 1
+    yield b'],"count":' + str(count).encode() + b"}"
 
 
 # Endpoints
 
 @router.post("/initialize")
-async def initialize_system(request: InitializeSystemRequest):
+async def initialize_system(request: InitializeSystemRequest, http_request: Request):
     """
     Initialize the multi-agent system with a coordination strategy.
     """
-    global _coordinator
-
-    # Map strategy
-    strategy_map = {
-        CoordinationStrategyEnum.HIERARCHICAL: CoordinationStrategy.HIERARCHICAL,
-        CoordinationStrategyEnum.COLLABORATIVE: CoordinationStrategy.COLLABORATIVE,
-        CoordinationStrategyEnum.MARKET_BASED: CoordinationStrategy.MARKET_BASED,
-        CoordinationStrategyEnum.BLACKBOARD: CoordinationStrategy.BLACKBOARD,
-        CoordinationStrategyEnum.CONTRACT_NET: CoordinationStrategy.CONTRACT_NET
-    }
-
-    strategy = strategy_map.get(request.strategy, CoordinationStrategy.HIERARCHICAL)
+    # Map strategy (enum values are shared)
+    strategy = CoordinationStrategy(request.strategy.value)
 
     # Create coordinator
-    _coordinator = AgentCoordinator(
+    coordinator = AgentCoordinator(
         agent_id="coordinator",
         name="BESS Agent Coordinator",
-        strategy=strategy
+        strategy=strategy,
+        redis_client=getattr(http_request.app.state, "redis", None)
     )
 
     # Start coordinator
-    await _coordinator.start()
+    await coordinator.start()
+    http_request.app.state.coordinator = coordinator
 
     # Auto-register default agents if requested
     if request.auto_register_agents:
         # BMS Agent
         bms_agent = BMSAgent(agent_id="bms_agent", name="BMS Agent")
-        await _coordinator.register_agent(bms_agent, AgentRole.SPECIALIST)
+        await coordinator.register_agent(bms_agent, AgentRole.SPECIALIST)
 
         # Optimization Agent
         opt_agent = OptimizationAgent(agent_id="optimization_agent", name="Optimization Agent")
-        await _coordinator.register_agent(opt_agent, AgentRole.SPECIALIST)
+        await coordinator.register_agent(opt_agent, AgentRole.SPECIALIST)
 
         # Safety Agent (highest priority)
         safety_agent = SafetyAgent(agent_id="safety_agent", name="Safety Agent")
-        await _coordinator.register_agent(safety_agent, AgentRole.SUPERVISOR)
+        await coordinator.register_agent(safety_agent, AgentRole.SUPERVISOR)
 
     return {
         "success": True,
         "strategy": request.strategy,
-        "agents_registered": len(_coordinator.agents) if _coordinator else 0,
+        "agents_registered": len(coordinator.agents),
         "message": "Multi-agent system initialized"
     }
 
 
 @router.delete("/shutdown")
-async def shutdown_system():
+async def shutdown_system(http_request: Request):
     """
     Shutdown the multi-agent system.
     """
-    global _coordinator
+    coordinator = getattr(http_request.app.state, "coordinator", None)
 
-    if _coordinator is None:
+    if coordinator is None:
         return {"success": True, "message": "System not running"}
 
-    await _coordinator.stop()
-    _coordinator = None
+    await coordinator.stop()
+    http_request.app.state.coordinator = None
+    _status_cache.clear()
 
     return {"success": True, "message": "Multi-agent system shutdown complete"}
 
 
 @router.get("/status")
-async def get_system_status():
+async def get_system_status(coordinator: CoordinatorDep):
     """
     Get the current status of the multi-agent system.
     """
-    coordinator = get_coordinator()
-    return coordinator.get_coordination_status()
+    return _cached_status("status", coordinator, coordinator.get_coordination_status)
 
 
 @router.post("/agents/register")
-async def register_agent(request: RegisterAgentRequest):
+async def register_agent(request: RegisterAgentRequest, coordinator: CoordinatorDep):
     """
     Register a new agent with the system.
     """
-    coordinator = get_coordinator()
+    # Map role
+    try:
+        role = AgentRole(request.role.lower())
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Unknown role: {request.role}")
 
     # Create agent based on type
-    agent_id = request.agent_id or f"{request.agent_type.value}_agent_{datetime.now().timestamp()}"
+    agent_id = request.agent_id or f"{request.agent_type.value}_agent_{uuid.uuid4().hex[:12]}"
     name = request.name or f"{request.agent_type.value.upper()} Agent"
 
     if request.agent_type == AgentTypeEnum.BMS:
@@ -240,15 +364,6 @@ async def register_agent(request: RegisterAgentRequest):
     else:
         raise HTTPException(status_code=400, detail=f"Unknown agent type: {request.agent_type}")
 
-    # Map role
-    role_map = {
-        "coordinator": AgentRole.COORDINATOR,
-        "supervisor": AgentRole.SUPERVISOR,
-        "specialist": AgentRole.SPECIALIST,
-        "worker": AgentRole.WORKER
-    }
-    role = role_map.get(request.role.lower(), AgentRole.WORKER)
-
     # Register
     success = await coordinator.register_agent(agent, role)
 
@@ -264,12 +379,10 @@ async def register_agent(request: RegisterAgentRequest):
 
 
 @router.delete("/agents/{agent_id}")
-async def unregister_agent(agent_id: str):
+async def unregister_agent(agent_id: str, coordinator: CoordinatorDep):
     """
     Unregister an agent from the system.
     """
-    coordinator = get_coordinator()
-
     success = await coordinator.unregister_agent(agent_id)
 
     if not success:
@@ -279,12 +392,10 @@ async def unregister_agent(agent_id: str):
 
 
 @router.get("/agents/{agent_id}")
-async def get_agent_status(agent_id: str):
+async def get_agent_status(agent_id: str, coordinator: CoordinatorDep):
     """
     Get the status of a specific agent.
     """
-    coordinator = get_coordinator()
-
     status = coordinator.get_agent_status(agent_id)
 
     if status is None:
@@ -294,37 +405,35 @@ async def get_agent_status(agent_id: str):
 
 
 @router.get("/agents")
-async def list_agents():
+async def list_agents(coordinator: CoordinatorDep):
     """
     List all registered agents.
     """
-    coordinator = get_coordinator()
-
-    agents = []
-    for agent_id, reg in coordinator.agents.items():
-        agents.append({
-            "agent_id": agent_id,
-            "name": reg.agent.name,
-            "role": reg.role.value,
-            "state": reg.agent.state.value,
-            "capabilities": reg.capabilities,
-            "last_seen": reg.last_seen.isoformat()
-        })
+    def build() -> Dict[str, Any]:
+        agents = [
+            {
+                "agent_id": agent_id,
+                "name": reg.agent.name,
+                "role": reg.role.value,
+                "state": reg.agent.state.value,
+                "capabilities": reg.capabilities,
+                "last_seen": reg.last_seen
+            }
+            for agent_id, reg in coordinator.agents.items()
+        ]
+        return {"agents": agents, "count": len(agents)}
 
-    return {"agents": agents, "count": len(agents)}
+    return _cached_status("agents", coordinator, build)
 
 
 @router.post("/tasks")
-async def create_task(request: CreateTaskRequest):
+async def create_task(request: CreateTaskRequest, coordinator: CoordinatorDep):
     """
     Create and allocate a new task.
     """
-    coordinator = get_coordinator()
-
     deadline = None
     if request.deadline_seconds:
-        from datetime import timedelta
-        deadline = datetime.now() + timedelta(seconds=request.deadline_seconds)
+        deadline = time.monotonic() + request.deadline_seconds
 
     task = await coordinator.create_task(
         description=request.description,
@@ -343,54 +452,18 @@ async def create_task(request: CreateTaskRequest):
 
 
 @router.get("/tasks")
-async def list_tasks():
+async def list_tasks(coordinator: CoordinatorDep):
     """
     List all tasks (pending, active, and recent completed).
     """
-    coordinator = get_coordinator()
-
-    return {
-        "pending": [
-            {
-                "id": t.id,
-                "description": t.description,
-                "status": t.status,
-                "priority": t.priority.name,
-                "created_at": t.created_at.isoformat()
-            }
-            for t in coordinator.pending_tasks.values()
-        ],
-        "active": [
-            {
-                "id": t.id,
-                "description": t.description,
-                "status": t.status,
-                "assigned_to": t.assigned_agent,
-                "started_at": t.started_at.isoformat() if t.started_at else None
-            }
-            for t in coordinator.active_tasks.values()
-        ],
-        "completed_recent": [
-            {
-                "id": t.id,
-                "description": t.description,
-                "status": t.status,
-                "assigned_to": t.assigned_agent,
-                "completed_at": t.completed_at.isoformat() if t.completed_at else None
-            }
-            for t in coordinator.completed_tasks[-20:]
-        ],
-        "stats": coordinator.task_stats
-    }
+    return StreamingResponse(_stream_tasks(coordinator), media_type="application/json")
 
 
 @router.post("/messages/send")
-async def send_message(request: SendMessageRequest):
+async def send_message(request: SendMessageRequest, coordinator: CoordinatorDep):
     """
     Send a message to a specific agent.
     """
-    coordinator = get_coordinator()
-
     message = AgentMessage(
         sender_id="api",
         receiver_id=request.receiver_id,
@@ -409,33 +482,37 @@ async def send_message(request: SendMessageRequest):
 
 
 @router.post("/messages/broadcast")
-async def broadcast_message(request: BroadcastRequest):
+async def broadcast_message(request: BroadcastRequest, coordinator: CoordinatorDep):
     """
     Broadcast a message to all agents.
     """
-    coordinator = get_coordinator()
+    priority = priority_to_enum(request.priority)
+    messages = [
+        AgentMessage(
+            sender_id="api",
+            receiver_id=agent_id,
+            topic=request.topic,
+            payload=request.payload,
+            priority=priority
+        )
+        for agent_id in coordinator.agents
+    ]
 
-    await coordinator._broadcast_message({
-        "topic": request.topic,
-        "payload": request.payload,
-        "priority": priority_to_enum(request.priority).value
-    })
+    await coordinator.router.broadcast(messages)
 
     return {
         "success": True,
-        "recipients": len(coordinator.agents)
+        "recipients": len(messages)
     }
 
 
 # Safety Agent Endpoints
 
 @router.get("/safety/status")
-async def get_safety_status():
+async def get_safety_status(coordinator: CoordinatorDep):
     """
     Get the current safety status.
     """
-    coordinator = get_coordinator()
-
     safety_reg = coordinator.agents.get("safety_agent")
     if not safety_reg:
         raise HTTPException(status_code=404, detail="Safety agent not found")
@@ -445,12 +522,10 @@ async def get_safety_status():
 
 
 @router.post("/safety/telemetry")
-async def process_telemetry(data: TelemetryData):
+async def process_telemetry(data: TelemetryData, coordinator: CoordinatorDep):
     """
     Send telemetry data to the safety agent for monitoring.
     """
-    coordinator = get_coordinator()
-
     safety_reg = coordinator.agents.get("safety_agent")
     if not safety_reg:
         raise HTTPException(status_code=404, detail="Safety agent not found")
@@ -459,7 +534,7 @@ async def process_telemetry(data: TelemetryData):
         sender_id="api",
         receiver_id="safety_agent",
         topic="telemetry",
-        payload=data.dict(exclude_none=True),
+        payload=data.model_dump(exclude_none=True),
         priority=AgentPriority.HIGH
     )
 
@@ -469,12 +544,10 @@ async def process_telemetry(data: TelemetryData):
 
 
 @router.post("/safety/emergency-stop")
-async def emergency_stop():
+async def emergency_stop(coordinator: CoordinatorDep):
     """
     Trigger emergency stop.
     """
-    coordinator = get_coordinator()
-
     safety_reg = coordinator.agents.get("safety_agent")
     if not safety_reg:
         raise HTTPException(status_code=404, detail="Safety agent not found")
@@ -487,12 +560,10 @@ async def emergency_stop():
 
 
 @router.post("/safety/thresholds")
-async def update_threshold(request: UpdateThresholdRequest):
+async def update_threshold(request: UpdateThresholdRequest, coordinator: CoordinatorDep):
     """
     Update a safety threshold.
     """
-    coordinator = get_coordinator()
-
     safety_reg = coordinator.agents.get("safety_agent")
     if not safety_reg:
         raise HTTPException(status_code=404, detail="Safety agent not found")
@@ -501,7 +572,7 @@ async def update_threshold(request: UpdateThresholdRequest):
         sender_id="api",
         receiver_id="safety_agent",
         topic="update_threshold",
-        payload=request.dict(exclude_none=True)
+        payload=request.model_dump(exclude_none=True)
     )
 
     await coordinator.router.route_message(message)
@@ -511,6 +582,7 @@ async def update_threshold(request: UpdateThresholdRequest):
 
 @router.get("/safety/events")
 async def get_safety_events(
+    coordinator: CoordinatorDep,
     level: Optional[str] = None,
     zone: Optional[str] = None,
     limit: int = 100
@@ -518,49 +590,33 @@ async def get_safety_events(
     """
     Get safety event history.
     """
-    coordinator = get_coordinator()
-
     safety_reg = coordinator.agents.get("safety_agent")
     if not safety_reg:
         raise HTTPException(status_code=404, detail="Safety agent not found")
 
     safety_agent: SafetyAgent = safety_reg.agent
 
-    from ..services.agents.safety_agent import SafetyLevel, SafetyZone
+    level_enum = _lookup_lower(_SAFETY_LEVELS, level)
+    zone_enum = _lookup_lower(_SAFETY_ZONES, zone)
 
-    level_enum = None
-    zone_enum = None
-
-    if level:
-        try:
-            level_enum = SafetyLevel[level.upper()]
-        except KeyError:
-            pass
-
-    if zone:
-        try:
-            zone_enum = SafetyZone(zone.lower())
-        except ValueError:
-            pass
-
-    events = safety_agent.get_event_history(
+    # Filtering and sorting a long history is CPU-bound; keep it off the event loop
+    events = await asyncio.to_thread(
+        safety_agent.get_event_history,
         level=level_enum,
         zone=zone_enum,
         limit=limit
     )
 
-    return {"events": events, "count": len(events)}
+    return StreamingResponse(_stream_events(events), media_type="application/json")
 
 
 # Optimization Agent Endpoints
 
 @router.get("/optimization/status")
-async def get_optimization_status():
+async def get_optimization_status(coordinator: CoordinatorDep):
     """
     Get the current optimization status.
     """
-    coordinator = get_coordinator()
-
     opt_reg = coordinator.agents.get("optimization_agent")
     if not opt_reg:
         raise HTTPException(status_code=404, detail="Optimization agent not found")
@@ -570,19 +626,20 @@ async def get_optimization_status():
 
 
 @router.post("/optimization/run")
-async def run_optimization(request: OptimizationRequest):
+async def run_optimization(request: OptimizationRequest, coordinator: CoordinatorDep):
     """
     Run schedule optimization.
     """
-    coordinator = get_coordinator()
-
     opt_reg = coordinator.agents.get("optimization_agent")
     if not opt_reg:
         raise HTTPException(status_code=404, detail="Optimization agent not found")
 
+    # Sent as a request from the coordinator so the agent's response is
+    # correlated back to this call instead of polling optimization_history
     message = AgentMessage(
-        sender_id="api",
+        sender_id=coordinator.agent_id,
         receiver_id="optimization_agent",
+        message_type=MessageType.REQUEST,
         topic="optimize_schedule",
         payload={
             "horizon_hours": request.horizon_hours,
@@ -592,33 +649,30 @@ async def run_optimization(request: OptimizationRequest):
         priority=AgentPriority.HIGH
     )
 
-    await coordinator.router.route_message(message)
-
-    # Wait briefly for result
-    await asyncio.sleep(0.5)
-
-    opt_agent: OptimizationAgent = opt_reg.agent
+    response = await coordinator._request_and_wait(
+        "optimization_agent",
+        message,
+        timeout=settings.optimization_timeout
+    )
 
-    if opt_agent.optimization_history:
-        last_result = opt_agent.optimization_history[-1]
-        return {
-            "success": last_result.success,
-            "schedules": len(last_result.schedules),
-            "expected_revenue": last_result.expected_revenue,
-            "expected_cost": last_result.expected_cost,
-            "optimization_time_ms": last_result.optimization_time_ms
-        }
+    if response is None:
+        raise HTTPException(status_code=504, detail="Optimization timed out")
 
-    return {"success": True, "message": "Optimization started"}
+    result = response.payload
+    return {
+        "success": result.get("success", False),
+        "schedules": len(result.get("schedules", [])),
+        "expected_revenue": result.get("expected_revenue"),
+        "expected_cost": result.get("expected_cost"),
+        "optimization_time_ms": result.get("optimization_time_ms")
+    }
 
 
 @router.get("/optimization/schedules")
-async def get_schedules():
+async def get_schedules(coordinator: CoordinatorDep):
     """
     Get current active and pending schedules.
     """
-    coordinator = get_coordinator()
-
     opt_reg = coordinator.agents.get("optimization_agent")
     if not opt_reg:
         raise HTTPException(status_code=404, detail="Optimization agent not found")
@@ -630,8 +684,8 @@ async def get_schedules():
             {
                 "id": s.id,
                 "type": s.schedule_type.value,
-                "start_time": s.start_time.isoformat(),
-                "end_time": s.end_time.isoformat(),
+                "start_time": s.start_time,
+                "end_time": s.end_time,
                 "power_setpoint_kw": s.power_setpoint,
                 "objective": s.objective.value
             }
@@ -641,8 +695,8 @@ async def get_schedules():
             {
                 "id": s.id,
                 "type": s.schedule_type.value,
-                "start_time": s.start_time.isoformat(),
-                "end_time": s.end_time.isoformat(),
+                "start_time": s.start_time,
+                "end_time": s.end_time,
                 "power_setpoint_kw": s.power_setpoint
             }
             for s in opt_agent.pending_schedules
@@ -652,6 +706,7 @@ async def get_schedules():
 
 @router.post("/optimization/price-signal")
 async def send_price_signal(
+    coordinator: CoordinatorDep,
     buy_price: float,
     sell_price: float,
     demand_charge: float = 0.0,
@@ -660,8 +715,6 @@ async def send_price_signal(
     """
     Send a price signal to the optimization agent.
     """
-    coordinator = get_coordinator()
-
     message = AgentMessage(
         sender_id="api",
         receiver_id="optimization_agent",
@@ -684,12 +737,10 @@ async def send_price_signal(
 # BMS Agent Endpoints
 
 @router.get("/bms/status")
-async def get_bms_status():
+async def get_bms_status(coordinator: CoordinatorDep):
     """
     Get the current BMS agent status.
     """
-    coordinator = get_coordinator()
-
     bms_reg = coordinator.agents.get("bms_agent")
     if not bms_reg:
         raise HTTPException(status_code=404, detail="BMS agent not found")
@@ -699,12 +750,10 @@ async def get_bms_status():
 
 
 @router.post("/bms/cell-data")
-async def update_cell_data(cells: List[Dict[str, Any]]):
+async def update_cell_data(cells: List[Dict[str, Any]], coordinator: CoordinatorDep):
     """
     Send cell data to the BMS agent.
     """
-    coordinator = get_coordinator()
-
     message = AgentMessage(
         sender_id="api",
         receiver_id="bms_agent",
@@ -719,12 +768,10 @@ async def update_cell_data(cells: List[Dict[str, Any]]):
 
 
 @router.post("/bms/request-balancing")
-async def request_balancing():
+async def request_balancing(coordinator: CoordinatorDep):
     """
     Request cell balancing analysis.
     """
-    coordinator = get_coordinator()
-
     message = AgentMessage(
         sender_id="api",
         receiver_id="bms_agent",
@@ -741,21 +788,18 @@ async def request_balancing():
 # Blackboard Endpoints
 
 @router.get("/blackboard")
-async def get_blackboard_snapshot():
+async def get_blackboard_snapshot(coordinator: CoordinatorDep):
     """
     Get the current blackboard state.
     """
-    coordinator = get_coordinator()
-    return coordinator.blackboard.get_snapshot()
+    return await coordinator.blackboard.snapshot()
 
 
 @router.post("/blackboard")
-async def write_to_blackboard(request: BlackboardWriteRequest):
+async def write_to_blackboard(request: BlackboardWriteRequest, coordinator: CoordinatorDep):
     """
     Write data to the blackboard.
     """
-    coordinator = get_coordinator()
-
     watchers = await coordinator.blackboard.write(
         request.key,
         request.value,
@@ -770,12 +814,10 @@ async def write_to_blackboard(request: BlackboardWriteRequest):
 
 
 @router.get("/blackboard/{key}")
-async def read_from_blackboard(key: str):
+async def read_from_blackboard(key: str, coordinator: CoordinatorDep):
     """
     Read data from the blackboard.
     """
-    coordinator = get_coordinator()
-
     value = await coordinator.blackboard.read(key)
 
     if value is None:
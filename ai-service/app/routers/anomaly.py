@@ -2,13 +2,23 @@
 Anomaly Detection Router - Battery diagnostics endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Body
-from fastapi.responses import JSONResponse
+import asyncio
+from collections import Counter
+from functools import cached_property
+
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Body, Response
 from typing import List, Dict, Any
 from pydantic import BaseModel
+import numpy as np
+import orjson
 
+from app.config import settings
+from app.routers.dependencies import internal_error, json_body, json_body_openapi
 from app.services.anomaly_service import anomaly_service
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -23,15 +33,42 @@ class TelemetryData(BaseModel):
     temperature: Dict[str, float] = {"min": 25, "max": 30, "average": 27}
     cells: List[Dict[str, Any]] = []
 
+    @cached_property
+    def cells_soa(self) -> Dict[str, np.ndarray]:
+        """Cell fields as contiguous columns, parsed once per request."""
+        return {
+            "voltage": np.fromiter(
+                (c.get("voltage", 0) for c in self.cells),
+                dtype=np.float64,
+                count=len(self.cells),
+            ),
+        }
+
 
 class TelemetryHistory(BaseModel):
     """Historical telemetry data."""
     history: List[TelemetryData]
 
 
-@router.post("/analyze")
+# Thresholds are fixed for the lifetime of the process, so the reply is
+# encoded once at import
+_THRESHOLDS_JSON = orjson.dumps({
+    "thresholds": anomaly_service.thresholds,
+    "description": {
+        "cell_overvoltage": "Tensão máxima por célula (V)",
+        "cell_undervoltage": "Tensão mínima por célula (V)",
+        "cell_imbalance_max": "Desbalanceamento máximo (V)",
+        "temp_high_critical": "Temperatura crítica alta (°C)",
+        "temp_low_critical": "Temperatura crítica baixa (°C)",
+        "soh_degraded": "SOH considerado degradado (%)",
+        "soh_critical": "SOH crítico (%)",
+    },
+})
+
+
+@router.post("/analyze", openapi_extra=json_body_openapi(TelemetryData))
 async def analyze_telemetry(
-    telemetry: TelemetryData = Body(...),
+    telemetry: TelemetryData = Depends(json_body(TelemetryData)),
 ):
     """
     Analyze battery telemetry for anomalies.
@@ -50,15 +87,18 @@ async def analyze_telemetry(
         raise HTTPException(status_code=503, detail="Anomaly model not loaded")
 
     try:
-        result = await anomaly_service.analyze_telemetry(telemetry.model_dump())
+        # Validated fields already sit in the model's __dict__; hand them over
+        # as-is rather than serializing the model back into a new dict
+        data = dict(vars(telemetry), cells_soa=telemetry.cells_soa)
+        result = await anomaly_service.analyze_telemetry(data)
 
-        return JSONResponse(content={
+        return {
             "success": True,
             "data": result,
-        })
+        }
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Anomaly analysis failed")
 
 
 @router.post("/history")
@@ -81,16 +121,29 @@ async def analyze_history(
         raise HTTPException(status_code=400, detail="No history data provided")
 
     try:
-        history = [t.model_dump() for t in data.history]
+        history = [vars(t) for t in data.history]
         result = await anomaly_service.analyze_history(history)
 
-        return JSONResponse(content={
+        return {
             "success": True,
             "data": result,
-        })
+        }
+
+    except Exception:
+        raise internal_error(logger, "History analysis failed")
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+
+async def _analyze_chunk(telemetries: List[Dict[str, Any]]) -> List[Any]:
+    """Analyze one /batch chunk, isolating failures to the offending systems."""
+    try:
+        return await anomaly_service.analyze_telemetry_batch(telemetries)
+    except Exception:
+        # A malformed entry fails the vectorized pass; analyze systems
+        # individually so only the offending ones are reported as errors
+        return await asyncio.gather(
+            *(anomaly_service.analyze_telemetry(t) for t in telemetries),
+            return_exceptions=True,
+        )
 
 
 @router.post("/batch")
@@ -110,23 +163,33 @@ async def analyze_batch(
         raise HTTPException(status_code=503, detail="Anomaly model not loaded")
 
     try:
-        results = []
-        for system in systems:
-            system_id = system.get("systemId")
-            telemetry = system.get("telemetry", {})
+        telemetries = [system.get("telemetry", {}) for system in systems]
+
+        # Analysis runs on the event loop, so large batches are taken in
+        # bounded chunks with a yield in between to keep other requests moving
+        analyses = []
+        chunk_size = settings.anomaly_batch_chunk_size
+        for start in range(0, len(telemetries), chunk_size):
+            if start:
+                await asyncio.sleep(0)
+            analyses.extend(await _analyze_chunk(telemetries[start:start + chunk_size]))
 
-            analysis = await anomaly_service.analyze_telemetry(telemetry)
+        results = []
+        for system, analysis in zip(systems, analyses):
+            if isinstance(analysis, Exception):
+                analysis = {"status": "error", "error": str(analysis)}
             results.append({
-                "systemId": system_id,
+                "systemId": system.get("systemId"),
                 "analysis": analysis,
             })
 
         # Summary
-        critical_count = sum(1 for r in results if r["analysis"]["status"] == "critical")
-        warning_count = sum(1 for r in results if r["analysis"]["status"] == "warning")
-        healthy_count = sum(1 for r in results if r["analysis"]["status"] == "healthy")
+        status_counts = Counter(r["analysis"]["status"] for r in results)
+        critical_count = status_counts["critical"]
+        warning_count = status_counts["warning"]
+        healthy_count = status_counts["healthy"]
 
-        return JSONResponse(content={
+        return {
             "success": True,
             "data": {
                 "results": results,
@@ -135,29 +198,19 @@ async def analyze_batch(
                     "critical": critical_count,
                     "warning": warning_count,
                     "healthy": healthy_count,
+                    "error": status_counts["error"],
                 },
             },
-        })
+        }
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Batch anomaly analysis failed")
 
 
 @router.get("/thresholds")
 async def get_thresholds():
     """Get current anomaly detection thresholds."""
-    return {
-        "thresholds": anomaly_service.thresholds,
-        "description": {
-            "cell_overvoltage": "Tensão máxima por célula (V)",
-            "cell_undervoltage": "Tensão mínima por célula (V)",
-            "cell_imbalance_max": "Desbalanceamento máximo (V)",
-            "temp_high_critical": "Temperatura crítica alta (°C)",
-            "temp_low_critical": "Temperatura crítica baixa (°C)",
-            "soh_degraded": "SOH considerado degradado (%)",
-            "soh_critical": "SOH crítico (%)",
-        },
-    }
+    return Response(_THRESHOLDS_JSON, media_type="application/json")
 
 
 @router.get("/status")
@@ -2,14 +2,50 @@
 Audio Analysis Router - Whisper endpoints
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-from fastapi.responses import JSONResponse
+import logging
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Response
 from typing import Optional
+import orjson
 
+from app.routers.dependencies import internal_error
 from app.services.whisper_service import whisper_service
 
+# Handlers stay on the event loop: no sync dependencies (keep any added later
+# async def), and no file.seek(0) since the form parser already rewinds uploads
+# and seeking a rolled-to-disk file goes through the threadpool.
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+# Exact media types (parameters stripped). Includes the aliases browsers
+# and recorders send besides the common names, e.g. audio/wave (RFC 2361)
+VALID_AUDIO_TYPES = frozenset({
+    "audio/wav",
+    "audio/wave",
+    "audio/x-wav",
+    "audio/vnd.wave",
+    "audio/mpeg",
+    "audio/mpeg3",
+    "audio/x-mpeg-3",
+    "audio/mp3",
+    "audio/m4a",
+    "audio/x-m4a",
+    "audio/mp4",
+})
+
+# The command vocabulary is fixed at service init; encode the listing once
+_VOICE_COMMANDS_JSON = orjson.dumps({
+    "commands": [
+        {"phrase": k, "action": v}
+        for k, v in whisper_service.voice_commands.items()
+    ],
+    "alert_keywords": [
+        {"keyword": k, "type": v}
+        for k, v in whisper_service.alert_keywords.items()
+    ],
+    "language": "pt-BR",
+})
+
 
 @router.post("/transcribe")
 async def transcribe_audio(
@@ -25,24 +61,23 @@ async def transcribe_audio(
         raise HTTPException(status_code=503, detail="Whisper model not loaded")
 
     # Validate file type
-    valid_types = ["audio/wav", "audio/mpeg", "audio/mp3", "audio/m4a", "audio/x-wav"]
-    if file.content_type and not any(t in file.content_type for t in valid_types):
+    content_type = (file.content_type or "").split(";", 1)[0].strip().lower()
+    if content_type and content_type not in VALID_AUDIO_TYPES:
         raise HTTPException(
             status_code=400,
             detail="File must be an audio file (WAV, MP3, M4A)"
         )
 
     try:
-        contents = await file.read()
-        result = await whisper_service.transcribe(contents, language=language)
+        result = await whisper_service.transcribe(file.file, language=language)
 
-        return JSONResponse(content={
+        return {
             "success": True,
             "data": result,
-        })
+        }
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Transcription failed")
 
 
 @router.post("/command")
@@ -66,16 +101,15 @@ async def detect_voice_command(
         raise HTTPException(status_code=503, detail="Whisper model not loaded")
 
     try:
-        contents = await file.read()
-        result = await whisper_service.detect_voice_command(contents)
+        result = await whisper_service.detect_voice_command(file.file)
 
-        return JSONResponse(content={
+        return {
             "success": True,
             "data": result,
-        })
+        }
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Voice command detection failed")
 
 
 @router.post("/analyze")
@@ -91,32 +125,21 @@ async def analyze_audio_event(
         raise HTTPException(status_code=503, detail="Whisper model not loaded")
 
     try:
-        contents = await file.read()
-        result = await whisper_service.analyze_audio_event(contents)
+        result = await whisper_service.analyze_audio_event(file.file)
 
-        return JSONResponse(content={
+        return {
             "success": True,
             "data": result,
-        })
+        }
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Audio event analysis failed")
 
 
 @router.get("/commands")
 async def list_voice_commands():
     """List all supported voice commands."""
-    return {
-        "commands": [
-            {"phrase": k, "action": v}
-            for k, v in whisper_service.voice_commands.items()
-        ],
-        "alert_keywords": [
-            {"keyword": k, "type": v}
-            for k, v in whisper_service.alert_keywords.items()
-        ],
-        "language": "pt-BR",
-    }
+    return Response(_VOICE_COMMANDS_JSON, media_type="application/json")
 
 
 @router.get("/status")
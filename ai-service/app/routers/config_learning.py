@@ -3,12 +3,15 @@ Config Learning Router
 API endpoints for AI-powered configuration learning and optimization.
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel, Field
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from enum import Enum
+from functools import lru_cache
+import orjson
 
+from app.routers.dependencies import json_body, json_body_openapi
 from app.services.config_learning import (
     ConfigStore,
     ConfigLearner,
@@ -21,14 +24,54 @@ from app.services.config_learning.config_optimizer import (
     OperatingConditions,
 )
 from app.services.config_learning.similarity_engine import DeviceProfile
+from app.services.config_learning.config_store import DEFAULT_CONFIGS
 
 router = APIRouter(prefix="/config-learning", tags=["config-learning"])
 
-# Initialize services
-config_store = ConfigStore()
-config_learner = ConfigLearner()
-config_optimizer = ConfigOptimizer()
-similarity_engine = SimilarityEngine()
+# Services are built on first use so importing the router stays cheap;
+# warmup() (run from app.main's lifespan, and by POST
+# /config-learning/warmup) constructs them ahead of traffic.
+
+@lru_cache(maxsize=1)
+def get_config_store() -> ConfigStore:
+    return ConfigStore()
+
+
+@lru_cache(maxsize=1)
+def get_config_learner() -> ConfigLearner:
+    return ConfigLearner()
+
+
+@lru_cache(maxsize=1)
+def get_config_optimizer() -> ConfigOptimizer:
+    return ConfigOptimizer()
+
+
+@lru_cache(maxsize=1)
+def get_similarity_engine() -> SimilarityEngine:
+    return SimilarityEngine()
+
+
+def warmup():
+    """Construct the config learning services"""
+    get_config_store()
+    get_config_learner()
+    get_config_optimizer()
+    get_similarity_engine()
+
+
+# Default configs are constants; their replies are encoded once at import
+_DEFAULT_CONFIGS_JSON = orjson.dumps({
+    "available_types": list(DEFAULT_CONFIGS.keys()),
+    "configs": DEFAULT_CONFIGS
+})
+_DEFAULT_CONFIG_JSON = {
+    device_type: orjson.dumps({
+        "device_type": device_type,
+        "parameters": parameters
+    })
+    for device_type, parameters in DEFAULT_CONFIGS.items()
+}
 
 
 # ============== Request/Response Models ==============
@@ -114,12 +157,25 @@ class TransferConfigRequest(BaseModel):
     source_config: Dict[str, Any]
 
 
+# ============== Service Endpoints ==============
+
+@router.post("/warmup")
+async def warmup_services():
+    """Construct the config learning services ahead of the first request"""
+    warmup()
+
+    return {
+        "success": True,
+        "services": ["config_store", "config_learner", "config_optimizer", "similarity_engine"]
+    }
+
+
 # ============== Configuration Store Endpoints ==============
 
 @router.post("/configs")
 async def create_config(request: ConfigCreateRequest):
     """Create a new configuration"""
-    config_id = config_store.create_config(
+    config_id = get_config_store().create_config(
         device_id=request.device_id,
         device_type=request.device_type,
         parameters=request.parameters,
@@ -137,7 +193,7 @@ async def create_config(request: ConfigCreateRequest):
 @router.get("/configs/{config_id}")
 async def get_config(config_id: str):
     """Get configuration by ID"""
-    config = config_store.get_config(config_id)
+    config = get_config_store().get_config(config_id)
 
     if not config:
         raise HTTPException(status_code=404, detail="Configuration not found")
@@ -150,8 +206,8 @@ async def get_config(config_id: str):
         "source": config.source,
         "performance_score": config.performance_score,
         "usage_count": config.usage_count,
-        "created_at": config.created_at.isoformat(),
-        "updated_at": config.updated_at.isoformat(),
+        "created_at": config.created_at,
+        "updated_at": config.updated_at,
         "metadata": config.metadata
     }
 
@@ -159,7 +215,7 @@ async def get_config(config_id: str):
 @router.put("/configs/{config_id}")
 async def update_config(config_id: str, request: ConfigUpdateRequest):
     """Update configuration parameters"""
-    success = config_store.update_config(
+    success = get_config_store().update_config(
         config_id=config_id,
         new_parameters=request.parameters,
         change_reason=request.change_reason
@@ -177,7 +233,7 @@ async def update_config(config_id: str, request: ConfigUpdateRequest):
 @router.get("/configs/device/{device_id}")
 async def get_device_configs(device_id: str):
     """Get all configurations for a device"""
-    configs = config_store.get_device_configs(device_id)
+    configs = get_config_store().get_device_configs(device_id)
 
     return {
         "device_id": device_id,
@@ -189,7 +245,7 @@ async def get_device_configs(device_id: str):
                 "parameters": c.parameters,
                 "source": c.source,
                 "performance_score": c.performance_score,
-                "created_at": c.created_at.isoformat()
+                "created_at": c.created_at
             }
             for c in configs
         ]
@@ -204,7 +260,7 @@ async def search_configs(
     limit: int = Query(20, ge=1, le=100)
 ):
     """Search configurations with filters"""
-    results = config_store.search_configs(
+    results = get_config_store().search_configs(
         device_type=device_type,
         min_score=min_score,
         source=source,
@@ -230,7 +286,7 @@ async def search_configs(
 @router.get("/configs/best/{device_type}")
 async def get_best_config(device_type: str):
     """Get best performing configuration for device type"""
-    config = config_store.get_best_config(device_type)
+    config = get_config_store().get_best_config(device_type)
 
     if not config:
         raise HTTPException(
@@ -251,7 +307,7 @@ async def get_best_config(device_type: str):
 @router.get("/configs/{config_id}/versions")
 async def get_config_versions(config_id: str):
     """Get version history for a configuration"""
-    versions = config_store.get_version_history(config_id)
+    versions = get_config_store().get_version_history(config_id)
 
     return {
         "config_id": config_id,
@@ -261,7 +317,7 @@ async def get_config_versions(config_id: str):
                 "version": v.version,
                 "parameters": v.parameters,
                 "change_reason": v.change_reason,
-                "changed_at": v.changed_at.isoformat()
+                "changed_at": v.changed_at
             }
             for v in versions
         ]
@@ -271,7 +327,7 @@ async def get_config_versions(config_id: str):
 @router.post("/configs/{config_id}/record-performance")
 async def record_performance(config_id: str, score: float = Query(ge=0.0, le=1.0)):
     """Record performance score for a configuration"""
-    success = config_store.record_performance(config_id, score)
+    success = get_config_store().record_performance(config_id, score)
 
     if not success:
         raise HTTPException(status_code=404, detail="Configuration not found")
@@ -284,23 +340,31 @@ async def record_performance(config_id: str, score: float = Query(ge=0.0, le=1.0
 
 # ============== Learning Endpoints ==============
 
-@router.post("/learning/samples")
-async def add_sample(request: OperationalSampleRequest):
+@router.post("/learning/samples", openapi_extra=json_body_openapi(OperationalSampleRequest))
+async def add_sample(request: OperationalSampleRequest = Depends(json_body(OperationalSampleRequest))):
     """Add operational sample for learning"""
+    # Group the flat request into the learner's sample shape straight from
+    # the validated attributes; samples are keyed by device
     sample = OperationalSample(
-        device_id=request.device_id,
         timestamp=datetime.now(),
-        config=request.config,
-        ambient_temperature=request.ambient_temperature,
-        soc_start=request.soc_start,
-        soc_end=request.soc_end,
-        power_kw=request.power_kw,
+        config_id=request.device_id,
+        parameters=request.config,
+        conditions={
+            "ambient_temperature": request.ambient_temperature,
+            "soc_start": request.soc_start,
+            "soc_end": request.soc_end,
+            "power_kw": request.power_kw,
+        },
+        outcomes={
+            "efficiency": request.efficiency,
+            "degradation_rate": request.degradation_rate,
+            "revenue": request.revenue,
+        },
         duration_hours=request.duration_hours,
-        efficiency=request.efficiency,
-        degradation_rate=request.degradation_rate,
-        revenue=request.revenue
+        success=True
     )
 
+    config_learner = get_config_learner()
     config_learner.add_sample(sample)
 
     return {
@@ -322,7 +386,7 @@ async def trigger_learning(request: LearnRequest):
         )
 
     # Get current config for device
-    device_configs = config_store.get_device_configs(request.device_id)
+    device_configs = get_config_store().get_device_configs(request.device_id)
     if not device_configs:
         raise HTTPException(
             status_code=404,
@@ -331,7 +395,7 @@ async def trigger_learning(request: LearnRequest):
 
     current_config = device_configs[0].parameters
 
-    result = config_learner.learn(
+    result = get_config_learner().learn(
         device_id=request.device_id,
         current_config=current_config,
         strategy=strategy,
@@ -353,8 +417,8 @@ async def trigger_learning(request: LearnRequest):
 @router.get("/learning/status/{device_id}")
 async def get_learning_status(device_id: str):
     """Get learning status for device"""
-    samples = config_learner.samples.get(device_id, [])
-    history = config_learner.learning_history.get(device_id, [])
+    samples = get_config_learner().samples.get(device_id, [])
+    history = get_config_learner().learning_history.get(device_id, [])
 
     return {
         "device_id": device_id,
@@ -367,8 +431,8 @@ async def get_learning_status(device_id: str):
 
 # ============== Optimization Endpoints ==============
 
-@router.post("/optimization/optimize")
-async def optimize_config(request: OptimizeRequest):
+@router.post("/optimization/optimize", openapi_extra=json_body_openapi(OptimizeRequest))
+async def optimize_config(request: OptimizeRequest = Depends(json_body(OptimizeRequest))):
     """Optimize configuration for current conditions"""
     try:
         objective = OptimizationObjective(request.objective)
@@ -388,7 +452,7 @@ async def optimize_config(request: OptimizeRequest):
         grid_demand=request.grid_demand
     )
 
-    result = config_optimizer.optimize(
+    result = get_config_optimizer().optimize(
         base_config=request.base_config,
         conditions=conditions,
         objective=objective
@@ -404,8 +468,8 @@ async def optimize_config(request: OptimizeRequest):
     }
 
 
-@router.post("/optimization/recommendations")
-async def get_recommendations(request: OptimizeRequest):
+@router.post("/optimization/recommendations", openapi_extra=json_body_openapi(OptimizeRequest))
+async def get_recommendations(request: OptimizeRequest = Depends(json_body(OptimizeRequest))):
     """Get recommendations without full optimization"""
     conditions = OperatingConditions(
         ambient_temperature=request.ambient_temperature,
@@ -417,7 +481,7 @@ async def get_recommendations(request: OptimizeRequest):
         grid_demand=request.grid_demand
     )
 
-    recommendations = config_optimizer.get_recommendation(
+    recommendations = get_config_optimizer().get_recommendation(
         conditions=conditions,
         current_config=request.base_config
     )
@@ -454,19 +518,19 @@ async def register_device(request: DeviceProfileRequest):
         features=request.features
     )
 
-    similarity_engine.register_device(profile)
+    get_similarity_engine().register_device(profile)
 
     return {
         "success": True,
         "message": f"Device {request.device_id} registered",
-        "total_devices": len(similarity_engine.devices)
+        "total_devices": len(get_similarity_engine().devices)
     }
 
 
 @router.get("/similarity/devices/{device_id}")
 async def get_device(device_id: str):
     """Get device profile"""
-    device = similarity_engine.get_device(device_id)
+    device = get_similarity_engine().get_device(device_id)
 
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
@@ -494,7 +558,7 @@ async def list_devices(
     application: Optional[str] = None
 ):
     """List devices with optional filters"""
-    devices = similarity_engine.list_devices(
+    devices = get_similarity_engine().list_devices(
         device_type=device_type,
         climate=climate,
         application=application
@@ -519,12 +583,12 @@ async def list_devices(
 @router.post("/similarity/find-similar")
 async def find_similar_devices(request: FindSimilarRequest):
     """Find devices similar to a target"""
-    target = similarity_engine.get_device(request.device_id)
+    target = get_similarity_engine().get_device(request.device_id)
 
     if not target:
         raise HTTPException(status_code=404, detail="Target device not found")
 
-    similar = similarity_engine.find_similar(
+    similar = get_similarity_engine().find_similar(
         target=target,
         limit=request.limit,
         min_similarity=request.min_similarity
@@ -549,15 +613,15 @@ async def find_similar_devices(request: FindSimilarRequest):
 @router.post("/similarity/transfer-config")
 async def transfer_configuration(request: TransferConfigRequest):
     """Get configuration transfer recommendations"""
-    source = similarity_engine.get_device(request.source_device_id)
-    target = similarity_engine.get_device(request.target_device_id)
+    source = get_similarity_engine().get_device(request.source_device_id)
+    target = get_similarity_engine().get_device(request.target_device_id)
 
     if not source:
         raise HTTPException(status_code=404, detail="Source device not found")
     if not target:
         raise HTTPException(status_code=404, detail="Target device not found")
 
-    result = similarity_engine.get_transfer_recommendations(
+    result = get_similarity_engine().get_transfer_recommendations(
         source=source,
         target=target,
         source_config=request.source_config
@@ -576,7 +640,7 @@ async def transfer_configuration(request: TransferConfigRequest):
 @router.get("/similarity/fleet-statistics")
 async def get_fleet_statistics():
     """Get statistics about registered fleet"""
-    stats = similarity_engine.get_fleet_statistics()
+    stats = get_similarity_engine().get_fleet_statistics()
     return stats
 
 
@@ -585,26 +649,18 @@ async def get_fleet_statistics():
 @router.get("/defaults/{device_type}")
 async def get_default_config(device_type: str):
     """Get default configuration for device type"""
-    from app.services.config_learning.config_store import DEFAULT_CONFIGS
+    body = _DEFAULT_CONFIG_JSON.get(device_type)
 
-    if device_type not in DEFAULT_CONFIGS:
+    if body is None:
         raise HTTPException(
             status_code=404,
             detail=f"No default config for {device_type}. Available: {list(DEFAULT_CONFIGS.keys())}"
         )
 
-    return {
-        "device_type": device_type,
-        "parameters": DEFAULT_CONFIGS[device_type]
-    }
+    return Response(body, media_type="application/json")
 
 
 @router.get("/defaults")
 async def list_default_configs():
     """List all available default configurations"""
-    from app.services.config_learning.config_store import DEFAULT_CONFIGS
-
-    return {
-        "available_types": list(DEFAULT_CONFIGS.keys()),
-        "configs": DEFAULT_CONFIGS
-    }
+    return Response(_DEFAULT_CONFIGS_JSON, media_type="application/json")
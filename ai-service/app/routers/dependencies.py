@@ -0,0 +1,148 @@
+"""
+Shared router dependencies
+"""
+
+import asyncio
+import hashlib
+import logging
+import uuid
+from concurrent.futures import Executor
+from typing import Annotated, Any, Awaitable, Callable, Dict, Hashable, Type, TypeVar
+
+import orjson
+from fastapi import Depends, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+M = TypeVar("M", bound=BaseModel)
+T = TypeVar("T")
+
+
+def json_body(model: Type[M]) -> Callable[[Request], Awaitable[M]]:
+    """
+    Build a dependency that validates the raw JSON body as `model`.
+
+    Pydantic parses and validates the bytes in a single pass, skipping the
+    json.loads() + dict validation FastAPI does for Body parameters. Meant
+    for flat, high-volume request models; pair the route with
+    json_body_openapi() so the schema still shows up in the docs.
+    """
+    async def parse(request: Request) -> M:
+        try:
+            return model.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError([
+                {**error, "loc": ("body", *error["loc"])}
+                for error in e.errors(include_url=False)
+            ])
+
+    return parse
+
+
+def _inline_defs(schema: Any, defs: Dict[str, Any]) -> Any:
+    """Replace "#/$defs/..." references with the definitions themselves."""
+    if isinstance(schema, dict):
+        ref = schema.get("$ref", "")
+        if ref.startswith("#/$defs/"):
+            return _inline_defs(defs[ref[len("#/$defs/"):]], defs)
+        return {key: _inline_defs(value, defs) for key, value in schema.items()}
+    if isinstance(schema, list):
+        return [_inline_defs(item, defs) for item in schema]
+    return schema
+
+
+def json_body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    """OpenAPI request body for a route that reads `model` via json_body()."""
+    # Nested models come back as "#/$defs/..." refs, which would resolve
+    # against the OpenAPI document root; inline them instead
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": _inline_defs(schema, defs)},
+            },
+        },
+    }
+
+
+class CachedJSON:
+    """
+    JSON body that is only re-encoded when its inputs change.
+
+    For small payloads polled at a high rate (status and health probes):
+    `key` is a cheap snapshot of the state the payload depends on, and
+    `build` only runs again when that snapshot differs from last time.
+    """
+
+    def __init__(self, build: Callable[[], Dict[str, Any]], key: Callable[[], Hashable]):
+        self._build = build
+        self._key = key
+        self._cached_key: Any = object()
+        self._content = b""
+
+    def content(self) -> bytes:
+        """Current encoded body."""
+        key = self._key()
+        if key != self._cached_key:
+            self._content = orjson.dumps(self._build())
+            self._cached_key = key
+        return self._content
+
+
+class StaticJSON:
+    """
+    JSON body encoded once, served with an ETag.
+
+    For reference data that is fixed for the life of the process: the
+    bytes skip response-model validation and encoding on every request,
+    and a client that sends back the ETag in If-None-Match gets a 304.
+    """
+
+    def __init__(self, payload: Any):
+        self.content = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+        self.etag = f'"{hashlib.blake2b(self.content, digest_size=8).hexdigest()}"'
+
+    def response(self, request: Request) -> Response:
+        """200 with the body, or 304 if the client already has it."""
+        headers = {"ETag": self.etag}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (
+            if_none_match.strip() == "*"
+            or self.etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+        ):
+            return Response(status_code=304, headers=headers)
+        return Response(self.content, media_type="application/json", headers=headers)
+
+
+def internal_error(logger: logging.Logger, message: str) -> HTTPException:
+    """
+    Log the exception being handled and build the 500 to raise for it.
+
+    The traceback only goes to the log. The client gets `message` and a
+    short error id that also appears in the log line, instead of str(e).
+    """
+    error_id = uuid.uuid4().hex[:8]
+    logger.error("%s [error_id=%s]", message, error_id, exc_info=True)
+    return HTTPException(status_code=500, detail={"error": message, "error_id": error_id})
+
+
+def get_decode_pool(request: Request) -> Executor:
+    """
+    Thread pool shared by the routers for CPU-bound decode and parse work
+    (image decoding, base64, protocol detection).
+
+    Created at startup in app.main and sized to the CPU count, so it also
+    caps how many of these jobs run at once across all endpoints.
+    """
+    return request.app.state.decode_pool
+
+
+DecodePoolDep = Annotated[Executor, Depends(get_decode_pool)]
+
+
+async def run_in_pool(pool: Executor, func: Callable[..., T], *args: Any) -> T:
+    """Run func(*args) on `pool` without blocking the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
@@ -2,20 +2,133 @@
 Object Detection Router - YOLOv8 endpoints
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-from fastapi.responses import JSONResponse
-from PIL import Image
-import io
-from typing import List, Optional
+import logging
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Request, Response
+from fastapi.routing import APIRoute
+from starlette.datastructures import FormData
+from starlette.formparsers import MultiPartException, MultiPartParser
+from typing import BinaryIO, Callable, List, Optional, Union
 import base64
 
+import cv2
+import numpy as np
+import orjson
+
+try:
+    import simplejpeg
+    SIMPLEJPEG_AVAILABLE = True
+except ImportError:
+    SIMPLEJPEG_AVAILABLE = False
+
+from app.config import settings
+from app.routers.dependencies import CachedJSON, DecodePoolDep, internal_error, run_in_pool
 from app.services.yolo_service import yolo_service
 
-router = APIRouter()
+
+class _ImageUploadParser(MultiPartParser):
+    """Multipart parser that keeps larger parts in memory."""
+
+    # Starlette spools parts past 1 MiB to a temp file, which sends every
+    # 4K camera frame through the disk
+    max_file_size = settings.upload_spool_max_size
+
+
+class _ImageUploadRequest(Request):
+    """Request whose multipart form is parsed by _ImageUploadParser."""
+
+    async def _get_form(self, *, max_files=1000, max_fields=1000) -> FormData:
+        content_type = self.headers.get("content-type", "")
+        if self._form is None and content_type.lower().startswith("multipart/form-data"):
+            parser = _ImageUploadParser(
+                self.headers, self.stream(), max_files=max_files, max_fields=max_fields
+            )
+            try:
+                self._form = await parser.parse()
+            except MultiPartException as exc:
+                raise HTTPException(status_code=400, detail=exc.message)
+        return await super()._get_form(max_files=max_files, max_fields=max_fields)
+
+
+class _ImageUploadRoute(APIRoute):
+    """
+    Route that reads uploads with _ImageUploadRequest.
+
+    Scopes the larger in-memory spool to the detection endpoints; each
+    in-flight upload holds at most upload_spool_max_size of RAM before
+    going to disk.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def image_upload_handler(request: Request) -> Response:
+            return await handler(_ImageUploadRequest(request.scope, request.receive))
+
+        return image_upload_handler
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(route_class=_ImageUploadRoute)
+
+JPEG_MAGIC = b"\xff\xd8\xff"
+
+
+def _decode_image_bytes(contents: bytes) -> np.ndarray:
+    """
+    Decode an encoded image straight into a uint8 HWC BGR array.
+
+    JPEGs go through libjpeg-turbo (simplejpeg) when it is installed, with
+    cv2.imdecode covering PNG and anything simplejpeg rejects. BGR is the
+    channel order Ultralytics expects for ndarray input.
+    """
+    if SIMPLEJPEG_AVAILABLE and contents[:3] == JPEG_MAGIC:
+        try:
+            return simplejpeg.decode_jpeg(
+                contents, colorspace="BGR", fastdct=True, fastupsample=True
+            )
+        except ValueError:
+            pass  # e.g. CMYK JPEG, let OpenCV handle it
+
+    image = cv2.imdecode(np.frombuffer(contents, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Unsupported or corrupt image data")
+    return image
+
+
+def _decode_upload(file: BinaryIO) -> np.ndarray:
+    """
+    Read and decode an uploaded image.
+
+    Runs on the decode pool, so reading the spooled upload (from memory, or
+    from disk for files past upload_spool_max_size) doesn't go through
+    UploadFile's own threadpool hop.
+    """
+    return _decode_image_bytes(file.read())
+
+
+def _decode_base64_image(image_data: Union[str, bytes]) -> np.ndarray:
+    """Decode a base64 image, optionally wrapped in a data: URL."""
+    if isinstance(image_data, str):
+        image_data = image_data.encode("ascii")
+    payload = memoryview(image_data)[image_data.rfind(b",") + 1:]
+    return _decode_image_bytes(base64.b64decode(payload))
+
+
+def _decode_base64_json(body: bytes) -> np.ndarray:
+    """Decode a {"image_data": "<base64>"} request body."""
+    try:
+        image_data = orjson.loads(body)["image_data"]
+    except (orjson.JSONDecodeError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail='Body must be JSON with an "image_data" string')
+    if not isinstance(image_data, str):
+        raise HTTPException(status_code=400, detail='Body must be JSON with an "image_data" string')
+    return _decode_base64_image(image_data)
 
 
 @router.post("/image")
 async def detect_in_image(
+    pool: DecodePoolDep,
     file: UploadFile = File(...),
     confidence: float = Query(0.5, ge=0.1, le=1.0),
     classes: Optional[str] = Query(None, description="Comma-separated class IDs"),
@@ -39,9 +152,8 @@ async def detect_in_image(
         raise HTTPException(status_code=400, detail="File must be an image")
 
     try:
-        # Read and convert image
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents))
+        # Read and decode image
+        image = await run_in_pool(pool, _decode_upload, file.file)
 
         # Parse class filter
         class_filter = None
@@ -55,17 +167,18 @@ async def detect_in_image(
             classes=class_filter,
         )
 
-        return JSONResponse(content={
+        return {
             "success": True,
             "data": results,
-        })
+        }
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Object detection failed")
 
 
 @router.post("/persons")
 async def detect_persons(
+    pool: DecodePoolDep,
     file: UploadFile = File(...),
     confidence: float = Query(0.5, ge=0.1, le=1.0),
 ):
@@ -78,22 +191,22 @@ async def detect_persons(
         raise HTTPException(status_code=503, detail="YOLOv8 model not loaded")
 
     try:
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents))
+        image = await run_in_pool(pool, _decode_upload, file.file)
 
         results = await yolo_service.detect_persons(image, confidence=confidence)
 
-        return JSONResponse(content={
+        return {
             "success": True,
             "data": results,
-        })
+        }
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Person detection failed")
 
 
 @router.post("/zone")
 async def detect_in_zone(
+    pool: DecodePoolDep,
     file: UploadFile = File(...),
     zone: str = Query(..., description="Zone polygon as JSON array of [x,y] points"),
     confidence: float = Query(0.5, ge=0.1, le=1.0),
@@ -103,14 +216,12 @@ async def detect_in_zone(
 
     Zone is defined as a polygon with points [[x1,y1], [x2,y2], ...].
     """
-    import json
-
     if not yolo_service.is_loaded:
         raise HTTPException(status_code=503, detail="YOLOv8 model not loaded")
 
     try:
         # Parse zone polygon
-        zone_polygon = json.loads(zone)
+        zone_polygon = orjson.loads(zone)
         if not isinstance(zone_polygon, list) or len(zone_polygon) < 3:
             raise HTTPException(
                 status_code=400,
@@ -119,8 +230,7 @@ async def detect_in_zone(
 
         zone_tuples = [(p[0], p[1]) for p in zone_polygon]
 
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents))
+        image = await run_in_pool(pool, _decode_upload, file.file)
 
         results = await yolo_service.detect_in_zone(
             image,
@@ -128,38 +238,69 @@ async def detect_in_zone(
             confidence=confidence,
         )
 
-        return JSONResponse(content={
+        return {
             "success": True,
             "data": results,
-        })
+        }
 
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid zone polygon format")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.post("/base64")
+    except HTTPException:
+        raise
+    except Exception:
+        raise internal_error(logger, "Zone detection failed")
+
+
+BASE64_BODY_OPENAPI = {
+    "requestBody": {
+        "content": {
+            "text/plain": {"schema": {"type": "string", "description": "Base64 image or data: URL"}},
+            "application/json": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"image_data": {"type": "string"}},
+                    "required": ["image_data"],
+                },
+            },
+        },
+    },
+}
+
+
+@router.post("/base64", openapi_extra=BASE64_BODY_OPENAPI)
 async def detect_in_base64(
-    image_data: str,
+    request: Request,
+    pool: DecodePoolDep,
+    image_data: Optional[str] = Query(None, description="Base64 image; prefer sending it as the body"),
     confidence: float = Query(0.5, ge=0.1, le=1.0),
     classes: Optional[str] = Query(None),
 ):
     """
     Detect objects in a base64-encoded image.
 
+    The image goes in the body, either as the bare base64 text (or data:
+    URL) or as JSON {"image_data": "..."}. The body is read as bytes and
+    decoded off the event loop, so multi-MB frames never pass through
+    parameter parsing or string validation.
+
     Useful for real-time camera frame analysis.
     """
     if not yolo_service.is_loaded:
         raise HTTPException(status_code=503, detail="YOLOv8 model not loaded")
 
-    try:
-        # Decode base64
-        if "," in image_data:
-            image_data = image_data.split(",")[1]
+    body = await request.body()
+    if body:
+        if request.headers.get("content-type", "").startswith("application/json"):
+            decoder, data = _decode_base64_json, body
+        else:
+            decoder, data = _decode_base64_image, body
+    elif image_data:
+        decoder, data = _decode_base64_image, image_data
+    else:
+        raise HTTPException(status_code=400, detail="No image data in request body")
 
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
+    try:
+        image = await run_in_pool(pool, decoder, data)
 
         class_filter = None
         if classes:
@@ -171,21 +312,42 @@ async def detect_in_base64(
             classes=class_filter,
         )
 
-        return JSONResponse(content={
+        return {
             "success": True,
             "data": results,
-        })
+        }
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception:
+        raise internal_error(logger, "Object detection failed")
 
 
-@router.get("/status")
-async def detection_status():
-    """Get detection service status."""
+def _status() -> dict:
     return {
         "service": "yolo_detection",
         "loaded": yolo_service.is_loaded,
         "device": yolo_service.device,
         "model": yolo_service.model.__class__.__name__ if yolo_service.model else None,
+        "engine_precision": yolo_service.engine_precision,
+        "trt_version": yolo_service.trt_version,
     }
+
+
+# Polled by load balancers; only re-encoded when the model changes
+_STATUS = CachedJSON(
+    _status,
+    key=lambda: (
+        yolo_service.is_loaded,
+        yolo_service.device,
+        id(yolo_service.model),
+        yolo_service.engine_precision,
+        yolo_service.trt_version,
+    ),
+)
+
+
+@router.get("/status")
+async def detection_status():
+    """Get detection service status."""
+    return Response(_STATUS.content(), media_type="application/json")
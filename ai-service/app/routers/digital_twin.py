@@ -3,12 +3,18 @@ Digital Twin API Router
 Endpoints for battery simulation, state estimation, and degradation prediction
 """
 
+import asyncio
+import io
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Literal, Optional, Any
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, Query, Body
-from pydantic import BaseModel, Field
+import numpy as np
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field, model_validator
 
+from app.routers.dependencies import CachedJSON, internal_error, json_body, json_body_openapi
 from app.services.digital_twin import (
     pybamm_simulator,
     BatteryModelFactory,
@@ -17,11 +23,36 @@ from app.services.digital_twin import (
 )
 from app.services.digital_twin.pybamm_simulator import SimulationConfig, SimulationResult
 from app.services.digital_twin.degradation_predictor import DegradationFactors
+from app.services.digital_twin.state_estimator import telemetry_to_arrays
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _encode_model_library() -> Dict[str, bytes]:
+    """Encode the /models/cells and /models/packs replies from the library."""
+    cells = BatteryModelFactory.list_available_cells()
+    packs = BatteryModelFactory.list_available_packs()
+
+    return {
+        "cells": orjson.dumps({
+            "success": True,
+            "cells": cells,
+            "details": {cell: BatteryModelFactory.get_cell_info(cell) for cell in cells},
+        }, option=orjson.OPT_SERIALIZE_NUMPY),
+        "packs": orjson.dumps({
+            "success": True,
+            "packs": packs,
+            "details": {pack: BatteryModelFactory.get_pack_info(pack) for pack in packs},
+        }, option=orjson.OPT_SERIALIZE_NUMPY),
+    }
+
+
+# The cell/pack library only changes through POST /models/reload, so its
+# replies are encoded once instead of rebuilt on every GET
+_MODEL_LIBRARY_JSON = _encode_model_library()
+
+
 # ============================================
 # Request/Response Models
 # ============================================
@@ -42,6 +73,10 @@ class SimulationRequest(BaseModel):
         description="Custom current profile as [{time: float, current: float}]"
     )
 
+    def to_config(self) -> SimulationConfig:
+        """Simulation config from the request's fields (everything but the profile)"""
+        return SimulationConfig(**self.model_dump(exclude={"current_profile"}))
+
 
 class CyclePredictionRequest(BaseModel):
     """Request model for cycle prediction"""
@@ -69,6 +104,24 @@ class StateUpdateRequest(BaseModel):
     dt: float = Field(default=1.0, description="Time step in seconds")
 
 
+class StateStreamRequest(BaseModel):
+    """Request model for a series of state estimator updates"""
+    voltage: List[float] = Field(..., description="Terminal voltages in V")
+    current: List[float] = Field(..., description="Currents in A (positive = discharge)")
+    dt: Optional[List[float]] = Field(default=None, description="Time step before each sample in seconds (default 1.0)")
+    temperature: Optional[List[Optional[float]]] = Field(default=None, description="Temperatures in Celsius, null where not measured")
+
+    @model_validator(mode="after")
+    def check_lengths(self) -> "StateStreamRequest":
+        """All series must have one entry per sample"""
+        n = len(self.voltage)
+        for name in ("current", "dt", "temperature"):
+            values = getattr(self, name)
+            if values is not None and len(values) != n:
+                raise ValueError(f"{name} has {len(values)} samples, voltage has {n}")
+        return self
+
+
 class TelemetryBatchRequest(BaseModel):
     """Request model for batch telemetry processing"""
     telemetry: List[Dict[str, Any]] = Field(
@@ -90,6 +143,10 @@ class DegradationRequest(BaseModel):
     calendar_days: int = Field(default=0, ge=0)
     cycle_count: float = Field(default=0, ge=0)
 
+    def to_factors(self) -> DegradationFactors:
+        """Degradation factors with the request's already-validated fields"""
+        return DegradationFactors(**vars(self))
+
 
 class BatteryModelRequest(BaseModel):
     """Request model for creating a battery model"""
@@ -103,59 +160,72 @@ class BatteryModelRequest(BaseModel):
 # Simulation Endpoints
 # ============================================
 
-@router.post("/simulate", response_model=Dict[str, Any])
-async def run_simulation(request: SimulationRequest):
+SIMULATION_SERIES = ("time", "voltage", "current", "soc", "temperature", "power", "internal_resistance")
+
+
+def _encode_simulation_npz(result: SimulationResult) -> bytes:
+    """Pack the result series (and metadata as a JSON string) into a compressed .npz."""
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        metadata=np.array(orjson.dumps(result.metadata, option=orjson.OPT_SERIALIZE_NUMPY)),
+        **{name: getattr(result, name) for name in SIMULATION_SERIES},
+    )
+    return buffer.getvalue()
+
+
+@router.post("/simulate", response_class=ORJSONResponse, openapi_extra=json_body_openapi(SimulationRequest))
+async def run_simulation(
+    request: SimulationRequest = Depends(json_body(SimulationRequest)),
+    format: Literal["json", "npz"] = Query("json", description="json, or npz for the raw float64 series"),
+):
     """
     Run a battery simulation
 
     Simulates battery behavior over time using physics-based models.
     Returns time-series data for voltage, current, SOC, temperature, and power.
+    With format=npz the series come back as a compressed NumPy archive
+    (np.load(..., allow_pickle=False)), several times smaller than the JSON
+    and with no float parsing on the client.
     """
+    # The series can run to tens of thousands of points each; returning the
+    # response directly lets orjson encode the arrays natively without
+    # FastAPI first validating and re-serializing every element.
     try:
         if not pybamm_simulator.is_loaded:
             await pybamm_simulator.load_model()
 
-        config = SimulationConfig(
-            nominal_capacity=request.nominal_capacity,
-            nominal_voltage=request.nominal_voltage,
-            cells_in_series=request.cells_in_series,
-            cells_in_parallel=request.cells_in_parallel,
-            initial_soc=request.initial_soc,
-            temperature=request.temperature,
-            c_rate=request.c_rate,
-            simulation_time=request.simulation_time,
-            time_step=request.time_step,
-        )
+        config = request.to_config()
 
         result = await pybamm_simulator.simulate(config, request.current_profile)
 
-        return {
+        if format == "npz":
+            loop = asyncio.get_running_loop()
+            content = await loop.run_in_executor(None, _encode_simulation_npz, result)
+            return Response(
+                content,
+                media_type="application/octet-stream",
+                headers={"Content-Disposition": 'attachment; filename="simulation.npz"'},
+            )
+
+        return ORJSONResponse({
             "success": True,
-            "simulation": {
-                "time": result.time,
-                "voltage": result.voltage,
-                "current": result.current,
-                "soc": result.soc,
-                "temperature": result.temperature,
-                "power": result.power,
-                "internal_resistance": result.internal_resistance,
-            },
+            "simulation": {name: getattr(result, name) for name in SIMULATION_SERIES},
             "metadata": result.metadata,
             "summary": {
-                "duration_hours": result.time[-1] / 3600 if result.time else 0,
-                "final_soc": result.soc[-1] if result.soc else 0,
-                "max_power_kw": max(abs(p) for p in result.power) / 1000 if result.power else 0,
-                "avg_temperature": sum(result.temperature) / len(result.temperature) if result.temperature else 0,
+                "duration_hours": float(result.time[-1]) / 3600 if result.time.size else 0,
+                "final_soc": float(result.soc[-1]) if result.soc.size else 0,
+                "max_power_kw": float(np.abs(result.power).max()) / 1000 if result.power.size else 0,
+                "avg_temperature": float(result.temperature.mean()) if result.temperature.size else 0,
             }
-        }
+        })
 
-    except Exception as e:
-        logger.error(f"Simulation failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Simulation failed")
 
 
-@router.post("/predict-cycles", response_model=Dict[str, Any])
-async def predict_cycles(request: CyclePredictionRequest):
+@router.post("/predict-cycles", response_model=Dict[str, Any], openapi_extra=json_body_openapi(CyclePredictionRequest))
+async def predict_cycles(request: CyclePredictionRequest = Depends(json_body(CyclePredictionRequest))):
     """
     Predict remaining battery cycles
 
@@ -181,13 +251,12 @@ async def predict_cycles(request: CyclePredictionRequest):
             "prediction": result,
         }
 
-    except Exception as e:
-        logger.error(f"Cycle prediction failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Cycle prediction failed")
 
 
-@router.post("/compare", response_model=Dict[str, Any])
-async def compare_simulation_with_real(request: ComparisonRequest):
+@router.post("/compare", response_model=Dict[str, Any], openapi_extra=json_body_openapi(ComparisonRequest))
+async def compare_simulation_with_real(request: ComparisonRequest = Depends(json_body(ComparisonRequest))):
     """
     Compare simulation with real telemetry data
 
@@ -199,17 +268,7 @@ async def compare_simulation_with_real(request: ComparisonRequest):
             await pybamm_simulator.load_model()
 
         # Run simulation
-        config = SimulationConfig(
-            nominal_capacity=request.simulation_config.nominal_capacity,
-            nominal_voltage=request.simulation_config.nominal_voltage,
-            cells_in_series=request.simulation_config.cells_in_series,
-            cells_in_parallel=request.simulation_config.cells_in_parallel,
-            initial_soc=request.simulation_config.initial_soc,
-            temperature=request.simulation_config.temperature,
-            c_rate=request.simulation_config.c_rate,
-            simulation_time=request.simulation_config.simulation_time,
-            time_step=request.simulation_config.time_step,
-        )
+        config = request.simulation_config.to_config()
 
         sim_result = await pybamm_simulator.simulate(config)
 
@@ -226,17 +285,16 @@ async def compare_simulation_with_real(request: ComparisonRequest):
             "model_validated": comparison["model_valid"],
         }
 
-    except Exception as e:
-        logger.error(f"Comparison failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Comparison failed")
 
 
 # ============================================
 # State Estimation Endpoints
 # ============================================
 
-@router.post("/state/update", response_model=Dict[str, Any])
-async def update_state(request: StateUpdateRequest):
+@router.post("/state/update", response_model=Dict[str, Any], openapi_extra=json_body_openapi(StateUpdateRequest))
+async def update_state(request: StateUpdateRequest = Depends(json_body(StateUpdateRequest))):
     """
     Update state estimate with new measurement
 
@@ -247,7 +305,7 @@ async def update_state(request: StateUpdateRequest):
         if not state_estimator.is_loaded:
             await state_estimator.load_model()
 
-        state = await state_estimator.update(
+        state = await state_estimator.submit_update(
             voltage=request.voltage,
             current=request.current,
             temperature=request.temperature,
@@ -259,9 +317,39 @@ async def update_state(request: StateUpdateRequest):
             "state": state_estimator.to_dict(state),
         }
 
-    except Exception as e:
-        logger.error(f"State update failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "State update failed")
+
+
+@router.post("/state/stream", response_model=Dict[str, Any], openapi_extra=json_body_openapi(StateStreamRequest))
+async def stream_state(request: StateStreamRequest = Depends(json_body(StateStreamRequest))):
+    """
+    Apply a series of measurements
+
+    Same as one /state/update per sample, in order, but the whole series
+    goes through the Kalman filter in a single call. For devices that
+    buffer high-rate measurements and upload them in chunks.
+    """
+    try:
+        if not state_estimator.is_loaded:
+            await state_estimator.load_model()
+
+        n = len(request.voltage)
+        states = await state_estimator.update_batch(
+            voltage=np.array(request.voltage, dtype=np.float64),
+            current=np.array(request.current, dtype=np.float64),
+            dt=np.array(request.dt, dtype=np.float64) if request.dt is not None else np.ones(n),
+            temperature=np.array(request.temperature, dtype=np.float64) if request.temperature is not None else None,
+        )
+
+        return {
+            "success": True,
+            "state": state_estimator.to_dict(states[-1]) if states else None,
+            "points_processed": n,
+        }
+
+    except Exception:
+        raise internal_error(logger, "State stream failed")
 
 
 @router.get("/state/current", response_model=Dict[str, Any])
@@ -287,13 +375,12 @@ async def get_current_state():
             "state": state_estimator.to_dict(state),
         }
 
-    except Exception as e:
-        logger.error(f"Get state failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Get state failed")
 
 
-@router.post("/state/batch", response_model=Dict[str, Any])
-async def process_telemetry_batch(request: TelemetryBatchRequest):
+@router.post("/state/batch", response_model=Dict[str, Any], openapi_extra=json_body_openapi(TelemetryBatchRequest))
+async def process_telemetry_batch(request: TelemetryBatchRequest = Depends(json_body(TelemetryBatchRequest))):
     """
     Process batch telemetry data
 
@@ -304,7 +391,9 @@ async def process_telemetry_batch(request: TelemetryBatchRequest):
         if not state_estimator.is_loaded:
             await state_estimator.load_model()
 
-        state = await state_estimator.estimate_from_telemetry(request.telemetry)
+        state = await state_estimator.estimate_from_arrays(
+            telemetry_to_arrays(request.telemetry)
+        )
 
         return {
             "success": True,
@@ -312,9 +401,8 @@ async def process_telemetry_batch(request: TelemetryBatchRequest):
             "points_processed": len(request.telemetry),
         }
 
-    except Exception as e:
-        logger.error(f"Batch processing failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Batch processing failed")
 
 
 @router.post("/state/calibrate", response_model=Dict[str, Any])
@@ -335,17 +423,16 @@ async def calibrate_estimator(
             "message": f"Estimator calibrated with SOC={actual_soc}",
         }
 
-    except Exception as e:
-        logger.error(f"Calibration failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Calibration failed")
 
 
 # ============================================
 # Degradation Prediction Endpoints
 # ============================================
 
-@router.post("/degradation/predict", response_model=Dict[str, Any])
-async def predict_degradation(request: DegradationRequest):
+@router.post("/degradation/predict", response_model=Dict[str, Any], openapi_extra=json_body_openapi(DegradationRequest))
+async def predict_degradation(request: DegradationRequest = Depends(json_body(DegradationRequest))):
     """
     Predict battery degradation
 
@@ -356,18 +443,7 @@ async def predict_degradation(request: DegradationRequest):
         if not degradation_predictor.is_loaded:
             await degradation_predictor.load_model()
 
-        factors = DegradationFactors(
-            avg_dod=request.avg_dod,
-            avg_c_rate_charge=request.avg_c_rate_charge,
-            avg_c_rate_discharge=request.avg_c_rate_discharge,
-            avg_temperature=request.avg_temperature,
-            max_temperature=request.max_temperature,
-            min_temperature=request.min_temperature,
-            time_at_high_soc=request.time_at_high_soc,
-            time_at_low_soc=request.time_at_low_soc,
-            calendar_days=request.calendar_days,
-            cycle_count=request.cycle_count,
-        )
+        factors = request.to_factors()
 
         prediction = await degradation_predictor.predict(factors)
 
@@ -376,14 +452,13 @@ async def predict_degradation(request: DegradationRequest):
             "prediction": degradation_predictor.to_dict(prediction),
         }
 
-    except Exception as e:
-        logger.error(f"Degradation prediction failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Degradation prediction failed")
 
 
-@router.post("/degradation/trajectory", response_model=Dict[str, Any])
+@router.post("/degradation/trajectory", response_model=Dict[str, Any], openapi_extra=json_body_openapi(DegradationRequest))
 async def get_degradation_trajectory(
-    request: DegradationRequest,
+    request: DegradationRequest = Depends(json_body(DegradationRequest)),
     years: int = Query(default=10, ge=1, le=20, description="Years to project"),
 ):
     """
@@ -395,7 +470,7 @@ async def get_degradation_trajectory(
         if not degradation_predictor.is_loaded:
             await degradation_predictor.load_model()
 
-        factors = DegradationFactors(**request.dict())
+        factors = request.to_factors()
 
         trajectory = await degradation_predictor.get_degradation_trajectory(
             factors,
@@ -407,14 +482,13 @@ async def get_degradation_trajectory(
             "trajectory": trajectory,
         }
 
-    except Exception as e:
-        logger.error(f"Trajectory prediction failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Trajectory prediction failed")
 
 
-@router.post("/degradation/record", response_model=Dict[str, Any])
+@router.post("/degradation/record", response_model=Dict[str, Any], openapi_extra=json_body_openapi(DegradationRequest))
 async def record_soh_measurement(
-    request: DegradationRequest,
+    request: DegradationRequest = Depends(json_body(DegradationRequest)),
     measured_soh: float = Query(..., ge=0, le=1, description="Measured SOH"),
 ):
     """
@@ -427,7 +501,7 @@ async def record_soh_measurement(
         if not degradation_predictor.is_loaded:
             await degradation_predictor.load_model()
 
-        factors = DegradationFactors(**request.dict())
+        factors = request.to_factors()
         await degradation_predictor.record_measurement(factors, measured_soh)
 
         return {
@@ -435,9 +509,8 @@ async def record_soh_measurement(
             "message": "Measurement recorded",
         }
 
-    except Exception as e:
-        logger.error(f"Recording failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Recording failed")
 
 
 # ============================================
@@ -447,31 +520,29 @@ async def record_soh_measurement(
 @router.get("/models/cells", response_model=Dict[str, Any])
 async def list_cell_types():
     """List available cell types in the library"""
-    return {
-        "success": True,
-        "cells": BatteryModelFactory.list_available_cells(),
-        "details": {
-            cell: BatteryModelFactory.get_cell_info(cell)
-            for cell in BatteryModelFactory.list_available_cells()
-        }
-    }
+    return Response(_MODEL_LIBRARY_JSON["cells"], media_type="application/json")
 
 
 @router.get("/models/packs", response_model=Dict[str, Any])
 async def list_pack_configurations():
     """List available pack configurations in the library"""
+    return Response(_MODEL_LIBRARY_JSON["packs"], media_type="application/json")
+
+
+@router.post("/models/reload", response_model=Dict[str, Any])
+async def reload_model_library():
+    """Re-encode the cached cell/pack listings after the library is updated"""
+    _MODEL_LIBRARY_JSON.update(_encode_model_library())
+
     return {
         "success": True,
-        "packs": BatteryModelFactory.list_available_packs(),
-        "details": {
-            pack: BatteryModelFactory.get_pack_info(pack)
-            for pack in BatteryModelFactory.list_available_packs()
-        }
+        "cells": len(BatteryModelFactory.CELL_LIBRARY),
+        "packs": len(BatteryModelFactory.PACK_LIBRARY),
     }
 
 
-@router.post("/models/create", response_model=Dict[str, Any])
-async def create_battery_model(request: BatteryModelRequest):
+@router.post("/models/create", response_model=Dict[str, Any], openapi_extra=json_body_openapi(BatteryModelRequest))
+async def create_battery_model(request: BatteryModelRequest = Depends(json_body(BatteryModelRequest))):
     """
     Create a battery model from library components
 
@@ -495,15 +566,29 @@ async def create_battery_model(request: BatteryModelRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 
+def _service_flags() -> tuple:
+    return (
+        pybamm_simulator.is_loaded,
+        state_estimator.is_loaded,
+        degradation_predictor.is_loaded,
+    )
+
+
+# Everything but the timestamp, which is spliced in per request
+_HEALTH = CachedJSON(
+    lambda: {
+        "status": "ok",
+        "services": dict(zip(("simulator", "state_estimator", "degradation_predictor"), _service_flags())),
+    },
+    key=_service_flags,
+)
+
+
 @router.get("/health", response_model=Dict[str, Any])
 async def digital_twin_health():
     """Health check for digital twin services"""
-    return {
-        "status": "ok",
-        "services": {
-            "simulator": pybamm_simulator.is_loaded,
-            "state_estimator": state_estimator.is_loaded,
-            "degradation_predictor": degradation_predictor.is_loaded,
-        },
-        "timestamp": datetime.utcnow().isoformat(),
-    }
+    timestamp = datetime.utcnow().isoformat().encode()
+    return Response(
+        _HEALTH.content()[:-1] + b',"timestamp":"' + timestamp + b'"}',
+        media_type="application/json",
+    )
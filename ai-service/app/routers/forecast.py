@@ -2,14 +2,17 @@
 Forecast Router - Load forecasting and battery optimization endpoints
 """
 
+import logging
 from fastapi import APIRouter, HTTPException, Body, Query
-from fastapi.responses import JSONResponse
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
+from app.routers.dependencies import internal_error
 from app.services.forecast_service import forecast_service
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -64,13 +67,13 @@ async def forecast_load(
             start_time=start_time,
         )
 
-        return JSONResponse(content={
+        return {
             "success": True,
             "data": result,
-        })
+        }
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Load forecast failed")
 
 
 @router.post("/optimize")
@@ -104,13 +107,13 @@ async def optimize_battery(
             max_soc=request.max_soc,
         )
 
-        return JSONResponse(content={
+        return {
             "success": True,
             "data": result,
-        })
+        }
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Battery optimization failed")
 
 
 @router.post("/prospect/analyze")
@@ -140,13 +143,13 @@ async def analyze_prospect_load(
             measurement_days=request.measurement_days,
         )
 
-        return JSONResponse(content={
+        return {
             "success": True,
             "data": result,
-        })
+        }
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Prospect load analysis failed")
 
 
 @router.get("/tariffs")
@@ -3,12 +3,17 @@ NLP Router for BESS Virtual Assistant
 API endpoints for natural language understanding and command execution.
 """
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Annotated
+from dataclasses import dataclass
 from datetime import datetime
+from itertools import islice
 import logging
 
+from .dependencies import StaticJSON, internal_error
 from ..services.nlp import (
     IntentClassifier,
     Intent,
@@ -24,14 +29,25 @@ from ..services.nlp import (
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/nlp", tags=["Virtual Assistant"])
-
-# Global service instances
-_intent_classifier: Optional[IntentClassifier] = None
-_entity_extractor: Optional[EntityExtractor] = None
-_dialog_manager: Optional[DialogManager] = None
-_command_executor: Optional[CommandExecutor] = None
-
+# orjson even when the router is mounted outside app.main
+router = APIRouter(prefix="/nlp", tags=["Virtual Assistant"], default_response_class=ORJSONResponse)
+
+# Enum values for response building; a dict lookup is cheaper than .value
+_INTENT_VALUES = {intent: intent.value for intent in Intent}
+_CATEGORY_VALUES = {category: category.value for category in IntentCategory}
+_ENTITY_TYPE_VALUES = {entity_type: entity_type.value for entity_type in EntityType}
+_STATE_VALUES = {state: state.value for state in DialogState}
+
+# /entities never changes
+_ENTITY_TYPES = StaticJSON({
+    "entity_types": [
+        {
+            "type": e.value,
+            "description": e.name.replace("_", " ").title()
+        }
+        for e in EntityType
+    ]
+})
 
 # Request/Response Models
 
@@ -97,43 +113,52 @@ class SessionInfo(BaseModel):
 
 # Service initialization
 
-async def get_intent_classifier() -> IntentClassifier:
-    """Get or initialize intent classifier"""
-    global _intent_classifier
-    if _intent_classifier is None:
-        _intent_classifier = IntentClassifier()
-        await _intent_classifier.load_model()
-    return _intent_classifier
+@dataclass
+class NLPServices:
+    """NLP pipeline components, built once at startup and shared by all requests"""
+    classifier: IntentClassifier
+    extractor: EntityExtractor
+    dialog_manager: DialogManager
+    executor: CommandExecutor
+    intents: StaticJSON
 
+    async def close(self):
+        """Stop the components' background tasks"""
+        await self.classifier.close()
+        await self.dialog_manager.close()
 
-async def get_entity_extractor() -> EntityExtractor:
-    """Get or initialize entity extractor"""
-    global _entity_extractor
-    if _entity_extractor is None:
-        _entity_extractor = EntityExtractor()
-    return _entity_extractor
 
+async def create_services() -> NLPServices:
+    """
+    Load the intent classifier and construct the rest of the pipeline;
+    expired sessions are swept in the background from here on
+    """
+    classifier = IntentClassifier()
+    await classifier.load_model()
+    dialog_manager = DialogManager()
+    dialog_manager.start_cleanup()
+    return NLPServices(
+        classifier=classifier,
+        extractor=EntityExtractor(),
+        dialog_manager=dialog_manager,
+        executor=CommandExecutor(),
+        # Fixed once the model is loaded
+        intents=StaticJSON({"intents": classifier.get_supported_intents()}),
+    )
 
-def get_dialog_manager() -> DialogManager:
-    """Get or initialize dialog manager"""
-    global _dialog_manager
-    if _dialog_manager is None:
-        _dialog_manager = DialogManager()
-    return _dialog_manager
 
+def get_services(request: Request) -> NLPServices:
+    """Get the NLP services stored on the application state"""
+    return request.app.state.nlp
 
-def get_command_executor() -> CommandExecutor:
-    """Get or initialize command executor"""
-    global _command_executor
-    if _command_executor is None:
-        _command_executor = CommandExecutor()
-    return _command_executor
+
+ServicesDep = Annotated[NLPServices, Depends(get_services)]
 
 
 # Endpoints
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, services: ServicesDep):
     """
     Process a chat message from the user.
 
@@ -146,11 +171,10 @@ async def chat(request: ChatRequest):
     - Response generation
     """
     try:
-        # Get services
-        classifier = await get_intent_classifier()
-        extractor = await get_entity_extractor()
-        dialog_mgr = get_dialog_manager()
-        executor = get_command_executor()
+        classifier = services.classifier
+        extractor = services.extractor
+        dialog_mgr = services.dialog_manager
+        executor = services.executor
 
         # Get or create session
         context = dialog_mgr.get_or_create_session(
@@ -163,11 +187,12 @@ async def chat(request: ChatRequest):
         if request.context:
             context.variables.update(request.context)
 
-        # Classify intent
-        intent_result = classifier.classify(request.message)
-
-        # Extract entities
-        extraction_result = extractor.extract(request.message)
+        # Classify intent (batched with concurrent requests) and extract
+        # entities side by side; extraction is regex work, kept off the loop
+        intent_result, extraction_result = await asyncio.gather(
+            classifier.submit(request.message),
+            asyncio.to_thread(extractor.extract, request.message),
+        )
 
         # Process dialog turn
         turn = dialog_mgr.process_turn(
@@ -177,15 +202,16 @@ async def chat(request: ChatRequest):
             extraction_result=extraction_result
         )
 
-        # Build response
-        response = ChatResponse(
+        # Build response; every field comes from the dialog turn, so skip
+        # validating it here (FastAPI checks it against response_model)
+        response = ChatResponse.model_construct(
             response=turn.response,
             session_id=context.session_id,
-            intent=turn.intent.value if turn.intent else None,
+            intent=_INTENT_VALUES[turn.intent] if turn.intent else None,
             intent_confidence=turn.intent_confidence,
             entities=[
                 {
-                    "type": e.type.value,
+                    "type": _ENTITY_TYPE_VALUES[e.type],
                     "value": e.value,
                     "raw_text": e.raw_text,
                     "unit": e.unit,
@@ -193,7 +219,7 @@ async def chat(request: ChatRequest):
                 }
                 for e in turn.entities
             ],
-            state=turn.state.value
+            state=_STATE_VALUES[turn.state]
         )
 
         # Handle executing state
@@ -226,57 +252,53 @@ async def chat(request: ChatRequest):
         elif turn.state in [DialogState.AWAITING_CONFIRMATION, DialogState.AWAITING_PARAMETER, DialogState.AWAITING_SELECTION]:
             response.requires_input = True
             response.input_prompt = turn.response
-            response.state = turn.state.value
+            response.state = _STATE_VALUES[turn.state]
 
         return response
 
-    except Exception as e:
-        logger.error(f"Chat error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Chat error")
 
 
 @router.post("/classify", response_model=IntentClassifyResponse)
-async def classify_intent(request: IntentClassifyRequest):
+async def classify_intent(request: IntentClassifyRequest, services: ServicesDep):
     """
     Classify the intent of a text.
 
     Useful for debugging or direct intent classification.
     """
     try:
-        classifier = await get_intent_classifier()
-        result = classifier.classify(request.text)
+        result = await services.classifier.submit(request.text)
 
-        return IntentClassifyResponse(
-            intent=result.intent.value,
-            category=result.category.value,
+        return IntentClassifyResponse.model_construct(
+            intent=_INTENT_VALUES[result.intent],
+            category=_CATEGORY_VALUES[result.category],
             confidence=result.confidence,
             alternatives=[
-                {"intent": i.value, "confidence": c}
+                {"intent": _INTENT_VALUES[i], "confidence": c}
                 for i, c in result.alternatives
             ],
             method=result.method
         )
 
-    except Exception as e:
-        logger.error(f"Classification error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Classification error")
 
 
 @router.post("/extract", response_model=EntityExtractResponse)
-async def extract_entities(request: EntityExtractRequest):
+async def extract_entities(request: EntityExtractRequest, services: ServicesDep):
     """
     Extract entities from text.
 
     Useful for debugging or direct entity extraction.
     """
     try:
-        extractor = await get_entity_extractor()
-        result = extractor.extract(request.text)
+        result = services.extractor.extract(request.text)
 
-        return EntityExtractResponse(
+        return EntityExtractResponse.model_construct(
             entities=[
                 {
-                    "type": e.type.value,
+                    "type": _ENTITY_TYPE_VALUES[e.type],
                     "value": e.value,
                     "raw_text": e.raw_text,
                     "start": e.start,
@@ -290,41 +312,38 @@ async def extract_entities(request: EntityExtractRequest):
             has_entities=result.has_entities
         )
 
-    except Exception as e:
-        logger.error(f"Extraction error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Extraction error")
 
 
 @router.get("/session/{session_id}", response_model=SessionInfo)
-async def get_session(session_id: str):
+async def get_session(session_id: str, services: ServicesDep):
     """
     Get information about a chat session.
     """
-    dialog_mgr = get_dialog_manager()
-
-    if session_id not in dialog_mgr.sessions:
+    session = services.dialog_manager.get_session(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    session = dialog_mgr.sessions[session_id]
-
-    return SessionInfo(
-        session_id=session.session_id,
-        user_id=session.user_id,
-        created_at=session.created_at.isoformat(),
-        last_activity=session.last_activity.isoformat(),
-        state=session.current_state.value,
-        history_length=len(session.history),
-        selected_bess=session.selected_bess,
-        language=session.language
-    )
+    # orjson writes the datetimes in isoformat() form itself
+    return ORJSONResponse({
+        "session_id": session.session_id,
+        "user_id": session.user_id,
+        "created_at": session.created_at,
+        "last_activity": session.last_activity,
+        "state": _STATE_VALUES[session.current_state],
+        "history_length": len(session.history),
+        "selected_bess": session.selected_bess,
+        "language": session.language
+    })
 
 
 @router.delete("/session/{session_id}")
-async def delete_session(session_id: str):
+async def delete_session(session_id: str, services: ServicesDep):
     """
     Delete a chat session.
     """
-    dialog_mgr = get_dialog_manager()
+    dialog_mgr = services.dialog_manager
 
     if session_id not in dialog_mgr.sessions:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -335,67 +354,57 @@ async def delete_session(session_id: str):
 
 
 @router.get("/session/{session_id}/history")
-async def get_session_history(session_id: str, limit: int = 10):
+async def get_session_history(session_id: str, services: ServicesDep, limit: int = Query(10, ge=0)):
     """
     Get chat history for a session.
     """
-    dialog_mgr = get_dialog_manager()
-
-    if session_id not in dialog_mgr.sessions:
+    session = services.dialog_manager.get_session(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    session = dialog_mgr.sessions[session_id]
+    # Last `limit` turns, oldest first, without copying the whole deque
+    history = list(islice(reversed(session.history), limit))
+    history.reverse()
 
-    history = list(session.history)[-limit:]
-
-    return {
+    return ORJSONResponse({
         "session_id": session_id,
         "history": [
             {
                 "id": turn.id,
-                "timestamp": turn.timestamp.isoformat(),
+                "timestamp": turn.timestamp,
                 "user_input": turn.user_input,
-                "intent": turn.intent.value if turn.intent else None,
+                "intent": _INTENT_VALUES[turn.intent] if turn.intent else None,
                 "response": turn.response,
-                "state": turn.state.value
+                "state": _STATE_VALUES[turn.state]
             }
             for turn in history
         ],
         "total_turns": len(session.history)
-    }
+    })
 
 
 @router.get("/intents")
-async def list_intents():
+async def list_intents(request: Request, services: ServicesDep):
     """
     List all supported intents.
     """
-    classifier = await get_intent_classifier()
-    return {"intents": classifier.get_supported_intents()}
+    return services.intents.response(request)
 
 
 @router.get("/entities")
-async def list_entity_types():
+async def list_entity_types(request: Request):
     """
     List all supported entity types.
     """
-    return {
-        "entity_types": [
-            {
-                "type": e.value,
-                "description": e.name.replace("_", " ").title()
-            }
-            for e in EntityType
-        ]
-    }
+    return _ENTITY_TYPES.response(request)
 
 
 @router.post("/cleanup")
-async def cleanup_sessions():
+async def cleanup_sessions(services: ServicesDep):
     """
     Clean up expired sessions.
     """
-    dialog_mgr = get_dialog_manager()
+    dialog_mgr = services.dialog_manager
 
     before = len(dialog_mgr.sessions)
     dialog_mgr.cleanup_expired_sessions()
@@ -410,11 +419,11 @@ async def cleanup_sessions():
 
 
 @router.get("/health")
-async def health_check():
+async def health_check(services: ServicesDep):
     """
     Health check for NLP service.
     """
-    classifier = await get_intent_classifier()
+    classifier = services.classifier
 
     return {
         "status": "ok",
@@ -427,7 +436,7 @@ async def health_check():
             "dialog_manager": "ready",
             "command_executor": "ready"
         },
-        "active_sessions": len(get_dialog_manager().sessions)
+        "active_sessions": len(services.dialog_manager.sessions)
     }
 
 
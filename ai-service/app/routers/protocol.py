@@ -3,22 +3,45 @@ Protocol Detection Router
 API endpoints for ML-based protocol detection and register mapping
 """
 
-import base64
 import logging
-from typing import Dict, List, Optional, Any
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-
+import threading
+from binascii import a2b_base64
+from typing import Annotated, Dict, List, Optional, Any
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
+
+from .dependencies import DecodePoolDep, StaticJSON, internal_error, run_in_pool
 from ..services.protocol import (
     protocol_detector,
     pattern_matcher,
     register_mapper,
     training_pipeline
 )
+from ..services.protocol.protocol_detector import (
+    DetectionResult,
+    DeviceIdentification,
+    DeviceType,
+    ProtocolType,
+)
+from ..services.protocol.register_mapper import RegisterSamples
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/protocol", tags=["Protocol Detection"])
+# orjson even when the router is mounted outside app.main
+router = APIRouter(prefix="/protocol", tags=["Protocol Detection"], default_response_class=ORJSONResponse)
+
+# Enum values for response building; a dict lookup is cheaper than .value,
+# and .get() maps a missing device type to None without a branch
+_PROTOCOL_VALUES = {protocol: protocol.value for protocol in ProtocolType}
+_DEVICE_TYPE_VALUES = {device_type: device_type.value for device_type in DeviceType}
+
+# Built-in register maps are fixed at import; encode them once
+_BUILT_IN_MAPS = StaticJSON({"maps": register_mapper.list_built_in_maps()})
+_BUILT_IN_MAP = {
+    device_id: StaticJSON(register_mapper.get_built_in_map(device_id))
+    for device_id in register_mapper.built_in_map_ids
+}
 
 
 # ============================================
@@ -44,8 +67,9 @@ class DetectResponse(BaseModel):
 
 class RegisterSample(BaseModel):
     """Register sample for analysis"""
-    address: int
-    values: List[int]
+    # Register addresses and raw values must be JSON integers, not numeric strings
+    address: Annotated[int, Field(strict=True)]
+    values: List[Annotated[int, Field(strict=True)]]
 
 
 class AnalyzeRegistersRequest(BaseModel):
@@ -111,8 +135,13 @@ class PredictRequest(BaseModel):
 # DETECTION ENDPOINTS
 # ============================================
 
+def _detect_base64(data: str, metadata: Optional[Dict[str, Any]]) -> DetectionResult:
+    """Decode a base64 capture and detect its protocol"""
+    return protocol_detector.detect_payload(a2b_base64(data), metadata)
+
+
 @router.post("/detect", response_model=DetectResponse)
-async def detect_protocol(request: DetectRequest):
+async def detect_protocol(request: DetectRequest, pool: DecodePoolDep):
     """
     Detect protocol type from raw data
 
@@ -122,49 +151,83 @@ async def detect_protocol(request: DetectRequest):
     - Manufacturer and model
     """
     try:
-        data = base64.b64decode(request.data)
-
-        result = protocol_detector.detect(data, request.metadata)
-
-        return DetectResponse(
-            protocol=result.protocol.value,
-            confidence=result.confidence,
-            device_type=result.device_type.value if result.device_type else None,
-            manufacturer=result.manufacturer,
-            model=result.model,
-            firmware_version=result.firmware_version,
-            top_predictions=[
-                {"protocol": p.value, "confidence": c}
-                for p, c in result.top_predictions
-            ] if result.top_predictions else None
-        )
-    except Exception as e:
-        logger.error(f"Protocol detection failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        result = await run_in_pool(pool, _detect_base64, request.data, request.metadata)
+
+        return _detect_response(result)
+    except Exception:
+        raise internal_error(logger, "Protocol detection failed")
+
+
+@router.post(
+    "/detect/raw",
+    response_model=DetectResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}},
+        },
+    },
+)
+async def detect_protocol_raw(request: Request, pool: DecodePoolDep):
+    """
+    Detect protocol type from a raw binary body
+
+    Same as /detect, but the captured bytes are the request body itself
+    (application/octet-stream): no base64 inflation on the wire and no
+    decode pass. Use /detect to pass metadata.
+    """
+    data = await request.body()
+    if not data:
+        raise HTTPException(status_code=400, detail="Empty request body")
+
+    try:
+        result = await run_in_pool(pool, protocol_detector.detect_payload, data)
+
+        return _detect_response(result)
+    except Exception:
+        raise internal_error(logger, "Protocol detection failed")
+
+
+def _detect_response(result: DetectionResult) -> DetectResponse:
+    """Build the /detect reply from a DetectionResult"""
+    return DetectResponse.model_construct(
+        protocol=_PROTOCOL_VALUES[result.protocol],
+        confidence=result.confidence,
+        device_type=_DEVICE_TYPE_VALUES.get(result.device_type),
+        manufacturer=result.manufacturer,
+        model=result.model,
+        firmware_version=result.firmware_version,
+        top_predictions=[
+            {"protocol": _PROTOCOL_VALUES[p], "confidence": c}
+            for p, c in result.top_predictions
+        ] if result.top_predictions else None
+    )
+
+
+def _identify_base64(data: str, metadata: Optional[Dict[str, Any]]) -> DeviceIdentification:
+    """Decode a base64 capture and identify the device behind it"""
+    return protocol_detector.identify_device(a2b_base64(data), metadata)
 
 
 @router.post("/identify-device")
-async def identify_device(request: DetectRequest):
+async def identify_device(request: DetectRequest, pool: DecodePoolDep):
     """
     Identify device from multiple data samples
     """
     try:
-        data = base64.b64decode(request.data)
-
-        result = protocol_detector.identify_device(data, request.metadata)
+        result = await run_in_pool(pool, _identify_base64, request.data, request.metadata)
 
         return {
             "manufacturer": result.manufacturer,
             "model": result.model,
             "firmware_version": result.firmware_version,
-            "device_type": result.device_type.value if result.device_type else None,
-            "protocol": result.protocol.value if result.protocol else None,
+            "device_type": _DEVICE_TYPE_VALUES.get(result.device_type),
+            "protocol": _PROTOCOL_VALUES.get(result.protocol),
             "confidence": result.confidence,
             "signatures_matched": result.signatures_matched
         }
-    except Exception as e:
-        logger.error(f"Device identification failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Device identification failed")
 
 
 # ============================================
@@ -177,7 +240,7 @@ async def match_patterns(request: PatternMatchRequest):
     Find all matching patterns in data
     """
     try:
-        data = base64.b64decode(request.data)
+        data = a2b_base64(request.data)
 
         results = pattern_matcher.match_all(data)
 
@@ -193,9 +256,8 @@ async def match_patterns(request: PatternMatchRequest):
                 for r in results
             ]
         )
-    except Exception as e:
-        logger.error(f"Pattern matching failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Pattern matching failed")
 
 
 @router.post("/parse-modbus")
@@ -204,7 +266,7 @@ async def parse_modbus(request: PatternMatchRequest, is_request: bool = True):
     Parse Modbus request or response
     """
     try:
-        data = base64.b64decode(request.data)
+        data = a2b_base64(request.data)
 
         result = pattern_matcher.match_modbus(data, is_request)
 
@@ -214,33 +276,32 @@ async def parse_modbus(request: PatternMatchRequest, is_request: bool = True):
         return result
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"Modbus parsing failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Modbus parsing failed")
 
 
 # ============================================
 # REGISTER MAPPING ENDPOINTS
 # ============================================
 
+def _register_samples(request: AnalyzeRegistersRequest) -> RegisterSamples:
+    """Request samples as arrays for the register analyzer"""
+    return RegisterSamples.from_pairs((s.address, s.values) for s in request.samples)
+
+
 @router.post("/analyze-registers", response_model=AnalyzeRegistersResponse)
 async def analyze_registers(request: AnalyzeRegistersRequest):
     """
     Analyze registers and detect their types
     """
     try:
-        samples = [
-            (s.address, s.values)
-            for s in request.samples
-        ]
-
-        result = register_mapper.analyze_registers(samples)
+        result = register_mapper.analyze_registers(_register_samples(request))
 
-        return AnalyzeRegistersResponse(
+        return AnalyzeRegistersResponse.model_construct(
             manufacturer=result.get("manufacturer"),
             model=result.get("model"),
             registers=[
-                RegisterInfo(
+                RegisterInfo.model_construct(
                     address=r["address"],
                     name=r["name"],
                     data_type=r.get("data_type", "uint16"),
@@ -253,9 +314,8 @@ async def analyze_registers(request: AnalyzeRegistersRequest):
                 for r in result.get("registers", [])
             ]
         )
-    except Exception as e:
-        logger.error(f"Register analysis failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Register analysis failed")
 
 
 @router.post("/generate-config")
@@ -269,47 +329,41 @@ async def generate_config(
     Formats: json, typescript
     """
     try:
-        samples = [
-            (s.address, s.values)
-            for s in request.samples
-        ]
-
-        config = register_mapper.generate_config(
-            samples,
-            device_id=request.device_id,
-            export_format=format
+        register_map = register_mapper.generate_config(
+            register_mapper.auto_map(_register_samples(request)), {}
         )
+        if request.device_id:
+            register_map.device_id = request.device_id
+
+        config = register_mapper.export_register_map(register_map, format)
 
         return {
             "format": format,
             "config": config
         }
-    except Exception as e:
-        logger.error(f"Config generation failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Config generation failed")
 
 
 @router.get("/built-in-maps")
-async def get_built_in_maps():
+async def get_built_in_maps(request: Request):
     """
     Get list of built-in register maps
     """
-    return {
-        "maps": register_mapper.list_built_in_maps()
-    }
+    return _BUILT_IN_MAPS.response(request)
 
 
 @router.get("/built-in-maps/{map_name}")
-async def get_built_in_map(map_name: str):
+async def get_built_in_map(map_name: str, request: Request):
     """
     Get specific built-in register map
     """
-    register_map = register_mapper.get_built_in_map(map_name)
+    register_map = _BUILT_IN_MAP.get(map_name)
 
     if register_map is None:
         raise HTTPException(status_code=404, detail="Map not found")
 
-    return register_map
+    return register_map.response(request)
 
 
 # ============================================
@@ -339,14 +393,16 @@ async def get_dataset_info(name: str):
     return info
 
 
-@router.post("/training/samples")
-async def add_training_sample(request: TrainingSampleRequest):
-    """
-    Add a training sample to a dataset
-    """
-    try:
-        data = base64.b64decode(request.data)
+# Appending to a dataset and pickling it to disk must not interleave
+# between requests
+_training_data_lock = threading.Lock()
+
+
+def _store_training_sample(request: TrainingSampleRequest):
+    """Decode a sample, add it to its dataset and save the dataset"""
+    data = a2b_base64(request.data)
 
+    with _training_data_lock:
         training_pipeline.add_sample(
             dataset_name=request.dataset_name,
             data=data,
@@ -359,10 +415,19 @@ async def add_training_sample(request: TrainingSampleRequest):
 
         training_pipeline.save_dataset(request.dataset_name)
 
+
+@router.post("/training/samples")
+async def add_training_sample(request: TrainingSampleRequest, pool: DecodePoolDep):
+    """
+    Add a training sample to a dataset
+    """
+    try:
+        # Captures can be several MB; decode and write them off the loop
+        await run_in_pool(pool, _store_training_sample, request)
+
         return {"success": True, "dataset": request.dataset_name}
-    except Exception as e:
-        logger.error(f"Failed to add training sample: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Failed to add training sample")
 
 
 @router.post("/training/start")
@@ -381,9 +446,8 @@ async def start_training(request: StartTrainingRequest):
             "status": job.status.value,
             "dataset": job.dataset_name
         }
-    except Exception as e:
-        logger.error(f"Failed to start training: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Failed to start training")
 
 
 @router.get("/training/jobs/{job_id}")
@@ -424,7 +488,7 @@ async def predict_with_model(request: PredictRequest):
     Make prediction using trained model
     """
     try:
-        data = base64.b64decode(request.data)
+        data = a2b_base64(request.data)
 
         result = training_pipeline.predict(
             data=data,
@@ -433,9 +497,8 @@ async def predict_with_model(request: PredictRequest):
         )
 
         return result
-    except Exception as e:
-        logger.error(f"Prediction failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Prediction failed")
 
 
 @router.get("/training/models/{model_name}/export")
@@ -453,6 +516,5 @@ async def export_model(model_name: str, format: str = "json"):
         }
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        logger.error(f"Model export failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Model export failed")
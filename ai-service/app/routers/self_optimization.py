@@ -3,30 +3,34 @@ Self-Optimization API Router
 Endpoints for genetic optimization and RL-based BESS control.
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field, field_validator
+from typing import Annotated, List, Dict, Any, Optional, Tuple
+from concurrent.futures import Executor
 from datetime import datetime
+from functools import partial
 import logging
 import asyncio
 
+import numpy as np
+
+from app.routers.dependencies import internal_error, run_in_pool
 from app.services.self_optimization import (
-    GeneticOptimizer,
-    OptimizationConfig,
     RLAgent,
     RLConfig,
     BESSEnvironment,
     RewardCalculator,
     RewardWeights,
-    ExperienceBuffer,
-    Experience
+    ExperienceBuffer
 )
+from app.services.self_optimization.genetic_optimizer import run_schedule_optimization
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/self-optimization", tags=["Self-Optimization"])
+# orjson even when the router is mounted outside app.main
+router = APIRouter(prefix="/self-optimization", tags=["Self-Optimization"], default_response_class=ORJSONResponse)
 
 # Global instances
-_optimizer: Optional[GeneticOptimizer] = None
 _rl_agent: Optional[RLAgent] = None
 _reward_calculator: Optional[RewardCalculator] = None
 _experience_buffer: Optional[ExperienceBuffer] = None
@@ -34,16 +38,27 @@ _experience_buffer: Optional[ExperienceBuffer] = None
 # Active jobs
 _active_jobs: Dict[str, Dict[str, Any]] = {}
 
+# /rl/predict calls queued while a forward pass runs (plus any arriving
+# within PREDICT_BATCH_WAIT_MS) share the next one
+PREDICT_MAX_BATCH = 64
+PREDICT_BATCH_WAIT_MS = 5.0
+_predict_queue: Optional[asyncio.Queue] = None
+_predict_task: Optional[asyncio.Task] = None
+
 
 # ============================================
 # SCHEMAS
 # ============================================
 
+# Length checks run in pydantic-core along with the float parsing
+HourlyForecast = Annotated[List[float], Field(min_length=24, max_length=24)]
+Observation = Annotated[List[float], Field(min_length=10, max_length=10)]
+
 class GeneticOptimizationRequest(BaseModel):
     """Request for genetic optimization"""
-    price_forecast: List[float] = Field(..., min_items=24, max_items=24)
-    load_forecast: List[float] = Field(..., min_items=24, max_items=24)
-    solar_forecast: Optional[List[float]] = None
+    price_forecast: HourlyForecast
+    load_forecast: HourlyForecast
+    solar_forecast: Optional[HourlyForecast] = None
     battery_capacity_kwh: float = Field(default=100.0, ge=1)
     max_power_kw: float = Field(default=50.0, ge=1)
     population_size: int = Field(default=100, ge=10, le=500)
@@ -87,42 +102,48 @@ class RewardWeightsRequest(BaseModel):
 
 class ExperienceRequest(BaseModel):
     """Request to add experience"""
-    state: List[float] = Field(..., min_items=10, max_items=10)
-    action: List[float] = Field(..., min_items=1, max_items=1)
+    state: Observation
+    action: Annotated[List[float], Field(min_length=1, max_length=1)]
     reward: float
-    next_state: List[float] = Field(..., min_items=10, max_items=10)
+    next_state: Observation
     done: bool
 
+    @field_validator("state", "action", "next_state")
+    @classmethod
+    def to_array(cls, v: List[float]) -> np.ndarray:
+        """Hand the buffer one float64 array per field"""
+        return np.asarray(v, dtype=np.float64)
+
 
 # ============================================
 # GENETIC OPTIMIZATION ENDPOINTS
 # ============================================
 
+def get_ga_pool(request: Request) -> Executor:
+    """Worker processes for genetic optimizations, created in app.main"""
+    return request.app.state.ga_pool
+
+
+GAPoolDep = Annotated[Executor, Depends(get_ga_pool)]
+
+
+def _schedule_job(request: GeneticOptimizationRequest) -> partial:
+    """Picklable run_schedule_optimization() call for the request"""
+    return partial(run_schedule_optimization, **request.model_dump())
+
+
 @router.post("/genetic/optimize")
 async def run_genetic_optimization(
     request: GeneticOptimizationRequest,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    pool: GAPoolDep
 ) -> Dict[str, Any]:
     """
     Run genetic optimization for BESS parameters.
     Returns optimized parameters for charge/discharge strategy.
     """
-    global _optimizer
-
     try:
-        config = OptimizationConfig(
-            population_size=request.population_size,
-            generations=request.generations
-        )
-        _optimizer = GeneticOptimizer(config)
-
-        result = _optimizer.optimize_schedule(
-            price_forecast=request.price_forecast,
-            load_forecast=request.load_forecast,
-            solar_forecast=request.solar_forecast,
-            battery_capacity_kwh=request.battery_capacity_kwh,
-            max_power_kw=request.max_power_kw
-        )
+        result = await run_in_pool(pool, _schedule_job(request))
 
         return {
             "success": True,
@@ -131,19 +152,21 @@ async def run_genetic_optimization(
                 "pareto_front_size": len(result.pareto_front),
                 "generations": result.total_generations,
                 "convergence_generation": result.convergence_generation,
-                "execution_time_seconds": result.execution_time_seconds
+                "execution_time_seconds": result.execution_time_seconds,
+                "fitness_evaluations": result.fitness_evaluations,
+                "fitness_cache_hit_rate": result.fitness_cache_hit_rate
             }
         }
 
-    except Exception as e:
-        logger.error(f"Genetic optimization failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "Genetic optimization failed")
 
 
 @router.post("/genetic/optimize/async")
 async def start_genetic_optimization_async(
     request: GeneticOptimizationRequest,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    pool: GAPoolDep
 ) -> Dict[str, Any]:
     """
     Start genetic optimization in background.
@@ -161,24 +184,10 @@ async def start_genetic_optimization_async(
 
     async def run_optimization():
         try:
-            config = OptimizationConfig(
-                population_size=request.population_size,
-                generations=request.generations
-            )
-            optimizer = GeneticOptimizer(config)
-
-            def progress_callback(gen, pop):
-                _active_jobs[job_id]["progress"] = (gen + 1) / request.generations * 100
-
-            result = optimizer.optimize_schedule(
-                price_forecast=request.price_forecast,
-                load_forecast=request.load_forecast,
-                solar_forecast=request.solar_forecast,
-                battery_capacity_kwh=request.battery_capacity_kwh,
-                max_power_kw=request.max_power_kw
-            )
+            result = await run_in_pool(pool, _schedule_job(request))
 
             _active_jobs[job_id]["status"] = "completed"
+            _active_jobs[job_id]["progress"] = 100
             _active_jobs[job_id]["result"] = result.to_dict()
             _active_jobs[job_id]["completed_at"] = datetime.now().isoformat()
 
@@ -213,6 +222,82 @@ async def get_optimization_job_status(job_id: str) -> Dict[str, Any]:
 # REINFORCEMENT LEARNING ENDPOINTS
 # ============================================
 
+async def _predict(observation: np.ndarray) -> Tuple[float, Dict]:
+    """_rl_agent.predict(), batched with concurrent /rl/predict calls"""
+    global _predict_queue, _predict_task
+
+    if _predict_task is None or _predict_task.done():
+        _predict_queue = asyncio.Queue()
+        _predict_task = asyncio.create_task(_run_predict_batches())
+
+    future = asyncio.get_running_loop().create_future()
+    await _predict_queue.put((observation, future))
+    return await future
+
+
+async def _run_predict_batches():
+    """Drain queued observations into batched forward passes until cancelled"""
+    loop = asyncio.get_running_loop()
+    max_wait = PREDICT_BATCH_WAIT_MS / 1000
+
+    while True:
+        batch = [await _predict_queue.get()]
+        deadline = loop.time() + max_wait
+
+        while len(batch) < PREDICT_MAX_BATCH:
+            if not _predict_queue.empty():
+                batch.append(_predict_queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_predict_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        observations, futures = zip(*batch)
+        try:
+            # The agent can be replaced by a training job; use the one
+            # current when the batch runs
+            actions, info = await loop.run_in_executor(
+                None, _rl_agent.predict_batch, np.stack(observations)
+            )
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+
+        for future, action in zip(futures, actions.tolist()):
+            if not future.done():
+                future.set_result((action, info))
+
+
+async def close():
+    """Stop batching /rl/predict calls, failing any still queued"""
+    global _predict_task
+
+    if _predict_task is None:
+        return
+
+    _predict_task.cancel()
+    try:
+        await _predict_task
+    except asyncio.CancelledError:
+        pass
+    _predict_task = None
+
+    while not _predict_queue.empty():
+        _, future = _predict_queue.get_nowait()
+        if not future.done():
+            future.set_exception(RuntimeError("RL prediction stopped"))
+
+
 @router.post("/rl/train")
 async def train_rl_agent(
     request: RLTrainingRequest,
@@ -259,7 +344,7 @@ async def train_rl_agent(
         except Exception as e:
             _active_jobs[job_id]["status"] = "failed"
             _active_jobs[job_id]["error"] = str(e)
-            logger.error(f"RL training failed: {e}")
+            logger.error("RL training failed", exc_info=True)
 
     background_tasks.add_task(run_training)
 
@@ -293,7 +378,6 @@ async def predict_action(request: RLPredictionRequest) -> Dict[str, Any]:
         }
 
     try:
-        import numpy as np
         observation = np.array([
             request.soc,
             request.soh,
@@ -307,7 +391,11 @@ async def predict_action(request: RLPredictionRequest) -> Dict[str, Any]:
             0.0    # peak_demand
         ], dtype=np.float32)
 
-        action, info = _rl_agent.predict(observation)
+        if _rl_agent.model is None:
+            # Random action; there is no forward pass to share
+            action, info = _rl_agent.predict(observation)
+        else:
+            action, info = await _predict(observation)
 
         # Convert action to power recommendation
         max_power = 50.0  # Default
@@ -323,9 +411,8 @@ async def predict_action(request: RLPredictionRequest) -> Dict[str, Any]:
             }
         }
 
-    except Exception as e:
-        logger.error(f"RL prediction failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "RL prediction failed")
 
 
 @router.post("/rl/evaluate")
@@ -342,9 +429,8 @@ async def evaluate_agent() -> Dict[str, Any]:
             "success": True,
             "data": metrics
         }
-    except Exception as e:
-        logger.error(f"RL evaluation failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise internal_error(logger, "RL evaluation failed")
 
 
 @router.get("/rl/status")
@@ -468,17 +554,14 @@ async def add_experience(request: ExperienceRequest) -> Dict[str, Any]:
     if _experience_buffer is None:
         _experience_buffer = ExperienceBuffer(capacity=100000)
 
-    import numpy as np
-    experience = Experience(
-        state=np.array(request.state),
-        action=np.array(request.action),
-        reward=request.reward,
-        next_state=np.array(request.next_state),
-        done=request.done
+    _experience_buffer.add_transition(
+        request.state,
+        request.action,
+        request.reward,
+        request.next_state,
+        request.done
     )
 
-    _experience_buffer.add(experience)
-
     return {
         "success": True,
         "data": {
@@ -4,6 +4,7 @@ Foundation for all BESS management agents with common functionality.
 """
 
 import asyncio
+import time
 import uuid
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional, List, Callable, Set
@@ -12,9 +13,14 @@ from datetime import datetime
 from enum import Enum
 import logging
 from collections import deque
+from itertools import count
 
 logger = logging.getLogger(__name__)
 
+# Weight of the newest sample in the average response time (an EWMA, so
+# the metric follows recent load rather than the whole uptime)
+RESPONSE_TIME_ALPHA = 0.05
+
 
 class AgentState(Enum):
     """Agent lifecycle states"""
@@ -63,11 +69,16 @@ class AgentMessage:
     correlation_id: Optional[str] = None  # For request-response
     ttl_seconds: int = 60  # Time to live
     requires_ack: bool = False
+    # time.monotonic() after which the message is expired, counted from
+    # construction; timestamp is for display and serialization only
+    _deadline: float = field(init=False, repr=False, compare=False, default=0.0)
+
+    def __post_init__(self):
+        self._deadline = time.monotonic() + self.ttl_seconds
 
     def is_expired(self) -> bool:
         """Check if message has expired"""
-        age = (datetime.now() - self.timestamp).total_seconds()
-        return age > self.ttl_seconds
+        return time.monotonic() > self._deadline
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -149,8 +160,10 @@ class BaseAgent(ABC):
         # Goals
         self.goals: List[Dict[str, Any]] = []
 
-        # Task queue
+        # Task queue, FIFO within a priority (the sequence number keeps the
+        # task dicts themselves from ever being compared)
         self._task_queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._task_seq = count()
         self._running = False
         self._main_task: Optional[asyncio.Task] = None
 
@@ -218,47 +231,73 @@ class BaseAgent(ABC):
         logger.info(f"Agent {self.name} ({self.agent_id}) stopped")
 
     async def _run(self):
-        """Main agent loop"""
-        while self._running:
-            try:
-                # Process incoming messages
-                await self._process_messages()
-
-                # Process tasks
-                await self._process_tasks()
+        """Main agent loop, woken only when a message or task arrives"""
+        next_message = asyncio.create_task(self.inbox.get())
+        next_task = asyncio.create_task(self._task_queue.get())
 
-                # Update metrics
-                self._update_metrics()
+        try:
+            while self._running:
+                try:
+                    done, _ = await asyncio.wait(
+                        {next_message, next_task},
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
 
-                # Small delay to prevent busy loop
-                await asyncio.sleep(0.01)
+                    # Process incoming messages. The next get() is only
+                    # issued once the queue is drained, so it can't take an
+                    # item ahead of the drain
+                    if next_message in done:
+                        try:
+                            await self._receive_message(next_message.result())
+                            await self._process_messages()
+                        finally:
+                            next_message = asyncio.create_task(self.inbox.get())
+
+                    # Process tasks
+                    if next_task in done:
+                        try:
+                            priority, _, task = next_task.result()
+                            await self._execute_task(task)
+                            await self._process_tasks()
+                        finally:
+                            next_task = asyncio.create_task(self._task_queue.get())
+
+                    # Update metrics
+                    self._update_metrics()
+
+                except asyncio.CancelledError:
+                    break
+                except Exception as e:
+                    logger.error(f"Agent {self.agent_id} error: {e}")
+                    self.metrics.error_count += 1
+                    self.state = AgentState.ERROR
+                    await asyncio.sleep(1)  # Back off on error
 
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Agent {self.agent_id} error: {e}")
-                self.metrics.error_count += 1
-                self.state = AgentState.ERROR
-                await asyncio.sleep(1)  # Back off on error
+        finally:
+            # Hand back anything already taken off a queue but not processed
+            for getter, queue in ((next_message, self.inbox), (next_task, self._task_queue)):
+                if getter.done() and not getter.cancelled():
+                    queue.put_nowait(getter.result())
+                else:
+                    getter.cancel()
 
     async def _process_messages(self):
         """Process incoming messages"""
-        try:
-            while not self.inbox.empty():
-                message = await asyncio.wait_for(
-                    self.inbox.get(),
-                    timeout=0.1
-                )
-
-                if message.is_expired():
-                    logger.debug(f"Dropping expired message: {message.id}")
-                    continue
+        while True:
+            try:
+                message = self.inbox.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            await self._receive_message(message)
 
-                self.metrics.messages_received += 1
-                await self._handle_message(message)
+    async def _receive_message(self, message: AgentMessage):
+        """Drop an expired message, otherwise handle it"""
+        if message.is_expired():
+            logger.debug(f"Dropping expired message: {message.id}")
+            return
 
-        except asyncio.TimeoutError:
-            pass
+        self.metrics.messages_received += 1
+        await self._handle_message(message)
 
     async def _handle_message(self, message: AgentMessage):
         """Handle an incoming message"""
@@ -310,34 +349,36 @@ class BaseAgent(ABC):
     async def _process_tasks(self):
         """Process queued tasks"""
         try:
-            while not self._task_queue.empty():
-                priority, task = await asyncio.wait_for(
-                    self._task_queue.get(),
-                    timeout=0.1
-                )
+            while True:
+                try:
+                    priority, _, task = self._task_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                await self._execute_task(task)
 
-                self.state = AgentState.BUSY
-                start_time = datetime.now()
+        finally:
+            self.state = AgentState.IDLE
 
-                try:
-                    result = await self._process_task(task)
-                    self.metrics.tasks_completed += 1
+    async def _execute_task(self, task: Dict[str, Any]):
+        """Run one task and record the outcome"""
+        self.state = AgentState.BUSY
+        start_time = datetime.now()
 
-                    # Notify task completion if needed
-                    if 'callback' in task:
-                        await task['callback'](result)
+        try:
+            result = await self._process_task(task)
+            self.metrics.tasks_completed += 1
 
-                except Exception as e:
-                    logger.error(f"Task processing error: {e}")
-                    self.metrics.tasks_failed += 1
+            # Notify task completion if needed
+            if 'callback' in task:
+                await task['callback'](result)
 
-                finally:
-                    elapsed = (datetime.now() - start_time).total_seconds() * 1000
-                    self._update_response_time(elapsed)
+        except Exception as e:
+            logger.error(f"Task processing error: {e}")
+            self.metrics.tasks_failed += 1
 
-        except asyncio.TimeoutError:
-            pass
         finally:
+            elapsed = (datetime.now() - start_time).total_seconds() * 1000
+            self._update_response_time(elapsed)
             self.state = AgentState.IDLE
 
     async def send_message(self, message: AgentMessage):
@@ -382,7 +423,7 @@ class BaseAgent(ABC):
 
     def add_task(self, task: Dict[str, Any], priority: AgentPriority = AgentPriority.NORMAL):
         """Add a task to the queue"""
-        self._task_queue.put_nowait((priority.value, task))
+        self._task_queue.put_nowait((priority.value, next(self._task_seq), task))
 
     def update_belief(self, key: str, value: Any):
         """Update agent's belief"""
@@ -402,10 +443,13 @@ class BaseAgent(ABC):
 
     def _update_response_time(self, elapsed_ms: float):
         """Update average response time"""
-        total = self.metrics.tasks_completed + self.metrics.messages_received
-        if total > 0:
+        if self.metrics.average_response_time_ms == 0.0:
+            # Seed with the first sample instead of decaying up from zero
+            self.metrics.average_response_time_ms = elapsed_ms
+        else:
             self.metrics.average_response_time_ms = (
-                (self.metrics.average_response_time_ms * (total - 1) + elapsed_ms) / total
+                RESPONSE_TIME_ALPHA * elapsed_ms
+                + (1 - RESPONSE_TIME_ALPHA) * self.metrics.average_response_time_ms
             )
 
     def _update_metrics(self):
@@ -416,6 +460,11 @@ class BaseAgent(ABC):
 
     def get_status(self) -> Dict[str, Any]:
         """Get agent status"""
+        # The loop only ticks when there is work, so an idle agent's uptime
+        # is refreshed here
+        if self.start_time:
+            self.metrics.uptime_seconds = (datetime.now() - self.start_time).total_seconds()
+
         return {
             'agent_id': self.agent_id,
             'name': self.name,
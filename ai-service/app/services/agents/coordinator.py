@@ -4,12 +4,13 @@ Central orchestration system for multi-agent BESS management.
 """
 
 import asyncio
-from typing import Dict, Any, Optional, List, Set, Type
+import json
+from typing import Dict, Any, Optional, List, Set, Type, Deque
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from enum import Enum
 import logging
-from collections import defaultdict
+from collections import defaultdict, deque
 
 from .base_agent import (
     BaseAgent,
@@ -61,7 +62,7 @@ class Task:
     required_capabilities: List[str]
     payload: Dict[str, Any]
     priority: AgentPriority
-    deadline: Optional[datetime] = None
+    deadline: Optional[float] = None  # time.monotonic() seconds
     assigned_agent: Optional[str] = None
     status: str = "pending"
     result: Optional[Dict[str, Any]] = None
@@ -125,21 +126,42 @@ class MessageRouter:
 
         # Deliver to recipients
         for recipient in recipients:
-            if recipient in self.agent_queues and recipient != message.sender_id:
-                try:
-                    await self.agent_queues[recipient].put(message)
-                except Exception as e:
-                    logger.error(f"Failed to deliver message to {recipient}: {e}")
+            if recipient != message.sender_id:
+                await self._deliver(recipient, message)
+
+    async def broadcast(self, messages: List[AgentMessage]):
+        """Route a batch of messages concurrently"""
+        async with asyncio.TaskGroup() as tg:
+            for message in messages:
+                tg.create_task(self.route_message(message))
+
+    async def _deliver(self, recipient: str, message: AgentMessage):
+        """Put a message on a recipient's inbox"""
+        queue = self.agent_queues.get(recipient)
+        if queue is None:
+            return
+        try:
+            await queue.put(message)
+        except Exception as e:
+            logger.error(f"Failed to deliver message to {recipient}: {e}")
 
 
 class Blackboard:
-    """Shared workspace for blackboard coordination"""
+    """
+    Shared workspace for blackboard coordination.
 
-    def __init__(self):
+    Entries live in-process by default. When a ``redis.asyncio`` client is
+    supplied they are also stored in a Redis hash, so every service worker
+    reads and writes the same workspace.
+    """
+
+    def __init__(self, redis_client: Optional[Any] = None, redis_key: str = "coordinator:blackboard"):
         self.data: Dict[str, Any] = {}
         self.history: List[Dict[str, Any]] = []
         self.watchers: Dict[str, List[str]] = defaultdict(list)  # key -> agent_ids
         self._lock = asyncio.Lock()
+        self._redis = redis_client
+        self._redis_key = redis_key
 
     async def write(self, key: str, value: Any, writer: str):
         """Write data to blackboard"""
@@ -147,6 +169,9 @@ class Blackboard:
             old_value = self.data.get(key)
             self.data[key] = value
 
+            if self._redis is not None:
+                await self._redis.hset(self._redis_key, key, json.dumps(value, default=str))
+
             # Record history
             self.history.append({
                 'timestamp': datetime.now().isoformat(),
@@ -165,6 +190,9 @@ class Blackboard:
 
     async def read(self, key: str, default: Any = None) -> Any:
         """Read data from blackboard"""
+        if self._redis is not None:
+            raw = await self._redis.hget(self._redis_key, key)
+            return json.loads(raw) if raw is not None else default
         return self.data.get(key, default)
 
     async def watch(self, key: str, agent_id: str):
@@ -180,6 +208,16 @@ class Blackboard:
         """Get current state snapshot"""
         return self.data.copy()
 
+    async def snapshot(self) -> Dict[str, Any]:
+        """Get current state snapshot, including entries written by other workers"""
+        if self._redis is not None:
+            raw = await self._redis.hgetall(self._redis_key)
+            return {
+                (k.decode() if isinstance(k, bytes) else k): json.loads(v)
+                for k, v in raw.items()
+            }
+        return self.get_snapshot()
+
 
 class AgentCoordinator(BaseAgent):
     """
@@ -197,7 +235,8 @@ class AgentCoordinator(BaseAgent):
         self,
         agent_id: str = "coordinator",
         name: str = "Agent Coordinator",
-        strategy: CoordinationStrategy = CoordinationStrategy.HIERARCHICAL
+        strategy: CoordinationStrategy = CoordinationStrategy.HIERARCHICAL,
+        redis_client: Optional[Any] = None
     ):
         super().__init__(
             agent_id=agent_id,
@@ -207,19 +246,20 @@ class AgentCoordinator(BaseAgent):
 
         self.strategy = strategy
 
-        # Agent registry
+        # Agent registry; version is bumped on every register/unregister
         self.agents: Dict[str, AgentRegistration] = {}
+        self.registry_version = 0
 
         # Message router
         self.router = MessageRouter()
 
-        # Blackboard (for BLACKBOARD strategy)
-        self.blackboard = Blackboard()
+        # Blackboard (for BLACKBOARD strategy); shared via Redis when a client is given
+        self.blackboard = Blackboard(redis_client=redis_client)
 
         # Task management
         self.pending_tasks: Dict[str, Task] = {}
         self.active_tasks: Dict[str, Task] = {}
-        self.completed_tasks: List[Task] = []
+        self.completed_tasks: Deque[Task] = deque(maxlen=1000)  # bounded history
 
         # Contract management (for CONTRACT_NET strategy)
         self.active_contracts: Dict[str, Contract] = {}
@@ -313,16 +353,17 @@ class AgentCoordinator(BaseAgent):
         while self._running:
             try:
                 # Send heartbeat to all agents
-                heartbeat = AgentMessage(
-                    sender_id=self.agent_id,
-                    message_type=MessageType.HEARTBEAT,
-                    topic="system/heartbeat",
-                    payload={'timestamp': datetime.now().isoformat()}
-                )
-
-                for agent_id in list(self.agents.keys()):
-                    heartbeat.receiver_id = agent_id
-                    await self.router.route_message(heartbeat)
+                payload = {'timestamp': datetime.now().isoformat()}
+                await self.router.broadcast([
+                    AgentMessage(
+                        sender_id=self.agent_id,
+                        receiver_id=agent_id,
+                        message_type=MessageType.HEARTBEAT,
+                        topic="system/heartbeat",
+                        payload=payload
+                    )
+                    for agent_id in list(self.agents.keys())
+                ])
 
                 await asyncio.sleep(self.heartbeat_interval_seconds)
 
@@ -401,6 +442,7 @@ class AgentCoordinator(BaseAgent):
 
             # Add to registry
             self.agents[agent.agent_id] = registration
+            self.registry_version += 1
 
             # Register with router
             self.router.register_agent(agent.agent_id, agent.inbox)
@@ -446,6 +488,7 @@ class AgentCoordinator(BaseAgent):
 
         # Remove from registry
         del self.agents[agent_id]
+        self.registry_version += 1
 
         logger.info(f"Unregistered agent: {agent_id}")
 
@@ -467,7 +510,7 @@ class AgentCoordinator(BaseAgent):
         required_capabilities: List[str],
         payload: Dict[str, Any],
         priority: AgentPriority = AgentPriority.NORMAL,
-        deadline: Optional[datetime] = None
+        deadline: Optional[float] = None
     ) -> Task:
         """Create and allocate a new task"""
         import uuid
@@ -550,7 +593,7 @@ class AgentCoordinator(BaseAgent):
                 'task_id': task.id,
                 'description': task.description,
                 'payload': task.payload,
-                'deadline': task.deadline.isoformat() if task.deadline else None
+                'deadline': task.deadline
             }
         )
 
@@ -647,22 +690,23 @@ class AgentCoordinator(BaseAgent):
         self.active_contracts[task.id] = contract
 
         # Announce task to candidates
-        announcement = AgentMessage(
-            sender_id=self.agent_id,
-            message_type=MessageType.REQUEST,
-            topic="task_announcement",
-            priority=task.priority,
-            payload={
-                'task_id': task.id,
-                'description': task.description,
-                'required_capabilities': task.required_capabilities,
-                'deadline': contract.deadline.isoformat()
-            }
-        )
-
-        for candidate in candidates:
-            announcement.receiver_id = candidate
-            await self.router.route_message(announcement)
+        payload = {
+            'task_id': task.id,
+            'description': task.description,
+            'required_capabilities': task.required_capabilities,
+            'deadline': contract.deadline.isoformat()
+        }
+        await self.router.broadcast([
+            AgentMessage(
+                sender_id=self.agent_id,
+                receiver_id=candidate,
+                message_type=MessageType.REQUEST,
+                topic="task_announcement",
+                priority=task.priority,
+                payload=payload
+            )
+            for candidate in candidates
+        ])
 
         # Wait for bids
         await asyncio.sleep(5)  # Wait for bidding deadline
@@ -841,7 +885,7 @@ class AgentCoordinator(BaseAgent):
                 'task_id': task.id,
                 'description': task.description,
                 'payload': task.payload,
-                'deadline': task.deadline.isoformat() if task.deadline else None
+                'deadline': task.deadline
             }
         )
 
@@ -864,17 +908,19 @@ class AgentCoordinator(BaseAgent):
         payload = params.get('payload', {})
         priority = AgentPriority(params.get('priority', AgentPriority.NORMAL.value))
 
-        message = AgentMessage(
-            sender_id=self.agent_id,
-            message_type=MessageType.NOTIFICATION,
-            topic=topic,
-            payload=payload,
-            priority=priority
-        )
+        messages = [
+            AgentMessage(
+                sender_id=self.agent_id,
+                receiver_id=agent_id,
+                message_type=MessageType.NOTIFICATION,
+                topic=topic,
+                payload=payload,
+                priority=priority
+            )
+            for agent_id in self.agents
+        ]
 
-        for agent_id in self.agents:
-            message.receiver_id = agent_id
-            await self.router.route_message(message)
+        await self.router.broadcast(messages)
 
         return {'success': True, 'recipients': len(self.agents)}
 
@@ -886,16 +932,16 @@ class AgentCoordinator(BaseAgent):
         await self.blackboard.write('system_state', state, self.agent_id)
 
         # Broadcast sync message
-        sync_message = AgentMessage(
-            sender_id=self.agent_id,
-            message_type=MessageType.SYNC,
-            topic="system/sync",
-            payload=state
-        )
-
-        for agent_id in self.agents:
-            sync_message.receiver_id = agent_id
-            await self.router.route_message(sync_message)
+        await self.router.broadcast([
+            AgentMessage(
+                sender_id=self.agent_id,
+                receiver_id=agent_id,
+                message_type=MessageType.SYNC,
+                topic="system/sync",
+                payload=state
+            )
+            for agent_id in self.agents
+        ])
 
         return {'success': True, 'state': state}
 
@@ -941,10 +987,6 @@ class AgentCoordinator(BaseAgent):
                     (current_avg * (total - 1) + completion_time) / total
                 )
 
-            # Limit completed tasks history
-            if len(self.completed_tasks) > 1000:
-                self.completed_tasks = self.completed_tasks[-1000:]
-
             logger.info(f"Task {task_id} completed by {task.assigned_agent}")
 
     async def handle_task_failure(self, task_id: str, error: str):
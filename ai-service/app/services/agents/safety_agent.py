@@ -892,16 +892,12 @@ class SafetyAgent(BaseAgent):
         limit: int = 100
     ) -> List[Dict[str, Any]]:
         """Get filtered event history"""
-        events = self.event_history
-
-        if level:
-            events = [e for e in events if e.level.value >= level.value]
-
-        if zone:
-            events = [e for e in events if e.zone == zone]
-
-        if since:
-            events = [e for e in events if e.timestamp >= since]
+        events = (
+            e for e in self.event_history
+            if (level is None or e.level.value >= level.value)
+            and (zone is None or e.zone == zone)
+            and (since is None or e.timestamp >= since)
+        )
 
         # Sort by timestamp descending and limit
         events = sorted(events, key=lambda x: x.timestamp, reverse=True)[:limit]
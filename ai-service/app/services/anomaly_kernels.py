@@ -0,0 +1,96 @@
+"""
+Anomaly Detection Kernels
+Numeric kernels for the rule-based anomaly checks, JIT-compiled with Numba when available
+"""
+
+import logging
+from typing import Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def _cell_extremes_numpy(
+    voltages: np.ndarray,
+    counts: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Segmented min/max over flattened cell voltages using reduceat."""
+    n = len(counts)
+    min_v = np.zeros(n)
+    max_v = np.zeros(n)
+
+    has_cells = counts > 0
+    if has_cells.any():
+        nonempty = counts[has_cells]
+        offsets = np.concatenate(([0], np.cumsum(nonempty)[:-1]))
+        min_v[has_cells] = np.minimum.reduceat(voltages, offsets)
+        max_v[has_cells] = np.maximum.reduceat(voltages, offsets)
+
+    return min_v, max_v
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def _cell_extremes_jit(voltages, counts):
+        """Segmented min/max over flattened cell voltages in a single pass."""
+        n = counts.shape[0]
+        min_v = np.zeros(n)
+        max_v = np.zeros(n)
+
+        pos = 0
+        for i in range(n):
+            count = counts[i]
+            if count == 0:
+                continue
+            lo = voltages[pos]
+            hi = voltages[pos]
+            for j in range(pos + 1, pos + count):
+                v = voltages[j]
+                if v < lo:
+                    lo = v
+                elif v > hi:
+                    hi = v
+            min_v[i] = lo
+            max_v[i] = hi
+            pos += count
+
+        return min_v, max_v
+
+
+def cell_extremes(
+    voltages: np.ndarray,
+    counts: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute per-system minimum and maximum cell voltage.
+
+    Args:
+        voltages: Cell voltages of all systems concatenated (float64)
+        counts: Number of cells per system (int64); systems with no
+            cells get 0 for both extremes
+
+    Returns:
+        (min_v, max_v) arrays, one entry per system
+    """
+    voltages = np.ascontiguousarray(voltages, dtype=np.float64)
+    counts = np.ascontiguousarray(counts, dtype=np.int64)
+
+    if NUMBA_AVAILABLE:
+        return _cell_extremes_jit(voltages, counts)
+    return _cell_extremes_numpy(voltages, counts)
+
+
+def warmup():
+    """Compile (or load from cache) the JIT kernels on a dummy input."""
+    cell_extremes(np.array([3.3]), np.array([1]))
+    if NUMBA_AVAILABLE:
+        logger.info("Anomaly kernels compiled with Numba")
+    else:
+        logger.info("Numba not available, anomaly kernels use NumPy")
@@ -5,13 +5,15 @@ Detects anomalies in battery telemetry data using ML models
 
 import logging
 import asyncio
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Sequence
+from itertools import chain
 from pathlib import Path
 import numpy as np
 import pickle
 from datetime import datetime, timedelta
 
 from app.config import settings
+from app.services import anomaly_kernels
 
 logger = logging.getLogger(__name__)
 
@@ -74,6 +76,15 @@ class AnomalyService:
             logger.error(f"Failed to load anomaly model: {e}")
             self.is_loaded = True  # Use rule-based fallback
 
+    async def warmup(self):
+        """Compile the rule kernels so the first request skips JIT compilation."""
+        try:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, anomaly_kernels.warmup)
+
+        except Exception as e:
+            logger.warning(f"Anomaly kernel warmup failed: {e}")
+
     async def analyze_telemetry(
         self,
         telemetry: Dict[str, Any],
@@ -87,152 +98,195 @@ class AnomalyService:
         Returns:
             Anomaly analysis results
         """
-        anomalies = []
-        warnings = []
-        score = 100  # Health score starts at 100
-
-        # Cell voltage analysis
-        cells = telemetry.get("cells", [])
-        if cells:
-            voltages = [c.get("voltage", 0) for c in cells]
-            min_v = min(voltages)
-            max_v = max(voltages)
-            delta_v = max_v - min_v
-
-            # Check overvoltage
-            if max_v > self.thresholds["cell_overvoltage"]:
+        results = await self.analyze_telemetry_batch([telemetry])
+        return results[0]
+
+    async def analyze_telemetry_batch(
+        self,
+        telemetries: List[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze many telemetry points for anomalies in one pass.
+
+        Rule thresholds are evaluated as vectorized comparisons over the
+        whole batch; only assembling the per-system issue lists is a
+        Python loop.
+
+        Args:
+            telemetries: Battery telemetry data, one entry per system
+
+        Returns:
+            Anomaly analysis results, in input order
+        """
+        n = len(telemetries)
+        if n == 0:
+            return []
+
+        th = self.thresholds
+
+        # Cell voltage extremes per system (systems without cells are skipped)
+        cell_voltages = [self._cell_voltages(t) for t in telemetries]
+        cell_counts = np.fromiter((len(v) for v in cell_voltages), dtype=np.int64, count=n)
+        has_cells = cell_counts > 0
+        if n == 1:
+            voltages = np.asarray(cell_voltages[0], dtype=np.float64)
+        else:
+            voltages = np.fromiter(
+                chain.from_iterable(cell_voltages),
+                dtype=np.float64,
+                count=int(cell_counts.sum()),
+            )
+        min_v, max_v = anomaly_kernels.cell_extremes(voltages, cell_counts)
+        delta_v = max_v - min_v
+
+        # Scalar fields; raw values are kept for messages
+        temp_max_raw = [t.get("temperature", {}).get("max", 25) for t in telemetries]
+        temp_min_raw = [t.get("temperature", {}).get("min", 25) for t in telemetries]
+        soh_raw = [t.get("soh", 100) for t in telemetries]
+        soc_raw = [t.get("soc", 50) for t in telemetries]
+        temp_max = np.asarray(temp_max_raw, dtype=np.float64)
+        temp_min = np.asarray(temp_min_raw, dtype=np.float64)
+        soh = np.asarray(soh_raw, dtype=np.float64)
+        soc = np.asarray(soc_raw, dtype=np.float64)
+
+        # Rule masks
+        overvoltage = has_cells & (max_v > th["cell_overvoltage"])
+        high_voltage = has_cells & ~overvoltage & (max_v > th["cell_voltage_warning_high"])
+        undervoltage = has_cells & (min_v < th["cell_undervoltage"])
+        low_voltage = has_cells & ~undervoltage & (min_v < th["cell_voltage_warning_low"])
+        imbalance = has_cells & (delta_v > th["cell_imbalance_max"])
+        overtemp = temp_max > th["temp_high_critical"]
+        high_temp = ~overtemp & (temp_max > th["temp_high_warning"])
+        undertemp = temp_min < th["temp_low_critical"]
+        temp_gradient = (temp_max - temp_min) > th["temp_gradient_max"]
+        soh_critical = soh < th["soh_critical"]
+        soh_degraded = ~soh_critical & (soh < th["soh_degraded"])
+        soc_low = soc < th["soc_low"]
+
+        # Health score starts at 100; ensure it doesn't go below 0
+        penalty = (
+            30 * overvoltage + 10 * high_voltage
+            + 30 * undervoltage + 10 * low_voltage
+            + 20 * imbalance
+            + 40 * overtemp + 15 * high_temp
+            + 30 * undertemp + 10 * temp_gradient
+            + 25 * soh_critical + 10 * soh_degraded
+        )
+        scores = np.maximum(0, 100 - penalty)
+
+        analyzed_at = datetime.utcnow().isoformat()
+        results = []
+        for i in range(n):
+            anomalies = []
+            warnings = []
+
+            if overvoltage[i]:
                 anomalies.append({
                     "type": "cell_overvoltage",
                     "severity": "critical",
-                    "message": f"Célula com sobretensão: {max_v:.3f}V",
-                    "value": max_v,
-                    "threshold": self.thresholds["cell_overvoltage"],
+                    "message": f"Célula com sobretensão: {max_v[i]:.3f}V",
+                    "value": float(max_v[i]),
+                    "threshold": th["cell_overvoltage"],
                 })
-                score -= 30
-
-            elif max_v > self.thresholds["cell_voltage_warning_high"]:
+            elif high_voltage[i]:
                 warnings.append({
                     "type": "cell_high_voltage",
                     "severity": "warning",
-                    "message": f"Célula com tensão elevada: {max_v:.3f}V",
-                    "value": max_v,
+                    "message": f"Célula com tensão elevada: {max_v[i]:.3f}V",
+                    "value": float(max_v[i]),
                 })
-                score -= 10
 
-            # Check undervoltage
-            if min_v < self.thresholds["cell_undervoltage"]:
+            if undervoltage[i]:
                 anomalies.append({
                     "type": "cell_undervoltage",
                     "severity": "critical",
-                    "message": f"Célula com subtensão: {min_v:.3f}V",
-                    "value": min_v,
-                    "threshold": self.thresholds["cell_undervoltage"],
+                    "message": f"Célula com subtensão: {min_v[i]:.3f}V",
+                    "value": float(min_v[i]),
+                    "threshold": th["cell_undervoltage"],
                 })
-                score -= 30
-
-            elif min_v < self.thresholds["cell_voltage_warning_low"]:
+            elif low_voltage[i]:
                 warnings.append({
                     "type": "cell_low_voltage",
                     "severity": "warning",
-                    "message": f"Célula com tensão baixa: {min_v:.3f}V",
-                    "value": min_v,
+                    "message": f"Célula com tensão baixa: {min_v[i]:.3f}V",
+                    "value": float(min_v[i]),
                 })
-                score -= 10
 
-            # Check imbalance
-            if delta_v > self.thresholds["cell_imbalance_max"]:
+            if imbalance[i]:
                 anomalies.append({
                     "type": "cell_imbalance",
                     "severity": "high",
-                    "message": f"Desbalanceamento excessivo: {delta_v*1000:.1f}mV",
-                    "value": delta_v,
-                    "threshold": self.thresholds["cell_imbalance_max"],
+                    "message": f"Desbalanceamento excessivo: {delta_v[i]*1000:.1f}mV",
+                    "value": float(delta_v[i]),
+                    "threshold": th["cell_imbalance_max"],
+                })
+
+            if overtemp[i]:
+                anomalies.append({
+                    "type": "overtemperature",
+                    "severity": "critical",
+                    "message": f"Temperatura crítica: {temp_max_raw[i]}°C",
+                    "value": temp_max_raw[i],
+                })
+            elif high_temp[i]:
+                warnings.append({
+                    "type": "high_temperature",
+                    "severity": "warning",
+                    "message": f"Temperatura elevada: {temp_max_raw[i]}°C",
+                    "value": temp_max_raw[i],
                 })
-                score -= 20
-
-        # Temperature analysis
-        temp_data = telemetry.get("temperature", {})
-        temp_max = temp_data.get("max", 25)
-        temp_min = temp_data.get("min", 25)
-        temp_gradient = temp_max - temp_min
-
-        if temp_max > self.thresholds["temp_high_critical"]:
-            anomalies.append({
-                "type": "overtemperature",
-                "severity": "critical",
-                "message": f"Temperatura crítica: {temp_max}°C",
-                "value": temp_max,
-            })
-            score -= 40
-
-        elif temp_max > self.thresholds["temp_high_warning"]:
-            warnings.append({
-                "type": "high_temperature",
-                "severity": "warning",
-                "message": f"Temperatura elevada: {temp_max}°C",
-                "value": temp_max,
-            })
-            score -= 15
-
-        if temp_min < self.thresholds["temp_low_critical"]:
-            anomalies.append({
-                "type": "undertemperature",
-                "severity": "critical",
-                "message": f"Temperatura muito baixa: {temp_min}°C",
-                "value": temp_min,
-            })
-            score -= 30
-
-        if temp_gradient > self.thresholds["temp_gradient_max"]:
-            warnings.append({
-                "type": "temperature_gradient",
-                "severity": "warning",
-                "message": f"Gradiente de temperatura alto: {temp_gradient}°C",
-                "value": temp_gradient,
-            })
-            score -= 10
-
-        # SOH analysis
-        soh = telemetry.get("soh", 100)
-        if soh < self.thresholds["soh_critical"]:
-            anomalies.append({
-                "type": "soh_critical",
-                "severity": "high",
-                "message": f"SOH crítico: {soh}%",
-                "value": soh,
-            })
-            score -= 25
-
-        elif soh < self.thresholds["soh_degraded"]:
-            warnings.append({
-                "type": "soh_degraded",
-                "severity": "warning",
-                "message": f"SOH degradado: {soh}%",
-                "value": soh,
-            })
-            score -= 10
-
-        # SOC analysis
-        soc = telemetry.get("soc", 50)
-        if soc < self.thresholds["soc_low"]:
-            warnings.append({
-                "type": "soc_low",
-                "severity": "warning",
-                "message": f"SOC baixo: {soc}%",
-                "value": soc,
-            })
 
-        # Ensure score doesn't go below 0
-        score = max(0, score)
+            if undertemp[i]:
+                anomalies.append({
+                    "type": "undertemperature",
+                    "severity": "critical",
+                    "message": f"Temperatura muito baixa: {temp_min_raw[i]}°C",
+                    "value": temp_min_raw[i],
+                })
 
-        return {
-            "health_score": score,
-            "status": "critical" if score < 50 else "warning" if score < 80 else "healthy",
-            "anomalies": anomalies,
-            "warnings": warnings,
-            "total_issues": len(anomalies) + len(warnings),
-            "analyzed_at": datetime.utcnow().isoformat(),
-        }
+            if temp_gradient[i]:
+                gradient = temp_max_raw[i] - temp_min_raw[i]
+                warnings.append({
+                    "type": "temperature_gradient",
+                    "severity": "warning",
+                    "message": f"Gradiente de temperatura alto: {gradient}°C",
+                    "value": gradient,
+                })
+
+            if soh_critical[i]:
+                anomalies.append({
+                    "type": "soh_critical",
+                    "severity": "high",
+                    "message": f"SOH crítico: {soh_raw[i]}%",
+                    "value": soh_raw[i],
+                })
+            elif soh_degraded[i]:
+                warnings.append({
+                    "type": "soh_degraded",
+                    "severity": "warning",
+                    "message": f"SOH degradado: {soh_raw[i]}%",
+                    "value": soh_raw[i],
+                })
+
+            if soc_low[i]:
+                warnings.append({
+                    "type": "soc_low",
+                    "severity": "warning",
+                    "message": f"SOC baixo: {soc_raw[i]}%",
+                    "value": soc_raw[i],
+                })
+
+            score = int(scores[i])
+            results.append({
+                "health_score": score,
+                "status": "critical" if score < 50 else "warning" if score < 80 else "healthy",
+                "anomalies": anomalies,
+                "warnings": warnings,
+                "total_issues": len(anomalies) + len(warnings),
+                "analyzed_at": analyzed_at,
+            })
+
+        return results
 
     async def analyze_history(
         self,
@@ -278,6 +332,14 @@ class AnomalyService:
             ),
         }
 
+    @staticmethod
+    def _cell_voltages(telemetry: Dict[str, Any]) -> Sequence[float]:
+        """Cell voltages of one system, reusing pre-parsed "cells_soa" if present."""
+        cells_soa = telemetry.get("cells_soa")
+        if cells_soa is not None:
+            return cells_soa["voltage"]
+        return [c.get("voltage", 0) for c in telemetry.get("cells", [])]
+
     def _calculate_trend(self, values: List[float]) -> str:
         """Calculate trend direction from values."""
         if len(values) < 2:
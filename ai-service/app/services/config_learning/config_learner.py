@@ -4,15 +4,18 @@ Learns optimal configurations from operational data using ML.
 """
 
 import numpy as np
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, Deque
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
 import logging
-from collections import defaultdict
+from collections import defaultdict, deque
 
 logger = logging.getLogger(__name__)
 
+# Per-config retention for samples and the efficiency history
+MAX_SAMPLES_PER_CONFIG = 10000
+
 
 class LearningStrategy(Enum):
     """Learning strategies"""
@@ -93,7 +96,9 @@ class ConfigLearner:
     """
 
     def __init__(self):
-        self.samples: Dict[str, List[OperationalSample]] = defaultdict(list)
+        self.samples: Dict[str, Deque[OperationalSample]] = defaultdict(
+            lambda: deque(maxlen=MAX_SAMPLES_PER_CONFIG)
+        )
         self.parameter_bounds = PARAMETER_BOUNDS
 
         # Learning state
@@ -106,21 +111,19 @@ class ConfigLearner:
         self.parameter_stds: Dict[str, Dict[str, float]] = defaultdict(dict)
 
         # Performance tracking
-        self.performance_history: Dict[str, List[float]] = defaultdict(list)
+        self.performance_history: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=MAX_SAMPLES_PER_CONFIG)
+        )
 
     def add_sample(self, sample: OperationalSample):
         """Add an operational sample for learning"""
         key = f"{sample.config_id}"
         self.samples[key].append(sample)
 
-        # Update performance history
+        # Update performance history (both buffers drop their oldest entries)
         if 'efficiency' in sample.outcomes:
             self.performance_history[key].append(sample.outcomes['efficiency'])
 
-        # Limit history size
-        if len(self.samples[key]) > 10000:
-            self.samples[key] = self.samples[key][-10000:]
-
     def learn(
         self,
         category: str,
@@ -60,10 +60,13 @@ class ConfigVersion:
     performance_metrics: Dict[str, float] = field(default_factory=dict)
     notes: str = ""
     hash: str = ""
+    created_at_iso: str = field(init=False, repr=False, compare=False)
 
     def __post_init__(self):
         if not self.hash:
             self.hash = self._compute_hash()
+        # Versions are immutable, so the ISO timestamp is formatted once
+        self.created_at_iso = self.created_at.isoformat()
 
     def _compute_hash(self) -> str:
         """Compute hash of parameters"""
@@ -129,7 +132,7 @@ class ConfigEntry:
             'versions': [
                 {
                     'version': v.version,
-                    'created_at': v.created_at.isoformat(),
+                    'created_at': v.created_at_iso,
                     'created_by': v.created_by,
                     'parameters': v.parameters,
                     'performance_metrics': v.performance_metrics,
@@ -9,9 +9,21 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 import logging
+from collections import Counter
 
 logger = logging.getLogger(__name__)
 
+# Categorical profile fields stored as integer codes, in column order
+CATEGORICAL_FIELDS = ('device_type', 'manufacturer', 'climate_zone', 'application')
+
+# Numeric profile fields stored as float columns, in column order
+NUMERIC_FIELDS = ('capacity_kwh', 'power_kw', 'voltage_nominal', 'cells_in_series')
+
+INITIAL_CAPACITY = 64
+
+# Set bits per byte value, for popcounts over bit-packed feature rows
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
 
 @dataclass
 class DeviceProfile:
@@ -81,22 +93,118 @@ class SimilarityEngine:
             ('NMC', 'LTO'): 0.5,
         }
 
+        # Fleet statistics, maintained as devices are registered or updated
+        self._type_counts: Counter = Counter()
+        self._climate_counts: Counter = Counter()
+        self._application_counts: Counter = Counter()
+        self._total_capacity = 0.0
+        self._total_power = 0.0
+
+        # Column store mirroring self.devices (one row per device, in
+        # registration order) so find_similar scores the fleet in one pass
+        self._rows: Dict[str, int] = {}
+        self._row_ids: List[str] = []
+        self._vocab: Dict[str, Dict[str, int]] = {name: {} for name in CATEGORICAL_FIELDS}
+        self._feature_vocab: Dict[str, int] = {}
+        # Codes start at one byte and widen when a vocabulary outgrows them;
+        # features are bit-packed, 8 per byte. Ratings stay float64 so
+        # scores match _calculate_similarity exactly.
+        self._codes = np.zeros((INITIAL_CAPACITY, len(CATEGORICAL_FIELDS)), dtype=np.uint8)
+        self._numeric = np.zeros((INITIAL_CAPACITY, len(NUMERIC_FIELDS)), dtype=np.float64)
+        self._features = np.zeros((INITIAL_CAPACITY, 1), dtype=np.uint8)
+        self._feature_counts = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+
     def register_device(self, profile: DeviceProfile) -> bool:
         """Register a device profile"""
+        previous = self.devices.get(profile.device_id)
+        if previous is not None:
+            self._count_device(previous, -1)
+
         self.devices[profile.device_id] = profile
+        self._count_device(profile, 1)
+        self._store_row(profile)
         logger.info(f"Registered device: {profile.device_id}")
         return True
 
+    def _count_device(self, profile: DeviceProfile, sign: int):
+        """Add (sign=1) or remove (sign=-1) a profile from the fleet statistics."""
+        for counts, key in (
+            (self._type_counts, profile.device_type),
+            (self._climate_counts, profile.climate_zone),
+            (self._application_counts, profile.application),
+        ):
+            counts[key] += sign
+            if counts[key] <= 0:
+                del counts[key]
+
+        self._total_capacity += sign * profile.capacity_kwh
+        self._total_power += sign * profile.power_kw
+
+    def _store_row(self, profile: DeviceProfile):
+        """Encode a profile into its column-store row, appending if new."""
+        row = self._rows.get(profile.device_id)
+        if row is None:
+            row = len(self._row_ids)
+            if row == len(self._codes):
+                # Geometric growth keeps appends amortized O(1)
+                capacity = 2 * row
+                self._codes = self._grow_rows(self._codes, capacity)
+                self._numeric = self._grow_rows(self._numeric, capacity)
+                self._features = self._grow_rows(self._features, capacity)
+                self._feature_counts = self._grow_rows(self._feature_counts, capacity)
+            self._rows[profile.device_id] = row
+            self._row_ids.append(profile.device_id)
+
+        for col, name in enumerate(CATEGORICAL_FIELDS):
+            vocab = self._vocab[name]
+            code = vocab.setdefault(getattr(profile, name), len(vocab))
+            if code > np.iinfo(self._codes.dtype).max:
+                self._codes = self._codes.astype(np.min_scalar_type(code))
+            self._codes[row, col] = code
+
+        self._numeric[row] = [getattr(profile, name) for name in NUMERIC_FIELDS]
+
+        features = set(profile.features)
+        for feature in features:
+            if feature not in self._feature_vocab:
+                self._feature_vocab[feature] = len(self._feature_vocab)
+        width = self._features.shape[1]
+        if len(self._feature_vocab) > 8 * width:
+            # Appending bytes keeps existing bit positions (packbits is big-endian)
+            needed = -(-len(self._feature_vocab) // 8)
+            grown = np.zeros((len(self._features), max(2 * width, needed)), dtype=np.uint8)
+            grown[:, :width] = self._features
+            self._features = grown
+
+        self._features[row] = self._pack_features(features)
+        self._feature_counts[row] = len(features)
+
+    def _pack_features(self, features: set) -> np.ndarray:
+        """Bit-pack the known features of a set into one feature-matrix row."""
+        bits = np.zeros(8 * self._features.shape[1], dtype=bool)
+        bits[[self._feature_vocab[f] for f in features if f in self._feature_vocab]] = True
+        return np.packbits(bits)
+
+    @staticmethod
+    def _grow_rows(array: np.ndarray, capacity: int) -> np.ndarray:
+        """Return a copy of array with room for capacity rows."""
+        grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
     def update_device(self, device_id: str, updates: Dict[str, Any]) -> bool:
         """Update device profile"""
         if device_id not in self.devices:
             return False
 
         device = self.devices[device_id]
+        self._count_device(device, -1)
         for key, value in updates.items():
             if hasattr(device, key):
                 setattr(device, key, value)
 
+        self._count_device(device, 1)
+        self._store_row(device)
         return True
 
     def find_similar(
@@ -116,25 +224,108 @@ class SimilarityEngine:
         Returns:
             List of similar devices with scores
         """
-        results = []
-
-        for device_id, device in self.devices.items():
-            if device_id == target.device_id:
-                continue
+        n = len(self._row_ids)
+        if n == 0 or limit <= 0:
+            return []
+
+        factors = self._similarity_factors(target, n)
+        scores = sum(factors[k] * self.weights[k] for k in factors)
+
+        candidates = scores >= min_similarity
+        target_row = self._rows.get(target.device_id)
+        if target_row is not None:
+            candidates[target_row] = False
+
+        rows = np.flatnonzero(candidates)
+        if len(rows) > limit:
+            # Keep the top `limit`; ties at the cutoff go to the earliest
+            # registered devices, matching a stable sort
+            cand_scores = scores[rows]
+            cutoff = np.partition(cand_scores, len(rows) - limit)[len(rows) - limit]
+            above = cand_scores > cutoff
+            at_cutoff = cand_scores == cutoff
+            at_cutoff &= np.cumsum(at_cutoff) <= limit - np.count_nonzero(above)
+            rows = rows[above | at_cutoff]
+
+        # Sort by similarity, registration order breaking ties
+        rows = rows[np.lexsort((rows, -scores[rows]))]
+
+        return [
+            SimilarDevice(
+                device=self.devices[self._row_ids[row]],
+                similarity_score=float(scores[row]),
+                matching_factors={k: float(v[row]) for k, v in factors.items()}
+            )
+            for row in rows
+        ]
 
-            similarity, factors = self._calculate_similarity(target, device)
+    def _similarity_factors(self, target: DeviceProfile, n: int) -> Dict[str, np.ndarray]:
+        """
+        Compute every similarity factor between target and the first n
+        registered devices as arrays; mirrors _calculate_similarity.
+        """
+        codes = self._codes[:n]
+        numeric = self._numeric[:n]
+        factors = {}
 
-            if similarity >= min_similarity:
-                results.append(SimilarDevice(
-                    device=device,
-                    similarity_score=similarity,
-                    matching_factors=factors
-                ))
+        # Device type similarity via a per-type lookup table
+        type_vocab = self._vocab['device_type']
+        type_table = np.empty(len(type_vocab))
+        for device_type, code in type_vocab.items():
+            type_table[code] = self._type_similarity(target.device_type, device_type)
+        factors['device_type'] = type_table[codes[:, 0]]
 
-        # Sort by similarity
-        results.sort(key=lambda x: x.similarity_score, reverse=True)
+        # Manufacturer similarity
+        factors['manufacturer'] = self._match(codes[:, 1], 'manufacturer', target.manufacturer, 0.5)
+
+        # Capacity, power and voltage similarity (square root of the ratio)
+        for col, (name, attr) in enumerate((
+            ('capacity', 'capacity_kwh'),
+            ('power', 'power_kw'),
+            ('voltage', 'voltage_nominal'),
+        )):
+            value = getattr(target, attr)
+            factors[name] = (
+                np.minimum(value, numeric[:, col]) / np.maximum(value, numeric[:, col])
+            ) ** 0.5
 
-        return results[:limit]
+        # Cell configuration similarity
+        series = target.cells_in_series
+        series_match = 1.0 - np.abs(series - numeric[:, 3]) / max(series, 1)
+        factors['cell_config'] = np.maximum(0, series_match)
+
+        # Climate and application similarity
+        factors['climate'] = self._match(codes[:, 2], 'climate_zone', target.climate_zone, 0.6)
+        factors['application'] = self._match(codes[:, 3], 'application', target.application, 0.7)
+
+        # Features similarity (Jaccard), 0.5 when either side has none
+        target_features = set(target.features)
+        feature_counts = self._feature_counts[:n]
+        target_mask = self._pack_features(target_features)
+        intersection = _POPCOUNT[self._features[:n] & target_mask].sum(axis=1, dtype=np.int64)
+        union = feature_counts + len(target_features) - intersection
+        with np.errstate(divide='ignore', invalid='ignore'):
+            jaccard = np.where(union > 0, intersection / union, 0)
+        if target_features:
+            factors['features'] = np.where(feature_counts > 0, jaccard, 0.5)
+        else:
+            factors['features'] = np.full(n, 0.5)
+
+        return factors
+
+    def _match(self, codes: np.ndarray, field_name: str, value: str, mismatch: float) -> np.ndarray:
+        """1.0 where the coded column equals value, mismatch elsewhere."""
+        code = self._vocab[field_name].get(value)
+        if code is None:
+            return np.full(len(codes), mismatch)
+        return np.where(codes == code, 1.0, mismatch)
+
+    def _type_similarity(self, type_a: str, type_b: str) -> float:
+        """Compatibility between two device types (symmetric)."""
+        return self.type_compatibility.get(
+            (type_a, type_b),
+            self.type_compatibility.get((type_b, type_a), 0.3)
+        )
 
     def _calculate_similarity(
         self,
@@ -145,13 +336,7 @@ class SimilarityEngine:
         factors = {}
 
         # Device type similarity
-        type_key = (target.device_type, candidate.device_type)
-        reverse_key = (candidate.device_type, target.device_type)
-        type_sim = self.type_compatibility.get(
-            type_key,
-            self.type_compatibility.get(reverse_key, 0.3)
-        )
-        factors['device_type'] = type_sim
+        factors['device_type'] = self._type_similarity(target.device_type, candidate.device_type)
 
         # Manufacturer similarity
         factors['manufacturer'] = 1.0 if target.manufacturer == candidate.manufacturer else 0.5
@@ -317,32 +502,21 @@ class SimilarityEngine:
         return None
 
     def get_fleet_statistics(self) -> Dict[str, Any]:
-        """Get statistics about registered devices"""
+        """Get statistics about registered devices (O(1), from running counters)"""
         if not self.devices:
             return {'total': 0}
 
-        types = {}
-        climates = {}
-        applications = {}
-        total_capacity = 0
-        total_power = 0
-
-        for device in self.devices.values():
-            types[device.device_type] = types.get(device.device_type, 0) + 1
-            climates[device.climate_zone] = climates.get(device.climate_zone, 0) + 1
-            applications[device.application] = applications.get(device.application, 0) + 1
-            total_capacity += device.capacity_kwh
-            total_power += device.power_kw
+        total_devices = len(self.devices)
 
         return {
-            'total_devices': len(self.devices),
-            'by_type': types,
-            'by_climate': climates,
-            'by_application': applications,
-            'total_capacity_kwh': total_capacity,
-            'total_power_kw': total_power,
-            'average_capacity_kwh': total_capacity / len(self.devices),
-            'average_power_kw': total_power / len(self.devices)
+            'total_devices': total_devices,
+            'by_type': dict(self._type_counts),
+            'by_climate': dict(self._climate_counts),
+            'by_application': dict(self._application_counts),
+            'total_capacity_kwh': self._total_capacity,
+            'total_power_kw': self._total_power,
+            'average_capacity_kwh': self._total_capacity / total_devices,
+            'average_power_kw': self._total_power / total_devices
         }
 
     def get_device(self, device_id: str) -> Optional[DeviceProfile]:
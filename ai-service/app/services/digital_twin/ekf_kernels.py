@@ -0,0 +1,154 @@
+"""
+State Estimator Kernels
+EKF recurrence over a telemetry batch, JIT-compiled with Numba when available
+"""
+
+import logging
+from typing import Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def _ekf_run(x, P, Q, R, soc_points, ocv_points, slope_points, slopes,
+             cells_in_series, nominal_capacity, voltage, current, dt):
+    """
+    Run ExtendedKalmanFilter.predict() + update() once per sample.
+
+    x and P are overwritten with the final state; returns the SOC,
+    resistance and SOC variance after each sample. Scalar 2x2 arithmetic
+    so the same source runs under Numba and as plain Python.
+    """
+    n = voltage.shape[0]
+    soc_out = np.empty(n)
+    r_out = np.empty(n)
+    var_out = np.empty(n)
+
+    soc = x[0]
+    r_int = x[1]
+    p00, p01, p10, p11 = P[0, 0], P[0, 1], P[1, 0], P[1, 1]
+
+    for i in range(n):
+        v = voltage[i]
+        cur = current[i]
+
+        # Predict: SOC follows coulomb counting, resistance constant (F = I)
+        soc = min(max(soc - cur * dt[i] / (nominal_capacity * 3600), 0.0), 1.0)
+        p00 += Q[0, 0]
+        p01 += Q[0, 1]
+        p10 += Q[1, 0]
+        p11 += Q[1, 1]
+
+        # Update with the terminal voltage measurement
+        pack_ocv = np.interp(soc, soc_points, ocv_points) * cells_in_series
+        y = v - (pack_ocv - cur * r_int)
+
+        h0 = np.interp(soc, slope_points, slopes) * cells_in_series
+        h1 = -cur
+
+        ph0 = p00 * h0 + p01 * h1
+        ph1 = p10 * h0 + p11 * h1
+        s = h0 * ph0 + h1 * ph1 + R
+        k0 = ph0 / s
+        k1 = ph1 / s
+
+        soc = min(max(soc + k0 * y, 0.0), 1.0)
+        r_int = min(max(r_int + k1 * y, 0.001), 0.1)
+
+        m00 = 1.0 - k0 * h0
+        m01 = -k0 * h1
+        m10 = -k1 * h0
+        m11 = 1.0 - k1 * h1
+        p00, p01, p10, p11 = (
+            m00 * p00 + m01 * p10, m00 * p01 + m01 * p11,
+            m10 * p00 + m11 * p10, m10 * p01 + m11 * p11,
+        )
+
+        soc_out[i] = soc
+        r_out[i] = r_int
+        var_out[i] = p00
+
+    x[0] = soc
+    x[1] = r_int
+    P[0, 0], P[0, 1], P[1, 0], P[1, 1] = p00, p01, p10, p11
+
+    return soc_out, r_out, var_out
+
+
+if NUMBA_AVAILABLE:
+    _ekf_run_jit = njit(cache=True)(_ekf_run)
+
+
+def ekf_run(
+    x: np.ndarray,
+    P: np.ndarray,
+    Q: np.ndarray,
+    R: float,
+    soc_points: np.ndarray,
+    ocv_points: np.ndarray,
+    cells_in_series: int,
+    nominal_capacity: float,
+    voltage: np.ndarray,
+    current: np.ndarray,
+    dt: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Filter a batch of (voltage, current, dt) samples.
+
+    Args:
+        x: Initial state vector [SOC, R_internal]
+        P: Initial 2x2 state covariance
+        Q: 2x2 process noise covariance
+        R: Measurement noise variance
+        soc_points, ocv_points: Cell OCV lookup table
+        voltage, current, dt: Per-sample pack voltage (V), current (A,
+            positive = discharge) and time step (s)
+
+    Returns:
+        (soc, resistance, soc_variance, x, P): per-sample series and the
+        state and covariance after the last sample
+    """
+    # dOCV/dSOC is looked up at segment midpoints, as in ExtendedKalmanFilter
+    slope_points = soc_points[:-1] + 0.05
+    slopes = np.diff(ocv_points) / np.diff(soc_points)
+
+    x = np.array(x, dtype=np.float64)
+    P = np.array(P, dtype=np.float64)
+    args = (
+        x, P,
+        np.ascontiguousarray(Q, dtype=np.float64),
+        float(R),
+        np.ascontiguousarray(soc_points, dtype=np.float64),
+        np.ascontiguousarray(ocv_points, dtype=np.float64),
+        np.ascontiguousarray(slope_points, dtype=np.float64),
+        np.ascontiguousarray(slopes, dtype=np.float64),
+        float(cells_in_series),
+        float(nominal_capacity),
+        np.ascontiguousarray(voltage, dtype=np.float64),
+        np.ascontiguousarray(current, dtype=np.float64),
+        np.ascontiguousarray(dt, dtype=np.float64),
+    )
+
+    run = _ekf_run_jit if NUMBA_AVAILABLE else _ekf_run
+    soc, resistance, soc_variance = run(*args)
+    return soc, resistance, soc_variance, x, P
+
+
+def warmup():
+    """Compile (or load from cache) the JIT kernels on a dummy input."""
+    ekf_run(
+        np.array([0.5, 0.01]), np.diag([0.01, 0.001]), np.diag([0.001, 0.0001]), 0.01,
+        np.array([0.0, 1.0]), np.array([2.5, 3.65]), 16, 100.0,
+        np.array([52.0]), np.array([0.0]), np.array([1.0]),
+    )
+    if NUMBA_AVAILABLE:
+        logger.info("State estimator kernels compiled with Numba")
+    else:
+        logger.info("Numba not available, state estimator kernels run in Python")
@@ -35,14 +35,14 @@ class SimulationConfig:
 
 @dataclass
 class SimulationResult:
-    """Result of a battery simulation"""
-    time: List[float]
-    voltage: List[float]
-    current: List[float]
-    soc: List[float]
-    temperature: List[float]
-    power: List[float]
-    internal_resistance: List[float]
+    """Result of a battery simulation (series are float64 arrays, one entry per time point)"""
+    time: np.ndarray
+    voltage: np.ndarray
+    current: np.ndarray
+    soc: np.ndarray
+    temperature: np.ndarray
+    power: np.ndarray
+    internal_resistance: np.ndarray
     metadata: Dict[str, Any]
 
 
@@ -177,16 +177,16 @@ class PyBAMMSimulator:
             )
 
             # Extract results
-            time = solution["Time [s]"].entries.tolist()
-            voltage = (solution["Terminal voltage [V]"].entries * config.cells_in_series).tolist()
-            current = (solution["Current [A]"].entries * config.cells_in_parallel).tolist()
+            time = np.asarray(solution["Time [s]"].entries, dtype=np.float64)
+            voltage = solution["Terminal voltage [V]"].entries * config.cells_in_series
+            current = solution["Current [A]"].entries * config.cells_in_parallel
 
             # Calculate SOC
             capacity = solution["Discharge capacity [A.h]"].entries
-            soc = (1 - capacity / config.nominal_capacity).tolist()
+            soc = 1 - capacity / config.nominal_capacity
 
-            temperature = (solution["Cell temperature [K]"].entries - 273.15).tolist()
-            power = [v * i for v, i in zip(voltage, current)]
+            temperature = solution["Cell temperature [K]"].entries - 273.15
+            power = voltage * current
 
             # Estimate internal resistance
             internal_resistance = self._estimate_resistance(voltage, current, soc)
@@ -290,13 +290,13 @@ class PyBAMMSimulator:
             internal_resistance.append(r_pack * r_factor)
 
         return SimulationResult(
-            time=time,
-            voltage=voltage,
-            current=current,
-            soc=soc,
-            temperature=temperature,
-            power=power,
-            internal_resistance=internal_resistance,
+            time=np.asarray(time),
+            voltage=np.asarray(voltage),
+            current=np.asarray(current),
+            soc=np.asarray(soc),
+            temperature=np.asarray(temperature),
+            power=np.asarray(power),
+            internal_resistance=np.asarray(internal_resistance),
             metadata={
                 "model": "Simplified-Equivalent-Circuit",
                 "chemistry": "LiFePO4",
@@ -321,19 +321,15 @@ class PyBAMMSimulator:
 
     def _estimate_resistance(
         self,
-        voltage: List[float],
-        current: List[float],
-        soc: List[float]
-    ) -> List[float]:
+        voltage: np.ndarray,
+        current: np.ndarray,
+        soc: np.ndarray
+    ) -> np.ndarray:
         """Estimate internal resistance from voltage and current"""
-        resistance = []
-        for i in range(len(voltage)):
-            if abs(current[i]) > 0.1:
-                # Simple estimation based on voltage drop
-                r = abs(voltage[i] / current[i]) * 0.01
-            else:
-                r = 0.1  # Default when current is near zero
-            resistance.append(r)
+        # Simple estimation based on voltage drop; default when current is near zero
+        loaded = np.abs(current) > 0.1
+        resistance = np.full(len(voltage), 0.1)
+        resistance[loaded] = np.abs(voltage[loaded] / current[loaded]) * 0.01
         return resistance
 
     def _create_custom_experiment(
@@ -10,8 +10,49 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta
 import numpy as np
 
+from . import ekf_kernels
+
 logger = logging.getLogger(__name__)
 
+MAX_STATE_HISTORY = 1000
+MAX_MEASUREMENT_HISTORY = 100
+
+# Batches up to this size run the EKF kernel on the event loop; an executor
+# hop costs more than filtering a few hundred samples
+INLINE_BATCH_SIZE = 256
+
+
+def _epoch_seconds(timestamp: Any) -> Optional[float]:
+    """Telemetry timestamp (ISO string, epoch seconds or datetime) as epoch seconds"""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    return timestamp
+
+
+def telemetry_to_arrays(readings: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Convert telemetry readings to one float64 array per field
+
+    Args:
+        readings: Telemetry readings with timestamp, voltage (or packVoltage),
+            current and optional temperature
+
+    Returns:
+        Dict with timestamp (epoch seconds), voltage, current and temperature
+        arrays; missing timestamps and temperatures are NaN
+    """
+    n = len(readings)
+    return {
+        "timestamp": np.array([_epoch_seconds(r.get('timestamp')) for r in readings], dtype=np.float64),
+        "voltage": np.fromiter(
+            (r.get('voltage', r.get('packVoltage', 0)) for r in readings), np.float64, count=n
+        ),
+        "current": np.fromiter((r.get('current', 0) for r in readings), np.float64, count=n),
+        "temperature": np.array([r.get('temperature') for r in readings], dtype=np.float64),
+    }
+
 
 @dataclass
 class BatteryState:
@@ -38,6 +79,7 @@ class EstimatorConfig:
     max_soc: float = 0.95
     process_noise: float = 0.001
     measurement_noise: float = 0.01
+    update_coalesce_ms: float = 0.0  # extra wait for queued update() calls (0 = take what's queued)
 
 
 class ExtendedKalmanFilter:
@@ -167,15 +209,52 @@ class SOHEstimator:
         """Record a capacity measurement"""
         self.capacity_history.append((timestamp, measured_capacity))
         # Keep last 100 measurements
-        if len(self.capacity_history) > 100:
+        if len(self.capacity_history) > MAX_MEASUREMENT_HISTORY:
             self.capacity_history.pop(0)
 
     def update_resistance_measurement(self, measured_resistance: float, timestamp: datetime):
         """Record a resistance measurement"""
         self.resistance_history.append((timestamp, measured_resistance))
-        if len(self.resistance_history) > 100:
+        if len(self.resistance_history) > MAX_MEASUREMENT_HISTORY:
             self.resistance_history.pop(0)
 
+    def update_resistance_series(self, resistances: np.ndarray, timestamp: datetime) -> np.ndarray:
+        """
+        Record a run of resistance measurements at once
+
+        Returns:
+            Combined SOH after each measurement, as estimate_soh() would
+            have reported it had they been recorded one at a time
+        """
+        history = np.concatenate((
+            np.array([r for _, r in self.resistance_history], dtype=np.float64),
+            resistances,
+        ))
+
+        # Window of each estimate: the last 100 measurements recorded so far
+        end = np.arange(len(self.resistance_history) + 1, len(history) + 1)
+        initial_r = history[np.maximum(end - MAX_MEASUREMENT_HISTORY, 0)]
+        recent = np.maximum(end - 10, 0)
+        cumsum = np.concatenate(([0.0], np.cumsum(history)))
+        current_r = (cumsum[end] - cumsum[recent]) / (end - recent)
+
+        resistance_soh = np.maximum(1.0 - (current_r / initial_r - 1.0) * 2, 0)
+        combined_soh = 0.7 * self._capacity_soh() + 0.3 * resistance_soh
+
+        self.resistance_history.extend(
+            (timestamp, r) for r in resistances[-MAX_MEASUREMENT_HISTORY:].tolist()
+        )
+        del self.resistance_history[:-MAX_MEASUREMENT_HISTORY]
+
+        return np.clip(combined_soh, 0, 1)
+
+    def _capacity_soh(self) -> float:
+        """Capacity-based SOH from the last 10 capacity measurements"""
+        if self.capacity_history:
+            recent_capacity = np.mean([c for _, c in self.capacity_history[-10:]])
+            return recent_capacity / self.nominal_capacity
+        return 1.0
+
     def increment_cycle(self, dod: float = 1.0):
         """Increment cycle count (with partial cycles)"""
         self.cycle_count += dod
@@ -188,11 +267,7 @@ class SOHEstimator:
             Dictionary with soh, capacity_soh, resistance_soh
         """
         # Capacity-based SOH
-        if self.capacity_history:
-            recent_capacity = np.mean([c for _, c in self.capacity_history[-10:]])
-            capacity_soh = recent_capacity / self.nominal_capacity
-        else:
-            capacity_soh = 1.0
+        capacity_soh = self._capacity_soh()
 
         # Resistance-based SOH (assuming 50% increase at EOL)
         if self.resistance_history:
@@ -280,8 +355,18 @@ class StateEstimator:
         # State history for analytics
         self._state_history: List[BatteryState] = []
 
+        # Queue coalescing submit_update() calls into update_batch()
+        self._updates: Optional[asyncio.Queue] = None
+        self._update_task: Optional[asyncio.Task] = None
+
     async def load_model(self) -> bool:
         """Initialize the estimator"""
+        try:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, ekf_kernels.warmup)
+        except Exception as e:
+            logger.warning(f"State estimator kernel warmup failed: {e}")
+
         self.is_loaded = True
         logger.info("State estimator initialized")
         return True
@@ -345,11 +430,90 @@ class StateEstimator:
 
             # Store history
             self._state_history.append(state)
-            if len(self._state_history) > 1000:
+            if len(self._state_history) > MAX_STATE_HISTORY:
                 self._state_history.pop(0)
 
             return state
 
+    async def submit_update(
+        self,
+        voltage: float,
+        current: float,
+        temperature: Optional[float] = None,
+        dt: float = 1.0
+    ) -> BatteryState:
+        """
+        Same as update(), but coalesced with concurrent calls
+
+        Measurements that queue up while a batch is being filtered (plus any
+        arriving within config.update_coalesce_ms) go through update_batch()
+        together, in arrival order, and each caller gets the state after its
+        own measurement.
+        """
+        if self._update_task is None or self._update_task.done():
+            self._updates = asyncio.Queue()
+            self._update_task = asyncio.create_task(self._run_updates())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._updates.put((voltage, current, temperature, dt, future))
+        return await future
+
+    async def _run_updates(self):
+        """Drain queued measurements into update_batch() calls until cancelled"""
+        loop = asyncio.get_running_loop()
+        max_wait = self.config.update_coalesce_ms / 1000
+
+        while True:
+            batch = [await self._updates.get()]
+            deadline = loop.time() + max_wait
+
+            while len(batch) < MAX_STATE_HISTORY:
+                if not self._updates.empty():
+                    batch.append(self._updates.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._updates.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            voltage, current, temperature, dt, futures = zip(*batch)
+            try:
+                states = await self.update_batch(
+                    np.array(voltage, dtype=np.float64),
+                    np.array(current, dtype=np.float64),
+                    np.array(dt, dtype=np.float64),
+                    np.array(temperature, dtype=np.float64),
+                )
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for future, state in zip(futures, states):
+                if not future.done():
+                    future.set_result(state)
+
+    async def close(self):
+        """Stop coalescing updates, failing any still queued"""
+        if self._update_task is None:
+            return
+
+        self._update_task.cancel()
+        try:
+            await self._update_task
+        except asyncio.CancelledError:
+            pass
+        self._update_task = None
+
+        while not self._updates.empty():
+            *_, future = self._updates.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("State estimator stopped"))
+
     def _calculate_power_limits(
         self,
         soc: float,
@@ -411,7 +575,7 @@ class StateEstimator:
     async def estimate_from_telemetry(
         self,
         telemetry_data: List[Dict[str, Any]]
-    ) -> BatteryState:
+    ) -> Optional[BatteryState]:
         """
         Process a batch of telemetry data to estimate current state
 
@@ -419,32 +583,129 @@ class StateEstimator:
             telemetry_data: List of telemetry readings with voltage, current, timestamp
 
         Returns:
-            Final estimated state
+            Final estimated state (None for an empty batch)
         """
-        state = None
-        prev_time = None
-
-        for reading in sorted(telemetry_data, key=lambda x: x.get('timestamp', 0)):
-            timestamp = reading.get('timestamp')
-            if isinstance(timestamp, str):
-                timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            elif isinstance(timestamp, (int, float)):
-                timestamp = datetime.fromtimestamp(timestamp)
-
-            if prev_time is not None:
-                dt = (timestamp - prev_time).total_seconds()
-            else:
-                dt = 1.0
+        return await self.estimate_from_arrays(telemetry_to_arrays(telemetry_data))
+
+    async def estimate_from_arrays(
+        self,
+        telemetry: Dict[str, np.ndarray]
+    ) -> Optional[BatteryState]:
+        """
+        Process a batch of telemetry arrays to estimate current state
+
+        Readings are sorted by timestamp and fed to update_batch(), with dt
+        taken from the gaps between consecutive timestamps.
+
+        Args:
+            telemetry: Arrays as returned by telemetry_to_arrays()
+
+        Returns:
+            Final estimated state (None for an empty batch)
+        """
+        timestamp = telemetry["timestamp"]
+        n = len(timestamp)
+        if n == 0:
+            return None
+
+        order = np.argsort(np.nan_to_num(timestamp, nan=0.0), kind="stable")
+        voltage = telemetry["voltage"][order]
+        current = telemetry["current"][order]
+        temperature = telemetry["temperature"][order]
+
+        # Time since the previous reading; 1 s when unknown
+        dt = np.diff(timestamp[order], prepend=np.nan)
+        dt[np.isnan(dt)] = 1.0
 
-            state = await self.update(
-                voltage=reading.get('voltage', reading.get('packVoltage', 0)),
-                current=reading.get('current', 0),
-                temperature=reading.get('temperature', None),
-                dt=dt
+        states = await self.update_batch(voltage, current, dt, temperature)
+        return states[-1]
+
+    async def update_batch(
+        self,
+        voltage: np.ndarray,
+        current: np.ndarray,
+        dt: np.ndarray,
+        temperature: Optional[np.ndarray] = None
+    ) -> List[BatteryState]:
+        """
+        Apply a series of measurements, in order
+
+        Equivalent to calling update() once per sample, but the EKF runs
+        over the whole series in one kernel call and only the states that
+        stay in the history are materialized.
+
+        Args:
+            voltage: Terminal voltages (V)
+            current: Currents (A), positive = discharge
+            dt: Time step before each sample (s)
+            temperature: Measured temperatures (C), NaN where not reported
+
+        Returns:
+            States after each of the last min(n, MAX_STATE_HISTORY) samples
+        """
+        n = len(voltage)
+        if n == 0:
+            return []
+        if temperature is None:
+            temperature = np.full(n, np.nan)
+
+        async with self._lock:
+            ekf = self.ekf
+            args = (
+                ekf.x, ekf.P, ekf.Q, ekf.R[0, 0],
+                ekf._soc_points, ekf._ocv_points,
+                self.config.cells_in_series, self.config.nominal_capacity,
+                voltage, current, dt,
             )
-            prev_time = timestamp
+            if n <= INLINE_BATCH_SIZE:
+                result = ekf_kernels.ekf_run(*args)
+            else:
+                loop = asyncio.get_event_loop()
+                result = await loop.run_in_executor(None, ekf_kernels.ekf_run, *args)
+            soc, resistance, soc_variance, ekf.x, ekf.P = result
+
+            # The last reported temperature carries forward
+            reported = np.where(np.isnan(temperature), -1, np.arange(n))
+            np.maximum.accumulate(reported, out=reported)
+            temperature = np.where(reported >= 0, temperature[reported], self._temperature)
+            self._temperature = float(temperature[-1])
 
-        return state
+            now = datetime.utcnow()
+            soh = self.soh_estimator.update_resistance_series(resistance, now)
+
+            # Track cycles
+            loaded = np.abs(current) > 0.1
+            delta_soc = np.abs(current[loaded] * dt[loaded] / (self.config.nominal_capacity * 3600))
+            self.soh_estimator.increment_cycle(float(delta_soc.sum()) / 2)  # Half cycles
+
+            confidence = 1.0 - np.minimum(1.0, soc_variance * 10)
+
+            # Earlier states would be evicted from the history straight away
+            keep = min(n, MAX_STATE_HISTORY)
+            states = []
+            for s, h, r, t, c in zip(
+                soc[-keep:].tolist(),
+                soh[-keep:].tolist(),
+                resistance[-keep:].tolist(),
+                temperature[-keep:].tolist(),
+                confidence[-keep:].tolist(),
+            ):
+                sop_charge, sop_discharge = self._calculate_power_limits(s, r, t)
+                states.append(BatteryState(
+                    soc=s,
+                    soh=h,
+                    sop_charge=sop_charge,
+                    sop_discharge=sop_discharge,
+                    internal_resistance=r,
+                    temperature=t,
+                    timestamp=now,
+                    confidence=c,
+                ))
+
+            self._state_history.extend(states)
+            del self._state_history[:-MAX_STATE_HISTORY]
+
+            return states
 
     async def calibrate(
         self,
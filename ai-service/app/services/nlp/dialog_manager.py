@@ -4,18 +4,25 @@ Manages conversation state, context, and multi-turn interactions.
 """
 
 import uuid
+import asyncio
 from typing import Dict, Any, Optional, List, Callable
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime, timedelta
 import logging
-from collections import deque
+from collections import OrderedDict, deque
 
 from .intent_classifier import Intent, IntentCategory, IntentResult
 from .entity_extractor import Entity, EntityType, ExtractionResult
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on live sessions; past it the least recently active is dropped
+MAX_SESSIONS = 10_000
+
+# Seconds between background sweeps for expired sessions
+SESSION_CLEANUP_INTERVAL = 300
+
 
 class DialogState(Enum):
     """States of the dialog"""
@@ -345,8 +352,10 @@ class DialogManager:
     """
 
     def __init__(self):
-        self.sessions: Dict[str, ConversationContext] = {}
+        # Ordered by last use, least recently active first
+        self.sessions: "OrderedDict[str, ConversationContext]" = OrderedDict()
         self.session_timeout_minutes = 30
+        self._cleanup_task: Optional[asyncio.Task] = None
 
     def get_or_create_session(
         self,
@@ -355,9 +364,10 @@ class DialogManager:
         language: str = "pt"
     ) -> ConversationContext:
         """Get existing session or create new one"""
-        if session_id and session_id in self.sessions:
-            session = self.sessions[session_id]
-            if not session.is_expired(self.session_timeout_minutes):
+        if session_id:
+            session = self.get_session(session_id)
+            if session is not None:
+                self.sessions.move_to_end(session_id)
                 return session
 
         # Create new session
@@ -368,6 +378,16 @@ class DialogManager:
             language=language
         )
         self.sessions[new_session_id] = session
+        if len(self.sessions) > MAX_SESSIONS:
+            self.sessions.popitem(last=False)
+        return session
+
+    def get_session(self, session_id: str) -> Optional[ConversationContext]:
+        """Get a live session, dropping it if it has expired"""
+        session = self.sessions.get(session_id)
+        if session is not None and session.is_expired(self.session_timeout_minutes):
+            del self.sessions[session_id]
+            return None
         return session
 
     def process_turn(
@@ -736,13 +756,40 @@ class DialogManager:
 
     def cleanup_expired_sessions(self):
         """Remove expired sessions"""
-        expired = [
-            sid for sid, session in self.sessions.items()
-            if session.is_expired(self.session_timeout_minutes)
-        ]
-
-        for sid in expired:
-            del self.sessions[sid]
+        # Sessions are in order of last use, so the expired ones are at the front
+        expired = 0
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if not session.is_expired(self.session_timeout_minutes):
+                break
+            self.sessions.popitem(last=False)
+            expired += 1
 
         if expired:
-            logger.info(f"Cleaned up {len(expired)} expired sessions")
+            logger.info(f"Cleaned up {expired} expired sessions")
+
+    def start_cleanup(self, interval: float = SESSION_CLEANUP_INTERVAL):
+        """Remove expired sessions every `interval` seconds in the background"""
+        if self._cleanup_task is None or self._cleanup_task.done():
+            self._cleanup_task = asyncio.create_task(self._run_cleanup(interval))
+
+    async def _run_cleanup(self, interval: float):
+        """Periodic cleanup loop, until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.cleanup_expired_sessions()
+            except Exception as e:
+                logger.error(f"Session cleanup failed: {e}")
+
+    async def close(self):
+        """Stop the background cleanup"""
+        if self._cleanup_task is None:
+            return
+
+        self._cleanup_task.cancel()
+        try:
+            await self._cleanup_task
+        except asyncio.CancelledError:
+            pass
+        self._cleanup_task = None
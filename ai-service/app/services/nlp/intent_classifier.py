@@ -4,15 +4,32 @@ Classifies user intents using transformer-based models and rule-based fallback.
 """
 
 import re
-from typing import Dict, Any, Optional, List, Tuple
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Sequence, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
 import logging
 import numpy as np
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Distinct messages whose classification is memoized; assistant traffic is
+# dominated by a small set of repeated phrases
+CLASSIFY_CACHE_SIZE = 1024
+
+# Coalescing of submit() calls into one sentence-transformer forward pass:
+# at most this many messages per pass, waiting up to this long for more
+CLASSIFY_MAX_BATCH = 32
+CLASSIFY_BATCH_WAIT_MS = 5.0
+
 
 class IntentCategory(Enum):
     """High-level intent categories"""
@@ -330,6 +347,58 @@ INTENT_CATEGORIES = {
 }
 
 
+def _leading_keywords(pattern: str) -> Optional[List[str]]:
+    """
+    Literal prefixes of the alternatives in a pattern's leading group.
+
+    Any match of the pattern contains one of them, so text containing none
+    cannot match. None when the pattern does not start with a group or an
+    alternative starts with a regex construct rather than a letter.
+    """
+    start = 0
+    if pattern.startswith("^"):
+        start = 1
+    elif pattern.startswith(r"\b"):
+        start = 2
+    if pattern[start:start + 1] != "(":
+        return None
+
+    # Split the group's body on top-level "|"
+    alternatives, depth, begin = [], 0, start + 1
+    i = start
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == "[":
+            return None
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                alternatives.append(pattern[begin:i])
+                break
+        elif char == "|" and depth == 1:
+            alternatives.append(pattern[begin:i])
+            begin = i + 1
+        i += 1
+    else:
+        return None
+
+    keywords = []
+    for alternative in alternatives:
+        literal = re.match(r"[a-z0-9 ]*", alternative).group()
+        # A quantifier applies to the last literal character
+        if alternative[len(literal):len(literal) + 1] in ("?", "*", "{"):
+            literal = literal[:-1]
+        if not literal:
+            return None
+        keywords.append(literal)
+    return keywords
+
+
 class IntentClassifier:
     """
     Intent classifier for BESS virtual assistant.
@@ -353,8 +422,20 @@ class IntentClassifier:
 
         # Compiled patterns
         self.compiled_patterns: Dict[Intent, List[re.Pattern]] = {}
+        # Every pattern in intent order, and the keywords that gate them
+        self._rule_patterns: List[Tuple[Intent, re.Pattern]] = []
+        self._ungated_patterns: List[int] = []
+        self._keyword_patterns: Dict[str, List[int]] = {}
+        self._keyword_matcher = None
         self._compile_patterns()
 
+        # Memoized results keyed by the stripped message, least recently used first
+        self._results: "OrderedDict[str, IntentResult]" = OrderedDict()
+
+        # Queue coalescing submit() calls into batched forward passes
+        self._pending: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+
     def _get_training_examples(self) -> Dict[Intent, List[str]]:
         """Get training examples for each intent"""
         return {
@@ -446,13 +527,42 @@ class IntentClassifier:
         }
 
     def _compile_patterns(self):
-        """Compile regex patterns"""
+        """Compile regex patterns and the keyword prefilter in front of them"""
         for intent, patterns in INTENT_PATTERNS.items():
             self.compiled_patterns[intent] = [
                 re.compile(pattern, re.IGNORECASE)
                 for pattern in patterns
             ]
 
+            for pattern, compiled in zip(patterns, self.compiled_patterns[intent]):
+                index = len(self._rule_patterns)
+                self._rule_patterns.append((intent, compiled))
+                keywords = _leading_keywords(pattern)
+                if keywords is None:
+                    self._ungated_patterns.append(index)
+                    continue
+                for keyword in keywords:
+                    self._keyword_patterns.setdefault(keyword, []).append(index)
+
+        if AHOCORASICK_AVAILABLE:
+            automaton = ahocorasick.Automaton()
+            for keyword in self._keyword_patterns:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            self._keyword_matcher = automaton
+
+    def _candidate_patterns(self, text_lower: str) -> List[int]:
+        """Indices of the rule patterns that can match, in intent order"""
+        if self._keyword_matcher is not None:
+            keywords = {keyword for _, keyword in self._keyword_matcher.iter(text_lower)}
+        else:
+            keywords = [keyword for keyword in self._keyword_patterns if keyword in text_lower]
+
+        candidates = set(self._ungated_patterns)
+        for keyword in keywords:
+            candidates.update(self._keyword_patterns[keyword])
+        return sorted(candidates)
+
     async def load_model(self):
         """Load the sentence transformer model"""
         try:
@@ -463,6 +573,7 @@ class IntentClassifier:
 
             # Pre-compute embeddings for training examples
             await self._compute_intent_embeddings()
+            self._results.clear()
 
             self.is_loaded = True
             logger.info("Intent classifier model loaded successfully")
@@ -489,14 +600,152 @@ class IntentClassifier:
         """
         Classify the intent of user input.
 
+        Results are memoized per message: a repeated message skips the
+        sentence-transformer forward pass. The returned IntentResult may be
+        shared between calls and must not be modified.
+
         Args:
             text: User input text
 
         Returns:
             IntentResult with classified intent and confidence
         """
-        text = text.strip()
+        key = text.strip()
+        result = self._cached(key)
+        if result is None:
+            result = self._classify(key)
+            self._remember(key, result)
+        return result
+
+    def classify_batch(self, texts: Sequence[str]) -> List[IntentResult]:
+        """
+        Classify several messages, encoding all uncached ones in a single
+        sentence-transformer call.
+
+        Args:
+            texts: User input texts
+
+        Returns:
+            One IntentResult per text, as classify() would return
+        """
+        keys = [text.strip() for text in texts]
+        missing = self._uncached(keys)
+        return self._classify_encoded(keys, missing, self._encode(missing))
+
+    async def submit(self, text: str) -> IntentResult:
+        """
+        Same as classify(), but coalesced with concurrent calls
 
+        Uncached messages that queue up while a batch is being encoded (plus
+        any arriving within CLASSIFY_BATCH_WAIT_MS) share one forward pass,
+        which runs in the default executor.
+        """
+        key = text.strip()
+        result = self._cached(key)
+        if result is not None:
+            return result
+        if self.model is None or not self.intent_embeddings:
+            # Rules only; there is no forward pass to share
+            return self.classify(key)
+
+        if self._batch_task is None or self._batch_task.done():
+            self._pending = asyncio.Queue()
+            self._batch_task = asyncio.create_task(self._run_batches())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._pending.put((key, future))
+        return await future
+
+    async def _run_batches(self):
+        """Drain queued messages into batched forward passes until cancelled"""
+        loop = asyncio.get_running_loop()
+        max_wait = CLASSIFY_BATCH_WAIT_MS / 1000
+
+        while True:
+            batch = [await self._pending.get()]
+            deadline = loop.time() + max_wait
+
+            while len(batch) < CLASSIFY_MAX_BATCH:
+                if not self._pending.empty():
+                    batch.append(self._pending.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._pending.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            keys, futures = zip(*batch)
+            try:
+                missing = self._uncached(keys)
+                embeddings = await loop.run_in_executor(None, self._encode, missing)
+                results = self._classify_encoded(keys, missing, embeddings)
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for future, result in zip(futures, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self):
+        """Stop coalescing submit() calls, failing any still queued"""
+        if self._batch_task is None:
+            return
+
+        self._batch_task.cancel()
+        try:
+            await self._batch_task
+        except asyncio.CancelledError:
+            pass
+        self._batch_task = None
+
+        while not self._pending.empty():
+            _, future = self._pending.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Intent classifier stopped"))
+
+    def _cached(self, key: str) -> Optional[IntentResult]:
+        """Memoized result for a stripped message, if any"""
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+        return result
+
+    def _remember(self, key: str, result: IntentResult):
+        """Memoize a result, evicting the least recently used one when full"""
+        self._results[key] = result
+        if len(self._results) > CLASSIFY_CACHE_SIZE:
+            self._results.popitem(last=False)
+
+    def _uncached(self, keys: Sequence[str]) -> List[str]:
+        """Distinct non-empty messages without a memoized result"""
+        return [key for key in dict.fromkeys(keys) if key and key not in self._results]
+
+    def _encode(self, texts: List[str]) -> Optional[np.ndarray]:
+        """Sentence embeddings for texts, or None when there is no model"""
+        if not texts or self.model is None or not self.intent_embeddings:
+            return None
+        return self.model.encode(texts)
+
+    def _classify_encoded(
+        self,
+        keys: Sequence[str],
+        missing: List[str],
+        embeddings: Optional[np.ndarray]
+    ) -> List[IntentResult]:
+        """Classify and memoize `missing` from their embeddings, then answer every key"""
+        for i, key in enumerate(missing):
+            embedding = embeddings[i] if embeddings is not None else None
+            self._remember(key, self._classify(key, embedding))
+        return [self.classify(key) for key in keys]
+
+    def _classify(self, text: str, embedding: Optional[np.ndarray] = None) -> IntentResult:
+        """Classify stripped text (uncached), optionally with its precomputed embedding"""
         if not text:
             return IntentResult(
                 intent=Intent.UNKNOWN,
@@ -511,7 +760,7 @@ class IntentClassifier:
         # If we have a model, also try semantic classification
         model_result = None
         if self.model is not None and self.intent_embeddings:
-            model_result = self._classify_semantic(text)
+            model_result = self._classify_semantic(text, embedding)
 
         # Combine results
         if rule_result.confidence >= 0.9:
@@ -545,24 +794,22 @@ class IntentClassifier:
         text_lower = text.lower()
         scores: Dict[Intent, float] = {}
 
-        for intent, patterns in self.compiled_patterns.items():
-            max_score = 0.0
-            for pattern in patterns:
-                match = pattern.search(text_lower)
-                if match:
-                    # Score based on match length relative to text
-                    match_len = len(match.group())
-                    text_len = len(text)
-                    score = min(1.0, (match_len / text_len) * 2)
-
-                    # Boost for full match patterns
-                    if match.start() == 0 and match.end() == len(text.strip()):
-                        score = 1.0
+        # Only patterns whose leading keywords occur in the text can match
+        for index in self._candidate_patterns(text_lower):
+            intent, pattern = self._rule_patterns[index]
+            match = pattern.search(text_lower)
+            if match:
+                # Score based on match length relative to text
+                match_len = len(match.group())
+                text_len = len(text)
+                score = min(1.0, (match_len / text_len) * 2)
 
-                    max_score = max(max_score, score)
+                # Boost for full match patterns
+                if match.start() == 0 and match.end() == len(text.strip()):
+                    score = 1.0
 
-            if max_score > 0:
-                scores[intent] = max_score
+                if score > scores.get(intent, 0.0):
+                    scores[intent] = score
 
         if not scores:
             return IntentResult(
@@ -591,7 +838,7 @@ class IntentClassifier:
             method="rules"
         )
 
-    def _classify_semantic(self, text: str) -> IntentResult:
+    def _classify_semantic(self, text: str, embedding: Optional[np.ndarray] = None) -> IntentResult:
         """Classify using semantic similarity"""
         if self.model is None or not self.intent_embeddings:
             return IntentResult(
@@ -601,8 +848,8 @@ class IntentClassifier:
                 method="model"
             )
 
-        # Encode input text
-        text_embedding = self.model.encode([text])[0]
+        # Encode input text, unless already encoded as part of a batch
+        text_embedding = embedding if embedding is not None else self.model.encode([text])[0]
 
         # Calculate similarities
         scores: Dict[Intent, float] = {}
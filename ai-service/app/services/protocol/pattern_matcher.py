@@ -11,6 +11,12 @@ from collections import defaultdict
 import logging
 import json
 
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
@@ -73,16 +79,24 @@ class BytePatternMatcher:
     def __init__(self):
         self.patterns: Dict[str, bytes] = {}
         self.compiled_patterns: Dict[str, re.Pattern] = {}
+        # Hyperscan database over every pattern, rebuilt when patterns change
+        self._database = None
+        self._database_names: List[str] = []
+
+    @staticmethod
+    def _expression(pattern: bytes) -> bytes:
+        """Regex for a byte pattern; 0xFF is a wildcard, other bytes are literal"""
+        return b''.join(
+            b'.' if b == 0xFF else b'\\x%02x' % b
+            for b in pattern
+        )
 
     def add_pattern(self, name: str, pattern: bytes):
         """Add a byte pattern"""
         self.patterns[name] = pattern
         # Convert to regex for flexible matching
-        regex = b''.join(
-            b'.' if b == 0xFF else re.escape(bytes([b]))
-            for b in pattern
-        )
-        self.compiled_patterns[name] = re.compile(regex)
+        self.compiled_patterns[name] = re.compile(self._expression(pattern), re.DOTALL)
+        self._database = None
 
     def add_pattern_hex(self, name: str, hex_pattern: str):
         """Add pattern from hex string (use ?? for wildcards)"""
@@ -91,10 +105,68 @@ class BytePatternMatcher:
         pattern = bytes.fromhex(hex_clean)
         self.add_pattern(name, pattern)
 
+    def compile(self):
+        """Compile all patterns into a single Hyperscan database"""
+        if not HYPERSCAN_AVAILABLE or not self.patterns:
+            return
+
+        names = list(self.patterns)
+        database = hyperscan.Database()
+        database.compile(
+            expressions=[self._expression(self.patterns[name]) for name in names],
+            ids=list(range(len(names))),
+            elements=len(names),
+            flags=hyperscan.HS_FLAG_DOTALL,
+        )
+        self._database = database
+        self._database_names = names
+
+    def _scan(self, data: bytes) -> Dict[str, List[int]]:
+        """Start offsets of every pattern match, from one Hyperscan pass"""
+        if self._database is None:
+            self.compile()
+
+        ends: List[List[int]] = [[] for _ in self._database_names]
+
+        def on_match(pattern_id, start, end, flags, context):
+            ends[pattern_id].append(end)
+
+        self._database.scan(data, match_event_handler=on_match)
+
+        # Hyperscan reports every (possibly overlapping) match end; patterns
+        # are fixed-width, so keep the leftmost non-overlapping ones as
+        # re.finditer() would
+        positions = {}
+        for name, pattern_ends in zip(self._database_names, ends):
+            width = len(self.patterns[name])
+            starts = []
+            next_free = 0
+            for end in pattern_ends:
+                start = end - width
+                if start >= next_free:
+                    starts.append(start)
+                    next_free = end
+            positions[name] = starts
+        return positions
+
     def match(self, data: bytes) -> List[MatchResult]:
         """Find all pattern matches in data"""
         results = []
 
+        if HYPERSCAN_AVAILABLE and self.patterns:
+            for name, starts in self._scan(data).items():
+                width = len(self.patterns[name])
+                for start in starts:
+                    results.append(MatchResult(
+                        pattern_id=name,
+                        pattern_name=name,
+                        matched=True,
+                        confidence=1.0,
+                        matched_data=data[start:start + width],
+                        position=start
+                    ))
+            return results
+
         for name, pattern in self.patterns.items():
             regex = self.compiled_patterns[name]
             for match in regex.finditer(data):
@@ -490,6 +562,8 @@ class PatternMatcher:
             "endian": "big"
         })
 
+        self.byte_matcher.compile()
+
     def add_pattern(self, pattern: Pattern):
         """Add a custom pattern"""
         self.patterns[pattern.id] = pattern
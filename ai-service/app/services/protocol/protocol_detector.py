@@ -6,15 +6,24 @@ ML-based automatic protocol detection from communication traffic
 import numpy as np
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
+from collections import OrderedDict
 from enum import Enum
 from datetime import datetime
+import hashlib
 import logging
 import pickle
 import json
+import threading
+import time
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Payload detections kept for reuse, e.g. by identify_device() right after
+# a detect() on the same capture
+PAYLOAD_CACHE_SIZE = 1024
+PAYLOAD_CACHE_TTL = 60.0  # seconds
+
 
 # ============================================
 # TYPES
@@ -66,6 +75,20 @@ class DetectionResult:
     model: Optional[str]
     features: Dict[str, Any]
     recommendations: List[str]
+    firmware_version: Optional[str] = None
+    top_predictions: List[Tuple[ProtocolType, float]] = field(default_factory=list)
+
+
+@dataclass
+class DeviceIdentification:
+    """Device identified from a payload"""
+    protocol: ProtocolType
+    device_type: DeviceType
+    manufacturer: Optional[str]
+    model: Optional[str]
+    firmware_version: Optional[str]
+    confidence: float
+    signatures_matched: List[str]
 
 
 @dataclass
@@ -489,6 +512,10 @@ class ProtocolDetector:
         self.classifier = ProtocolClassifier()
         self.identifier = DeviceIdentifier()
         self.detection_history: List[DetectionResult] = []
+        # Payload digest -> (expiry time, result), oldest first
+        self._payload_cache: "OrderedDict[bytes, Tuple[float, DetectionResult]]" = OrderedDict()
+        # The routers call detect_payload() from worker threads
+        self._payload_lock = threading.Lock()
 
         if model_path and Path(model_path).exists():
             self.classifier.load(model_path)
@@ -572,6 +599,76 @@ class ProtocolDetector:
         ]
         return self.detect(samples)
 
+    def detect_payload(
+        self,
+        data: bytes,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> DetectionResult:
+        """
+        Detect protocol and device from one captured payload
+
+        Results are cached for PAYLOAD_CACHE_TTL seconds by a digest of the
+        payload and metadata, so the same capture sent to several endpoints
+        is only analyzed once.
+        """
+        metadata = metadata or {}
+        key = hashlib.blake2b(
+            data + repr(sorted(metadata.items())).encode(), digest_size=16
+        ).digest()
+
+        now = time.monotonic()
+        with self._payload_lock:
+            cached = self._payload_cache.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        sample = TrafficSample(
+            timestamp=datetime.now(),
+            raw_data=data,
+            direction=metadata.get("direction", "rx"),
+            source=metadata.get("source", "unknown"),
+            destination=metadata.get("destination", "unknown"),
+            metadata=metadata
+        )
+        result = self.detect([sample], min_samples=1)
+
+        with self._payload_lock:
+            self._payload_cache.pop(key, None)
+            self._payload_cache[key] = (now + PAYLOAD_CACHE_TTL, result)
+            # Entries share one TTL, so the oldest are the first to expire
+            while self._payload_cache and (
+                len(self._payload_cache) > PAYLOAD_CACHE_SIZE
+                or next(iter(self._payload_cache.values()))[0] <= now
+            ):
+                self._payload_cache.popitem(last=False)
+
+        return result
+
+    def identify_device(
+        self,
+        data: bytes,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> DeviceIdentification:
+        """Identify the device behind a payload, reusing its cached detection"""
+        detection = self.detect_payload(data, metadata)
+
+        signatures_matched = [
+            f"{signature.manufacturer} {signature.model}"
+            for signature in self.identifier.signatures
+            if signature.protocol == detection.protocol
+            and any(pattern in data for pattern in signature.patterns)
+        ]
+
+        return DeviceIdentification(
+            protocol=detection.protocol,
+            device_type=detection.device_type,
+            manufacturer=detection.manufacturer,
+            model=detection.model,
+            firmware_version=detection.firmware_version,
+            confidence=detection.features.get("device_confidence", 0.0),
+            signatures_matched=signatures_matched
+        )
+
     def _generate_recommendations(
         self,
         protocol: ProtocolType,
@@ -0,0 +1,159 @@
+"""
+Register Analysis Kernels
+Per-register statistics for the register analyzer, JIT-compiled with Numba when available
+"""
+
+import logging
+from typing import Tuple
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Below this many registers the parallel kernel's thread startup costs more
+# than it saves
+PARALLEL_MIN_REGISTERS = 64
+
+# Distinct values are only counted up to this many (plus one); the analyzer
+# only asks whether a register has at most 10 distinct values
+DISTINCT_LIMIT = 10
+
+Stats = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def _register_stats_numpy(values: np.ndarray, lengths: np.ndarray) -> Stats:
+    """Row statistics over the padded matrix using masked reductions."""
+    n = len(lengths)
+    if values.shape[1] == 0:
+        zeros = np.zeros(n)
+        return zeros, zeros, zeros, zeros, zeros
+
+    valid = np.arange(values.shape[1]) < lengths[:, None]
+    count = np.maximum(lengths, 1)
+    mean = values.sum(axis=1, where=valid) / count
+    variance = np.square(values - mean[:, None]).sum(axis=1, where=valid) / count
+
+    ordered = np.sort(values, axis=1)
+    unique = 1 + np.count_nonzero(np.diff(ordered, axis=1), axis=1)
+    unique = np.minimum(unique, DISTINCT_LIMIT + 1)
+
+    min_v, max_v = values.min(axis=1), values.max(axis=1)
+    empty = lengths == 0
+    for stat in (min_v, max_v, mean, variance, unique):
+        stat[empty] = 0
+
+    return min_v, max_v, mean, variance, unique
+
+
+def _row_stats(row):
+    """min, max, mean, population variance and unique count of one register."""
+    n = row.shape[0]
+    lo = row[0]
+    hi = row[0]
+    total = 0
+    for j in range(n):
+        v = row[j]
+        total += v
+        if v < lo:
+            lo = v
+        elif v > hi:
+            hi = v
+    mean = total / n
+
+    sq = 0.0
+    for j in range(n):
+        d = row[j] - mean
+        sq += d * d
+
+    # Distinct values, stopping once there are more than DISTINCT_LIMIT
+    seen = np.empty(DISTINCT_LIMIT + 1, dtype=row.dtype)
+    unique = 0
+    for j in range(n):
+        v = row[j]
+        found = False
+        for k in range(unique):
+            if seen[k] == v:
+                found = True
+                break
+        if not found:
+            seen[unique] = v
+            unique += 1
+            if unique > DISTINCT_LIMIT:
+                break
+
+    return lo, hi, mean, sq / n, unique
+
+
+if NUMBA_AVAILABLE:
+    _row_stats_jit = njit(cache=True)(_row_stats)
+
+    @njit(cache=True)
+    def _register_stats_serial(values, lengths, min_v, max_v, mean, variance, unique):
+        """Fill the output arrays one register at a time."""
+        for i in range(lengths.shape[0]):
+            if lengths[i] == 0:
+                continue
+            min_v[i], max_v[i], mean[i], variance[i], unique[i] = \
+                _row_stats_jit(values[i, :lengths[i]])
+
+    @njit(cache=True, parallel=True)
+    def _register_stats_parallel(values, lengths, min_v, max_v, mean, variance, unique):
+        """Fill the output arrays, registers spread across threads."""
+        for i in prange(lengths.shape[0]):
+            if lengths[i] == 0:
+                continue
+            min_v[i], max_v[i], mean[i], variance[i], unique[i] = \
+                _row_stats_jit(values[i, :lengths[i]])
+
+
+def register_stats(values: np.ndarray, lengths: np.ndarray) -> Stats:
+    """
+    Compute per-register statistics.
+
+    Args:
+        values: (N, T) int64 sample matrix, row i valid up to lengths[i]
+        lengths: (N,) number of samples per register; registers with no
+            samples get 0 for every statistic
+
+    Returns:
+        (min, max, mean, variance, unique) arrays, one entry per register;
+        variance is the population variance and unique the number of
+        distinct values, saturating at DISTINCT_LIMIT + 1
+    """
+    values = np.ascontiguousarray(values, dtype=np.int64)
+    lengths = np.ascontiguousarray(lengths, dtype=np.int64)
+
+    if not NUMBA_AVAILABLE:
+        return _register_stats_numpy(values, lengths)
+
+    n = len(lengths)
+    min_v = np.zeros(n, dtype=np.int64)
+    max_v = np.zeros(n, dtype=np.int64)
+    mean = np.zeros(n)
+    variance = np.zeros(n)
+    unique = np.zeros(n, dtype=np.int64)
+
+    kernel = _register_stats_parallel if n >= PARALLEL_MIN_REGISTERS else _register_stats_serial
+    kernel(values, lengths, min_v, max_v, mean, variance, unique)
+    return min_v, max_v, mean, variance, unique
+
+
+def warmup():
+    """Compile (or load from cache) the JIT kernels on a dummy input."""
+    values = np.array([[1, 2, 3]], dtype=np.int64)
+    lengths = np.array([3], dtype=np.int64)
+    register_stats(values, lengths)
+    if NUMBA_AVAILABLE:
+        register_stats(
+            np.repeat(values, PARALLEL_MIN_REGISTERS, axis=0),
+            np.repeat(lengths, PARALLEL_MIN_REGISTERS),
+        )
+        logger.info("Register analysis kernels compiled with Numba")
+    else:
+        logger.info("Numba not available, register analysis kernels use NumPy")
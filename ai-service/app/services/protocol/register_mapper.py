@@ -3,7 +3,7 @@ Register Mapper Service
 Automatic register mapping and configuration generation
 """
 
-from typing import Dict, List, Optional, Tuple, Any, Set
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Any, Set, Union
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
@@ -11,6 +11,10 @@ import logging
 import json
 from pathlib import Path
 
+import numpy as np
+
+from . import register_kernels
+
 logger = logging.getLogger(__name__)
 
 
@@ -86,6 +90,40 @@ class MappingResult:
     sample_values: List[int]
 
 
+@dataclass
+class RegisterSamples:
+    """
+    Sampled register values as arrays (one row per register)
+
+    Rows shorter than the longest series are padded with their own first
+    value, so min/max/unique counts need no mask; sums use `lengths`.
+    """
+    addresses: np.ndarray  # (N,) int64
+    values: np.ndarray  # (N, T) int64
+    lengths: np.ndarray  # (N,) int64
+
+    @classmethod
+    def from_pairs(cls, samples: Iterable[Tuple[int, Sequence[int]]]) -> "RegisterSamples":
+        """Build from (address, values) pairs"""
+        samples = list(samples)
+        n = len(samples)
+        lengths = np.fromiter((len(v) for _, v in samples), dtype=np.int64, count=n)
+        width = int(lengths.max()) if n else 0
+
+        addresses = np.empty(n, dtype=np.int64)
+        values = np.zeros((n, width), dtype=np.int64)
+        for i, (address, row) in enumerate(samples):
+            addresses[i] = address
+            if len(row):
+                values[i, :len(row)] = row
+                values[i, len(row):] = row[0]
+
+        return cls(addresses=addresses, values=values, lengths=lengths)
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+
 # ============================================
 # REGISTER ANALYZER
 # ============================================
@@ -163,116 +201,121 @@ class RegisterAnalyzer:
         context: Optional[Dict[str, Any]] = None
     ) -> MappingResult:
         """Analyze register values and suggest mapping"""
-        if not values:
-            return MappingResult(
-                address=address,
-                suggested_name=f"reg_{address}",
-                suggested_type=DataType.UINT16,
-                suggested_category=RegisterCategory.STATUS,
-                confidence=0.0,
-                reasoning="No values to analyze",
-                sample_values=[]
-            )
+        return self.analyze_batch(RegisterSamples.from_pairs([(address, values)]))[0]
+
+    def analyze_batch(self, samples: RegisterSamples) -> List[MappingResult]:
+        """
+        Analyze many registers at once
+
+        Statistics and pattern scores are computed for all registers with
+        array operations; only building the results walks the rows.
+        """
+        stats = dict(zip(
+            ("min", "max", "mean", "variance", "unique"),
+            register_kernels.register_stats(samples.values, samples.lengths),
+        ))
+        pattern_names = list(self.KNOWN_PATTERNS)
+        scores = np.stack([
+            self._match_pattern(stats, pattern) for pattern in self.KNOWN_PATTERNS.values()
+        ], axis=1) if len(samples) else np.zeros((0, len(pattern_names)))
+        best = scores.argmax(axis=1) if pattern_names else np.zeros(len(samples), dtype=np.int64)
 
-        # Calculate statistics
-        min_val = min(values)
-        max_val = max(values)
-        avg_val = sum(values) / len(values)
-        unique_count = len(set(values))
-        variance = sum((v - avg_val) ** 2 for v in values) / len(values)
-
-        # Determine if signed (check for high values that might be negative)
-        is_signed = any(v > 32767 for v in values)
-
-        # Check for boolean
-        if set(values) <= {0, 1}:
-            return MappingResult(
-                address=address,
-                suggested_name=f"flag_{address}",
-                suggested_type=DataType.UINT16,
-                suggested_category=RegisterCategory.STATUS,
-                confidence=0.9,
-                reasoning="Binary values detected (0/1)",
-                sample_values=values[:10]
-            )
-
-        # Check for enum (small number of unique values)
-        if unique_count <= 10 and max_val < 100:
-            return MappingResult(
-                address=address,
-                suggested_name=f"state_{address}",
-                suggested_type=DataType.ENUM,
-                suggested_category=RegisterCategory.STATUS,
-                confidence=0.8,
-                reasoning=f"Low cardinality ({unique_count} unique values)",
-                sample_values=values[:10]
-            )
-
-        # Match against known patterns
-        best_match = None
-        best_confidence = 0.0
-
-        for pattern_name, pattern in self.KNOWN_PATTERNS.items():
-            confidence = self._match_pattern(values, pattern)
-            if confidence > best_confidence:
-                best_confidence = confidence
-                best_match = (pattern_name, pattern)
-
-        if best_match and best_confidence > 0.6:
-            pattern_name, pattern = best_match
-            return MappingResult(
-                address=address,
-                suggested_name=f"{pattern['names'][0]}_{address}",
-                suggested_type=DataType.INT16 if is_signed else DataType.UINT16,
-                suggested_category=self._get_category(pattern_name),
-                confidence=best_confidence,
-                reasoning=f"Matches {pattern_name} pattern (range: {min_val}-{max_val})",
-                sample_values=values[:10]
-            )
-
-        # Fallback to generic analysis
-        if variance < 1:
-            category = RegisterCategory.CONFIGURATION  # Constant value
-        elif variance > 10000:
-            category = RegisterCategory.MEASUREMENT  # Varying measurement
-        else:
-            category = RegisterCategory.STATUS
-
-        return MappingResult(
-            address=address,
-            suggested_name=f"reg_{address}",
-            suggested_type=DataType.INT16 if is_signed else DataType.UINT16,
-            suggested_category=category,
-            confidence=0.4,
-            reasoning=f"Generic analysis (range: {min_val}-{max_val}, variance: {variance:.1f})",
-            sample_values=values[:10]
-        )
+        results = []
+        for i, address in enumerate(samples.addresses.tolist()):
+            length = int(samples.lengths[i])
+            sample_values = samples.values[i, :min(length, 10)].tolist()
+            min_val = int(stats["min"][i])
+            max_val = int(stats["max"][i])
+            variance = float(stats["variance"][i])
+            is_signed = max_val > 32767
+
+            if length == 0:
+                results.append(MappingResult(
+                    address=address,
+                    suggested_name=f"reg_{address}",
+                    suggested_type=DataType.UINT16,
+                    suggested_category=RegisterCategory.STATUS,
+                    confidence=0.0,
+                    reasoning="No values to analyze",
+                    sample_values=[]
+                ))
+
+            # Check for boolean
+            elif min_val >= 0 and max_val <= 1:
+                results.append(MappingResult(
+                    address=address,
+                    suggested_name=f"flag_{address}",
+                    suggested_type=DataType.UINT16,
+                    suggested_category=RegisterCategory.STATUS,
+                    confidence=0.9,
+                    reasoning="Binary values detected (0/1)",
+                    sample_values=sample_values
+                ))
+
+            # Check for enum (small number of unique values)
+            elif stats["unique"][i] <= 10 and max_val < 100:
+                results.append(MappingResult(
+                    address=address,
+                    suggested_name=f"state_{address}",
+                    suggested_type=DataType.ENUM,
+                    suggested_category=RegisterCategory.STATUS,
+                    confidence=0.8,
+                    reasoning=f"Low cardinality ({int(stats['unique'][i])} unique values)",
+                    sample_values=sample_values
+                ))
+
+            # Match against known patterns
+            elif scores[i, best[i]] > 0.6:
+                pattern_name = pattern_names[best[i]]
+                pattern = self.KNOWN_PATTERNS[pattern_name]
+                results.append(MappingResult(
+                    address=address,
+                    suggested_name=f"{pattern['names'][0]}_{address}",
+                    suggested_type=DataType.INT16 if is_signed else DataType.UINT16,
+                    suggested_category=self._get_category(pattern_name),
+                    confidence=float(scores[i, best[i]]),
+                    reasoning=f"Matches {pattern_name} pattern (range: {min_val}-{max_val})",
+                    sample_values=sample_values
+                ))
+
+            # Fallback to generic analysis
+            else:
+                if variance < 1:
+                    category = RegisterCategory.CONFIGURATION  # Constant value
+                elif variance > 10000:
+                    category = RegisterCategory.MEASUREMENT  # Varying measurement
+                else:
+                    category = RegisterCategory.STATUS
+
+                results.append(MappingResult(
+                    address=address,
+                    suggested_name=f"reg_{address}",
+                    suggested_type=DataType.INT16 if is_signed else DataType.UINT16,
+                    suggested_category=category,
+                    confidence=0.4,
+                    reasoning=f"Generic analysis (range: {min_val}-{max_val}, variance: {variance:.1f})",
+                    sample_values=sample_values
+                ))
 
-    def _match_pattern(self, values: List[int], pattern: Dict) -> float:
-        """Calculate confidence that values match a pattern"""
-        min_val = min(values)
-        max_val = max(values)
-        avg_val = sum(values) / len(values)
+        return results
 
+    def _match_pattern(self, stats: Dict[str, np.ndarray], pattern: Dict) -> np.ndarray:
+        """Confidence, per register, that its values match a pattern"""
         # Check if values are within expected range
         range_min, range_max = pattern["range"]
-        if min_val < range_min or max_val > range_max:
-            return 0.0
+        in_range = (stats["min"] >= range_min) & (stats["max"] <= range_max)
 
         # Check if values are in typical range
         typical_min, typical_max = pattern["typical"]
-        in_typical = typical_min <= avg_val <= typical_max
+        in_typical = (stats["mean"] >= typical_min) & (stats["mean"] <= typical_max)
 
-        confidence = 0.5  # Base confidence for being in range
-        if in_typical:
-            confidence += 0.3
+        confidence = np.full(len(in_range), 0.5)  # Base confidence for being in range
+        confidence[in_typical] += 0.3
 
         # Additional confidence if variance is reasonable
-        variance = sum((v - avg_val) ** 2 for v in values) / len(values)
-        if variance < (range_max - range_min) ** 2 / 4:
-            confidence += 0.2
+        confidence[stats["variance"] < (range_max - range_min) ** 2 / 4] += 0.2
 
-        return min(confidence, 1.0)
+        return np.where(in_range, np.minimum(confidence, 1.0), 0.0)
 
     def _get_category(self, pattern_name: str) -> RegisterCategory:
         """Get category from pattern name"""
@@ -296,6 +339,7 @@ class RegisterMapper:
         self.library_path = Path(library_path) if library_path else Path("./data/register_maps")
 
         self._load_built_in_maps()
+        self.built_in_map_ids = tuple(self.register_maps)
 
     def _load_built_in_maps(self):
         """Load built-in register maps"""
@@ -401,32 +445,58 @@ class RegisterMapper:
 
     def auto_map(
         self,
-        register_data: Dict[int, List[int]],
+        register_data: Union[Dict[int, List[int]], RegisterSamples],
         device_hint: Optional[str] = None
     ) -> List[MappingResult]:
         """Automatically map registers from collected data"""
-        results = []
+        if not isinstance(register_data, RegisterSamples):
+            register_data = RegisterSamples.from_pairs(sorted(register_data.items()))
 
-        for address, values in sorted(register_data.items()):
-            result = self.analyzer.analyze(address, values)
-            results.append(result)
+        results = self.analyzer.analyze_batch(register_data)
 
         # Post-process to find related registers
         self._find_related_registers(results)
 
         return results
 
+    def analyze_registers(self, samples: RegisterSamples) -> Dict[str, Any]:
+        """
+        Suggest register definitions for sampled registers
+
+        Returns:
+            Dict with manufacturer and model (None when unknown) and one
+            register dict per sample, in sample order
+        """
+        results = self.auto_map(samples)
+
+        return {
+            "manufacturer": None,
+            "model": None,
+            "registers": [
+                {
+                    "address": r.address,
+                    "name": r.suggested_name,
+                    "data_type": r.suggested_type.value,
+                    "category": r.suggested_category.value,
+                    "description": r.reasoning,
+                    "confidence": r.confidence,
+                }
+                for r in results
+            ],
+        }
+
     def _find_related_registers(self, results: List[MappingResult]):
         """Find registers that might be related (e.g., high/low word pairs)"""
-        for i, r1 in enumerate(results):
-            for j, r2 in enumerate(results):
-                if i >= j:
-                    continue
+        by_address = {}
+        for r in results:
+            by_address.setdefault(r.address, r)
 
-                # Check for consecutive addresses (might be 32-bit value)
-                if r2.address == r1.address + 1:
-                    # Check if values suggest a 32-bit combination
-                    pass
+        for r1 in results:
+            # Check for consecutive addresses (might be 32-bit value)
+            r2 = by_address.get(r1.address + 1)
+            if r2 is not None:
+                # Check if values suggest a 32-bit combination
+                pass
 
     def generate_config(
         self,
@@ -465,6 +535,25 @@ class RegisterMapper:
         """List available register maps"""
         return list(self.register_maps.keys())
 
+    def list_built_in_maps(self) -> List[Dict[str, Any]]:
+        """Summaries of the register maps shipped with the service"""
+        return [
+            {
+                "device_id": reg_map.device_id,
+                "manufacturer": reg_map.manufacturer,
+                "model": reg_map.model,
+                "protocol": reg_map.protocol,
+                "register_count": len(reg_map.registers),
+            }
+            for reg_map in map(self.register_maps.__getitem__, self.built_in_map_ids)
+        ]
+
+    def get_built_in_map(self, device_id: str) -> Optional[Dict[str, Any]]:
+        """Built-in register map as a dict, None if there is no such map"""
+        if device_id not in self.built_in_map_ids:
+            return None
+        return self.register_map_to_dict(self.register_maps[device_id])
+
     def add_register_map(self, register_map: RegisterMap):
         """Add a new register map"""
         self.register_maps[register_map.device_id] = register_map
@@ -480,7 +569,14 @@ class RegisterMapper:
             self.library_path.mkdir(parents=True, exist_ok=True)
             path = self.library_path / f"{device_id}.json"
 
-        data = {
+        with open(path, 'w') as f:
+            json.dump(self.register_map_to_dict(reg_map), f, indent=2)
+
+        logger.info(f"Saved register map: {path}")
+
+    def register_map_to_dict(self, reg_map: RegisterMap) -> Dict[str, Any]:
+        """Register map in the library file format read by load_register_map()"""
+        return {
             "device_id": reg_map.device_id,
             "manufacturer": reg_map.manufacturer,
             "model": reg_map.model,
@@ -508,11 +604,6 @@ class RegisterMapper:
             ]
         }
 
-        with open(path, 'w') as f:
-            json.dump(data, f, indent=2)
-
-        logger.info(f"Saved register map: {path}")
-
     def load_register_map(self, path: str) -> RegisterMap:
         """Load register map from file"""
         with open(path, 'r') as f:
@@ -561,6 +652,14 @@ class RegisterMapper:
         if not reg_map:
             raise ValueError(f"Unknown device: {device_id}")
 
+        return self.export_register_map(reg_map, output_format)
+
+    def export_register_map(
+        self,
+        reg_map: RegisterMap,
+        output_format: str = "typescript"
+    ) -> str:
+        """Export a register map (registered or not) to driver configuration format"""
         if output_format == "typescript":
             return self._export_typescript(reg_map)
         elif output_format == "json":
@@ -8,7 +8,7 @@ Implements self-evolving AI for BESS optimization using:
 """
 
 from .genetic_optimizer import GeneticOptimizer, OptimizationConfig
-from .rl_agent import RLAgent, BESSEnvironment
+from .rl_agent import RLAgent, RLConfig, BESSEnvironment
 from .reward_calculator import RewardCalculator, RewardWeights
 from .experience_buffer import ExperienceBuffer, Experience
 
@@ -16,6 +16,7 @@ __all__ = [
     'GeneticOptimizer',
     'OptimizationConfig',
     'RLAgent',
+    'RLConfig',
     'BESSEnvironment',
     'RewardCalculator',
     'RewardWeights',
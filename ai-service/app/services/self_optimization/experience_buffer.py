@@ -126,6 +126,11 @@ class ExperienceBuffer(BaseBuffer):
     """
     Experience Replay Buffer for RL training.
     Supports uniform and prioritized sampling.
+
+    Transitions are stored column-wise in preallocated ring buffers (one
+    array per field), so adding is a row write and sampling a fancy index
+    per field. Observations are kept in float16 by default; sample()
+    returns them as float32.
     """
 
     def __init__(
@@ -135,7 +140,8 @@ class ExperienceBuffer(BaseBuffer):
         alpha: float = 0.6,
         beta: float = 0.4,
         beta_increment: float = 0.001,
-        epsilon: float = 1e-6
+        epsilon: float = 1e-6,
+        state_dtype: Any = np.float16
     ):
         """
         Initialize experience buffer.
@@ -147,6 +153,7 @@ class ExperienceBuffer(BaseBuffer):
             beta: Importance sampling exponent
             beta_increment: Beta annealing per sample
             epsilon: Small constant for numerical stability
+            state_dtype: Storage dtype for states and next states
         """
         self.capacity = capacity
         self.prioritized = prioritized
@@ -155,11 +162,9 @@ class ExperienceBuffer(BaseBuffer):
         self.beta_increment = beta_increment
         self.epsilon = epsilon
 
-        if prioritized:
-            self.tree = SumTree(capacity)
-            self.max_priority = 1.0
-        else:
-            self.buffer = deque(maxlen=capacity)
+        self.state_dtype = np.dtype(state_dtype)
+
+        self._reset_storage()
 
         self.lock = threading.Lock()
         self._stats = {
@@ -168,15 +173,65 @@ class ExperienceBuffer(BaseBuffer):
             'priority_updates': 0
         }
 
+    def _reset_storage(self):
+        """Drop all transitions; arrays are allocated again on the next add"""
+        if self.prioritized:
+            # Leaves hold priorities; the data slot is the ring position
+            self.tree = SumTree(self.capacity)
+            self.max_priority = 1.0
+
+        self._states: Optional[np.ndarray] = None
+        self._actions: Optional[np.ndarray] = None
+        self._rewards: Optional[np.ndarray] = None
+        self._next_states: Optional[np.ndarray] = None
+        self._dones: Optional[np.ndarray] = None
+        self._infos: List[Optional[Dict[str, Any]]] = [None] * self.capacity
+        self._cursor = 0
+        self._size = 0
+
+    def _allocate(self, state: np.ndarray, action: np.ndarray):
+        """Size the ring buffers from the first transition's shapes"""
+        state_shape = np.shape(state)
+        action_shape = np.shape(action)
+        self._states = np.zeros((self.capacity, *state_shape), dtype=self.state_dtype)
+        self._actions = np.zeros((self.capacity, *action_shape), dtype=np.float32)
+        self._rewards = np.zeros(self.capacity, dtype=np.float32)
+        self._next_states = np.zeros((self.capacity, *state_shape), dtype=self.state_dtype)
+        self._dones = np.zeros(self.capacity, dtype=bool)
+
     def add(self, experience: Experience):
         """Add experience to buffer"""
+        self.add_transition(*experience)
+
+    def add_transition(
+        self,
+        state: np.ndarray,
+        action: np.ndarray,
+        reward: float,
+        next_state: np.ndarray,
+        done: bool,
+        info: Optional[Dict[str, Any]] = None
+    ):
+        """Add one transition, written straight into the ring buffers"""
         with self.lock:
+            if self._states is None:
+                self._allocate(state, action)
+
+            slot = self._cursor
+            self._states[slot] = state
+            self._actions[slot] = action
+            self._rewards[slot] = reward
+            self._next_states[slot] = next_state
+            self._dones[slot] = done
+            self._infos[slot] = info
+
             if self.prioritized:
-                # New experiences get max priority
-                self.tree.add(self.max_priority ** self.alpha, experience)
-            else:
-                self.buffer.append(experience)
+                # New experiences get max priority; the tree's write
+                # position advances in step with the cursor
+                self.tree.add(self.max_priority ** self.alpha, slot)
 
+            self._cursor = (slot + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
             self._stats['total_added'] += 1
 
     def add_batch(self, experiences: List[Experience]):
@@ -187,25 +242,27 @@ class ExperienceBuffer(BaseBuffer):
     def sample(self, batch_size: int) -> ExperienceBatch:
         """Sample batch of experiences"""
         with self.lock:
+            if self._size == 0:
+                return self._fallback_sample(batch_size)
             if self.prioritized:
                 return self._prioritized_sample(batch_size)
             else:
                 return self._uniform_sample(batch_size)
 
     def _uniform_sample(self, batch_size: int) -> ExperienceBatch:
-        """Uniform random sampling"""
-        batch_size = min(batch_size, len(self.buffer))
-        experiences = random.sample(list(self.buffer), batch_size)
+        """Uniform random sampling (with replacement)"""
+        batch_size = min(batch_size, self._size)
+        slots = np.random.randint(0, self._size, batch_size)
 
         self._stats['total_sampled'] += batch_size
 
-        return self._experiences_to_batch(experiences)
+        return self._slots_to_batch(slots)
 
     def _prioritized_sample(self, batch_size: int) -> ExperienceBatch:
         """Prioritized sampling with importance weights"""
         batch_size = min(batch_size, self.tree.n_entries)
 
-        experiences = []
+        slots = []
         indices = []
         priorities = []
 
@@ -221,14 +278,14 @@ class ExperienceBuffer(BaseBuffer):
             b = segment * (i + 1)
             s = random.uniform(a, b)
 
-            idx, priority, data = self.tree.get(s)
+            idx, priority, slot = self.tree.get(s)
 
-            if data is not None and isinstance(data, Experience):
-                experiences.append(data)
+            if priority > 0:
+                slots.append(slot)
                 indices.append(idx)
                 priorities.append(priority)
 
-        if not experiences:
+        if not slots:
             # Fallback to random sampling
             return self._fallback_sample(batch_size)
 
@@ -238,50 +295,57 @@ class ExperienceBuffer(BaseBuffer):
         weights = (self.tree.n_entries * probabilities) ** (-self.beta)
         weights = weights / weights.max()  # Normalize
 
-        self._stats['total_sampled'] += len(experiences)
+        self._stats['total_sampled'] += len(slots)
 
-        batch = self._experiences_to_batch(experiences)
+        batch = self._slots_to_batch(np.array(slots, dtype=np.intp))
         batch.indices = np.array(indices)
         batch.weights = weights
 
         return batch
 
     def _fallback_sample(self, batch_size: int) -> ExperienceBatch:
-        """Fallback sampling when tree is corrupted"""
-        experiences = []
-        for i in range(min(batch_size, self.tree.n_entries)):
-            data = self.tree.data[i]
-            if isinstance(data, Experience):
-                experiences.append(data)
-
-        if not experiences:
-            # Create dummy experience
-            experiences = [Experience(
-                state=np.zeros(10),
-                action=np.zeros(1),
-                reward=0.0,
-                next_state=np.zeros(10),
-                done=False
-            )]
-
-        return self._experiences_to_batch(experiences)
-
-    def _experiences_to_batch(self, experiences: List[Experience]) -> ExperienceBatch:
-        """Convert list of experiences to batch"""
-        states = np.array([e.state for e in experiences])
-        actions = np.array([e.action for e in experiences])
-        rewards = np.array([e.reward for e in experiences])
-        next_states = np.array([e.next_state for e in experiences])
-        dones = np.array([e.done for e in experiences])
+        """Fallback sampling when no prioritized sample could be drawn"""
+        if self._size:
+            return self._slots_to_batch(np.arange(min(batch_size, self._size)))
 
+        # Dummy experience
         return ExperienceBatch(
-            states=states,
-            actions=actions,
-            rewards=rewards,
-            next_states=next_states,
-            dones=dones
+            states=np.zeros((1, 10), dtype=np.float32),
+            actions=np.zeros((1, 1), dtype=np.float32),
+            rewards=np.zeros(1, dtype=np.float32),
+            next_states=np.zeros((1, 10), dtype=np.float32),
+            dones=np.zeros(1, dtype=bool)
         )
 
+    def _slots_to_batch(self, slots: np.ndarray) -> ExperienceBatch:
+        """Gather the transitions at the given ring positions"""
+        return ExperienceBatch(
+            states=self._states[slots].astype(np.float32),
+            actions=self._actions[slots],
+            rewards=self._rewards[slots],
+            next_states=self._next_states[slots].astype(np.float32),
+            dones=self._dones[slots]
+        )
+
+    def _experiences(self) -> List[Experience]:
+        """Stored transitions as Experience tuples, oldest first"""
+        if self._size < self.capacity:
+            slots = range(self._size)
+        else:
+            slots = [*range(self._cursor, self.capacity), *range(self._cursor)]
+
+        return [
+            Experience(
+                state=self._states[slot].astype(np.float32),
+                action=self._actions[slot],
+                reward=float(self._rewards[slot]),
+                next_state=self._next_states[slot].astype(np.float32),
+                done=bool(self._dones[slot]),
+                info=self._infos[slot]
+            )
+            for slot in slots
+        ]
+
     def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray):
         """Update priorities based on TD errors"""
         if not self.prioritized:
@@ -297,9 +361,7 @@ class ExperienceBuffer(BaseBuffer):
 
     def __len__(self) -> int:
         """Get current buffer size"""
-        if self.prioritized:
-            return self.tree.n_entries
-        return len(self.buffer)
+        return self._size
 
     def is_ready(self, batch_size: int) -> bool:
         """Check if buffer has enough samples"""
@@ -308,11 +370,7 @@ class ExperienceBuffer(BaseBuffer):
     def clear(self):
         """Clear the buffer"""
         with self.lock:
-            if self.prioritized:
-                self.tree = SumTree(self.capacity)
-                self.max_priority = 1.0
-            else:
-                self.buffer.clear()
+            self._reset_storage()
 
             self._stats = {
                 'total_added': 0,
@@ -327,6 +385,7 @@ class ExperienceBuffer(BaseBuffer):
             'size': len(self),
             'fill_ratio': len(self) / self.capacity,
             'prioritized': self.prioritized,
+            'state_dtype': self.state_dtype.name,
             'beta': self.beta if self.prioritized else None,
             'max_priority': self.max_priority if self.prioritized else None,
             **self._stats
@@ -334,16 +393,16 @@ class ExperienceBuffer(BaseBuffer):
 
     def save(self, filepath: str):
         """Save buffer to file"""
+        with self.lock:
+            experiences = self._experiences() if self._states is not None else []
+
         with gzip.open(filepath, 'wb') as f:
             data = {
                 'capacity': self.capacity,
                 'prioritized': self.prioritized,
                 'alpha': self.alpha,
                 'beta': self.beta,
-                'experiences': list(self.buffer) if not self.prioritized else [
-                    self.tree.data[i] for i in range(self.tree.n_entries)
-                    if isinstance(self.tree.data[i], Experience)
-                ]
+                'experiences': experiences
             }
             pickle.dump(data, f)
         logger.info(f"Saved buffer to {filepath}")
@@ -358,12 +417,10 @@ class ExperienceBuffer(BaseBuffer):
         self.alpha = data['alpha']
         self.beta = data['beta']
 
-        if self.prioritized:
-            self.tree = SumTree(self.capacity)
-            for exp in data['experiences']:
-                self.add(exp)
-        else:
-            self.buffer = deque(data['experiences'], maxlen=self.capacity)
+        with self.lock:
+            self._reset_storage()
+        for exp in data['experiences']:
+            self.add(exp)
 
         logger.info(f"Loaded buffer from {filepath} ({len(self)} experiences)")
 
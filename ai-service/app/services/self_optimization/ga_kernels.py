@@ -0,0 +1,175 @@
+"""
+Genetic Optimizer Kernels
+Schedule fitness for a whole population, JIT-compiled with Numba when available
+"""
+
+import logging
+
+import numpy as np
+
+try:
+    import numba
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Below this many individuals the parallel kernel's thread startup costs
+# more than it saves
+PARALLEL_MIN_INDIVIDUALS = 256
+
+
+def _schedule_fitness_numpy(genes, prices, loads, solar, battery_capacity_kwh, max_power_kw):
+    """All individuals at once, one masked array step per hour."""
+    soc_min, soc_max, charge_rate, discharge_rate, price_buy, price_sell, peak_threshold = genes.T
+
+    n = genes.shape[0]
+    soc = np.full(n, 50.0)  # Start at 50%
+    total_cost = np.zeros(n)
+    total_cycles = np.zeros(n)
+
+    max_charge = max_power_kw * charge_rate
+    max_discharge = max_power_kw * discharge_rate
+    peak_limit = max_power_kw * peak_threshold
+
+    # Hours are sequential through the SOC; individuals are independent
+    for price, load, solar_gen in zip(prices.tolist(), loads.tolist(), solar.tolist()):
+        net_load = load - solar_gen
+
+        # Decision based on parameters, first match wins
+        charge = (price < price_buy) & (soc < soc_max)
+        can_discharge = ~charge & (soc > soc_min)
+        discharge = can_discharge & (price > price_sell)
+        shave = can_discharge & ~discharge & (net_load > peak_limit)
+
+        available = (soc - soc_min) * battery_capacity_kwh / 100
+        charge_power = np.minimum(max_charge, (soc_max - soc) * battery_capacity_kwh / 100)
+        discharge_power = np.minimum(np.minimum(max_discharge, available), net_load)
+        shave_power = np.minimum(np.minimum(net_load - peak_limit, max_discharge), available)
+
+        # Energy into the battery (negative = out); peak shaving is valued
+        # at half the price
+        power = np.where(charge, charge_power,
+                         np.where(discharge, -discharge_power,
+                                  np.where(shave, -shave_power, 0.0)))
+        soc += (power / battery_capacity_kwh) * 100
+        total_cost += power * np.where(shave, price * 0.5, price)
+        total_cycles += np.where(charge, power, -power) / battery_capacity_kwh
+
+    # Degradation cost (simplified model): 1% per full cycle
+    return np.column_stack((total_cost, total_cycles * 0.01))
+
+
+def _individual_fitness(g, prices, loads, solar, battery_capacity_kwh, max_power_kw):
+    """(total cost, degradation) of one individual's day."""
+    soc_min = g[0]
+    soc_max = g[1]
+    max_charge = max_power_kw * g[2]
+    max_discharge = max_power_kw * g[3]
+    price_buy = g[4]
+    price_sell = g[5]
+    peak_limit = max_power_kw * g[6]
+
+    soc = 50.0
+    total_cost = 0.0
+    total_cycles = 0.0
+
+    for hour in range(prices.shape[0]):
+        price = prices[hour]
+        net_load = loads[hour] - solar[hour]
+
+        if price < price_buy and soc < soc_max:
+            power = min(max_charge, (soc_max - soc) * battery_capacity_kwh / 100)
+            soc += (power / battery_capacity_kwh) * 100
+            total_cost += power * price
+            total_cycles += power / battery_capacity_kwh
+        elif price > price_sell and soc > soc_min:
+            power = min(min(max_discharge, (soc - soc_min) * battery_capacity_kwh / 100), net_load)
+            soc += (-power / battery_capacity_kwh) * 100
+            total_cost += -power * price
+            total_cycles += power / battery_capacity_kwh
+        elif net_load > peak_limit and soc > soc_min:
+            power = min(min(net_load - peak_limit, max_discharge),
+                        (soc - soc_min) * battery_capacity_kwh / 100)
+            soc += (-power / battery_capacity_kwh) * 100
+            total_cost += -power * (price * 0.5)
+            total_cycles += power / battery_capacity_kwh
+
+    return total_cost, total_cycles * 0.01
+
+
+if NUMBA_AVAILABLE:
+    _individual_fitness_jit = njit(cache=True)(_individual_fitness)
+
+    @njit(cache=True)
+    def _schedule_fitness_serial(genes, prices, loads, solar, battery_capacity_kwh, max_power_kw, out):
+        """Fill out one individual at a time."""
+        for i in range(genes.shape[0]):
+            out[i, 0], out[i, 1] = _individual_fitness_jit(
+                genes[i], prices, loads, solar, battery_capacity_kwh, max_power_kw
+            )
+
+    @njit(cache=True, parallel=True)
+    def _schedule_fitness_parallel(genes, prices, loads, solar, battery_capacity_kwh, max_power_kw, out):
+        """Fill out, individuals spread across threads."""
+        for i in prange(genes.shape[0]):
+            out[i, 0], out[i, 1] = _individual_fitness_jit(
+                genes[i], prices, loads, solar, battery_capacity_kwh, max_power_kw
+            )
+
+
+def schedule_fitness(
+    genes: np.ndarray,
+    prices: np.ndarray,
+    loads: np.ndarray,
+    solar: np.ndarray,
+    battery_capacity_kwh: float,
+    max_power_kw: float
+) -> np.ndarray:
+    """
+    Simulate one day of the rule-based schedule for a whole population.
+
+    Args:
+        genes: (n, 7) parameters in Individual.to_list() order
+        prices, loads, solar: Hourly price ($/kWh), load and solar (kW)
+
+    Returns:
+        (n, 2) array of (total cost, degradation) per individual
+    """
+    genes = np.ascontiguousarray(genes, dtype=np.float64)
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    loads = np.ascontiguousarray(loads, dtype=np.float64)
+    solar = np.ascontiguousarray(solar, dtype=np.float64)
+    battery_capacity_kwh = float(battery_capacity_kwh)
+    max_power_kw = float(max_power_kw)
+
+    if not NUMBA_AVAILABLE:
+        return _schedule_fitness_numpy(genes, prices, loads, solar, battery_capacity_kwh, max_power_kw)
+
+    out = np.empty((genes.shape[0], 2))
+    kernel = (
+        _schedule_fitness_parallel
+        if genes.shape[0] >= PARALLEL_MIN_INDIVIDUALS else _schedule_fitness_serial
+    )
+    kernel(genes, prices, loads, solar, battery_capacity_kwh, max_power_kw, out)
+    return out
+
+
+def set_threads(n: int):
+    """Cap the threads the parallel kernel uses in this process."""
+    if NUMBA_AVAILABLE:
+        numba.set_num_threads(max(1, min(n, numba.config.NUMBA_NUM_THREADS)))
+
+
+def warmup():
+    """Compile (or load from cache) the JIT kernels on a dummy input."""
+    hours = np.zeros(24)
+    genes = np.array([[20.0, 80.0, 0.5, 0.5, 0.1, 0.2, 0.7]])
+    schedule_fitness(genes, hours, hours, hours, 100.0, 50.0)
+    if NUMBA_AVAILABLE:
+        schedule_fitness(np.repeat(genes, PARALLEL_MIN_INDIVIDUALS, axis=0), hours, hours, hours, 100.0, 50.0)
+        logger.info("Genetic optimizer kernels compiled with Numba")
+    else:
+        logger.info("Numba not available, genetic optimizer kernels use NumPy")
@@ -9,10 +9,13 @@ import numpy as np
 from typing import List, Tuple, Dict, Any, Optional, Callable
 from dataclasses import dataclass, field
 from datetime import datetime
+from itertools import islice
 import json
 import logging
 from enum import Enum
 
+from . import ga_kernels
+
 # DEAP imports
 try:
     from deap import base, creator, tools, algorithms
@@ -44,6 +47,8 @@ class OptimizationConfig:
     mutation_prob: float = 0.2
     tournament_size: int = 3
     elite_size: int = 5
+    # Fitness values remembered per run, keyed by the exact genes
+    fitness_cache_size: int = 100_000
     objectives: List[OptimizationObjective] = field(default_factory=lambda: [
         OptimizationObjective.MAXIMIZE_REVENUE,
         OptimizationObjective.MINIMIZE_DEGRADATION
@@ -110,8 +115,16 @@ class OptimizationResult:
     total_generations: int
     convergence_generation: Optional[int]
     execution_time_seconds: float
+    fitness_evaluations: int = 0
+    fitness_cache_hits: int = 0
     timestamp: datetime = field(default_factory=datetime.now)
 
+    @property
+    def fitness_cache_hit_rate(self) -> float:
+        """Share of fitness lookups answered from the cache"""
+        lookups = self.fitness_evaluations + self.fitness_cache_hits
+        return self.fitness_cache_hits / lookups if lookups else 0.0
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             'best_individual': self.best_individual.to_dict(),
@@ -120,6 +133,8 @@ class OptimizationResult:
             'total_generations': self.total_generations,
             'convergence_generation': self.convergence_generation,
             'execution_time_seconds': self.execution_time_seconds,
+            'fitness_evaluations': self.fitness_evaluations,
+            'fitness_cache_hit_rate': self.fitness_cache_hit_rate,
             'timestamp': self.timestamp.isoformat()
         }
 
@@ -220,7 +235,8 @@ class GeneticOptimizer:
     def optimize(
         self,
         evaluate_fn: Callable[[Individual], Tuple[float, ...]],
-        callback: Optional[Callable[[int, List], None]] = None
+        callback: Optional[Callable[[int, List], None]] = None,
+        evaluate_population_fn: Optional[Callable[[np.ndarray], np.ndarray]] = None
     ) -> OptimizationResult:
         """
         Run genetic optimization.
@@ -228,6 +244,10 @@ class GeneticOptimizer:
         Args:
             evaluate_fn: Function that takes Individual and returns fitness tuple
             callback: Optional callback called after each generation
+            evaluate_population_fn: Optional vectorized form of evaluate_fn,
+                taking an (n, 7) gene matrix in Individual.to_list() order and
+                returning an (n, n_objectives) fitness matrix; used instead of
+                evaluate_fn when given
 
         Returns:
             OptimizationResult with best solutions
@@ -236,22 +256,53 @@ class GeneticOptimizer:
         start_time = time.time()
 
         if not DEAP_AVAILABLE:
-            return self._fallback_optimize(evaluate_fn)
+            return self._fallback_optimize(evaluate_fn, evaluate_population_fn)
+
+        # Crossover of identical parents and mutation that leaves every gene
+        # alone still invalidate the fitness, and those duplicates multiply
+        # as the population converges; look them up instead of re-evaluating
+        fitness_cache: Dict[Tuple[float, ...], Tuple[float, ...]] = {}
+        fitness_evaluations = 0
+        cache_hits = 0
+
+        def evaluate_all(individuals: List) -> None:
+            """Set the fitness of each individual, evaluating unseen genes in one call"""
+            nonlocal fitness_evaluations, cache_hits
+            keys = [tuple(ind) for ind in individuals]
+            # Hits are resolved before anything is evicted below
+            batch = {key: fitness_cache[key] for key in keys if key in fitness_cache}
+            missing = list(dict.fromkeys(key for key in keys if key not in batch))
+            fitness_evaluations += len(missing)
+            cache_hits += len(keys) - len(missing)
+
+            if missing:
+                if evaluate_population_fn is not None:
+                    fitnesses = map(tuple, evaluate_population_fn(np.array(missing)).tolist())
+                else:
+                    fitnesses = (evaluate_fn(Individual.from_list(key)) for key in missing)
+                computed = dict(zip(missing, fitnesses))
+                batch.update(computed)
 
-        # Register evaluation function
-        def evaluate_wrapper(individual):
-            ind_obj = Individual.from_list(individual)
-            return evaluate_fn(ind_obj)
+            for ind, key in zip(individuals, keys):
+                ind.fitness.values = batch[key]
 
-        self.toolbox.register("evaluate", evaluate_wrapper)
+            if missing:
+                # Oldest entries go first once the cache is full
+                size = self.config.fitness_cache_size
+                overflow = len(fitness_cache) + len(missing) - size
+                for key in list(islice(fitness_cache, max(overflow, 0))):
+                    del fitness_cache[key]
+                fitness_cache.update(islice(computed.items(), max(len(missing) - size, 0), None))
 
         # Create initial population
         population = self.toolbox.population(n=self.config.population_size)
 
         # Evaluate initial population
-        fitnesses = map(self.toolbox.evaluate, population)
-        for ind, fit in zip(population, fitnesses):
-            ind.fitness.values = fit
+        evaluate_all(population)
+
+        # selTournamentDCD compares crowding distances, which NSGA-II
+        # selection assigns
+        population = self.toolbox.select(population, len(population))
 
         # Statistics
         stats = tools.Statistics(lambda ind: ind.fitness.values)
@@ -289,10 +340,7 @@ class GeneticOptimizer:
                     del mutant.fitness.values
 
             # Evaluate offspring with invalid fitness
-            invalid_ind = [ind for ind in offspring if not ind.fitness.valid]
-            fitnesses = map(self.toolbox.evaluate, invalid_ind)
-            for ind, fit in zip(invalid_ind, fitnesses):
-                ind.fitness.values = fit
+            evaluate_all([ind for ind in offspring if not ind.fitness.valid])
 
             # Select survivors (NSGA-II)
             population = self.toolbox.select(population + offspring, self.config.population_size)
@@ -350,12 +398,15 @@ class GeneticOptimizer:
             generation_stats=generation_stats,
             total_generations=self.config.generations,
             convergence_generation=convergence_gen,
-            execution_time_seconds=execution_time
+            execution_time_seconds=execution_time,
+            fitness_evaluations=fitness_evaluations,
+            fitness_cache_hits=cache_hits
         )
 
     def _fallback_optimize(
         self,
-        evaluate_fn: Callable[[Individual], Tuple[float, ...]]
+        evaluate_fn: Callable[[Individual], Tuple[float, ...]],
+        evaluate_population_fn: Optional[Callable[[np.ndarray], np.ndarray]] = None
     ) -> OptimizationResult:
         """Fallback optimization when DEAP is not available"""
         import time
@@ -365,8 +416,23 @@ class GeneticOptimizer:
         best_individual = None
         best_fitness = float('inf')
         fitness_history = []
+        low, high = np.array(self._get_bounds()).T
 
         for gen in range(self.config.generations):
+            if evaluate_population_fn is not None:
+                genes = np.random.uniform(low, high, (self.config.population_size, len(low)))
+                fitness = evaluate_population_fn(genes)[:, 0]
+                best = int(np.argmin(fitness))
+                if fitness[best] < best_fitness:
+                    best_fitness = float(fitness[best])
+                    best_individual = Individual.from_list(genes[best].tolist())
+
+                fitness_history.append({
+                    'generation': gen,
+                    'best_fitness': best_fitness
+                })
+                continue
+
             population = []
             for _ in range(self.config.population_size):
                 ind = Individual(
@@ -396,7 +462,8 @@ class GeneticOptimizer:
             generation_stats=[],
             total_generations=self.config.generations,
             convergence_generation=None,
-            execution_time_seconds=time.time() - start_time
+            execution_time_seconds=time.time() - start_time,
+            fitness_evaluations=self.config.generations * self.config.population_size
         )
 
     def optimize_schedule(
@@ -420,58 +487,74 @@ class GeneticOptimizer:
         Returns:
             OptimizationResult with optimized parameters
         """
-        solar = solar_forecast or [0.0] * 24
+        prices = np.asarray(price_forecast, dtype=np.float64)
+        loads = np.asarray(load_forecast, dtype=np.float64)
+        solar = (
+            np.asarray(solar_forecast, dtype=np.float64)
+            if solar_forecast is not None else np.zeros(24)
+        )
+
+        def evaluate_population(genes: np.ndarray) -> np.ndarray:
+            """Evaluate individuals for cost and degradation"""
+            return ga_kernels.schedule_fitness(
+                genes, prices, loads, solar, battery_capacity_kwh, max_power_kw
+            )
 
         def evaluate(ind: Individual) -> Tuple[float, float]:
             """Evaluate individual for cost and degradation"""
-            soc = 50.0  # Start at 50%
-            total_cost = 0.0
-            total_cycles = 0.0
-
-            for hour in range(24):
-                price = price_forecast[hour]
-                load = load_forecast[hour]
-                solar_gen = solar[hour]
-
-                # Net load
-                net_load = load - solar_gen
-
-                # Decision based on parameters
-                if price < ind.price_threshold_buy and soc < ind.soc_max:
-                    # Charge
-                    charge_power = min(max_power_kw * ind.charge_rate,
-                                      (ind.soc_max - soc) * battery_capacity_kwh / 100)
-                    soc += (charge_power / battery_capacity_kwh) * 100
-                    total_cost += charge_power * price
-                    total_cycles += charge_power / battery_capacity_kwh
-
-                elif price > ind.price_threshold_sell and soc > ind.soc_min:
-                    # Discharge
-                    discharge_power = min(max_power_kw * ind.discharge_rate,
-                                         (soc - ind.soc_min) * battery_capacity_kwh / 100,
-                                         net_load)
-                    soc -= (discharge_power / battery_capacity_kwh) * 100
-                    total_cost -= discharge_power * price  # Revenue
-                    total_cycles += discharge_power / battery_capacity_kwh
-
-                elif net_load > max_power_kw * ind.peak_shaving_threshold and soc > ind.soc_min:
-                    # Peak shaving
-                    discharge_power = min(net_load - max_power_kw * ind.peak_shaving_threshold,
-                                         max_power_kw * ind.discharge_rate,
-                                         (soc - ind.soc_min) * battery_capacity_kwh / 100)
-                    soc -= (discharge_power / battery_capacity_kwh) * 100
-                    total_cost -= discharge_power * price * 0.5  # Reduced value for peak shaving
-                    total_cycles += discharge_power / battery_capacity_kwh
-
-            # Degradation cost (simplified model)
-            degradation = total_cycles * 0.01  # 1% per full cycle
-
-            return (total_cost, degradation)
-
-        return self.optimize(evaluate)
+            return tuple(evaluate_population(np.array([ind.to_list()]))[0].tolist())
+
+        return self.optimize(evaluate, evaluate_population_fn=evaluate_population)
 
 
 # Utility functions
+def run_schedule_optimization(
+    price_forecast: List[float],
+    load_forecast: List[float],
+    solar_forecast: Optional[List[float]] = None,
+    battery_capacity_kwh: float = 100.0,
+    max_power_kw: float = 50.0,
+    population_size: int = 100,
+    generations: int = 50
+) -> OptimizationResult:
+    """
+    Build an optimizer and run optimize_schedule().
+
+    Module-level so it can be submitted to a process pool; the result is
+    plain dataclasses and pickles back to the caller.
+    """
+    config = OptimizationConfig(
+        population_size=population_size,
+        generations=generations
+    )
+    return GeneticOptimizer(config).optimize_schedule(
+        price_forecast=price_forecast,
+        load_forecast=load_forecast,
+        solar_forecast=solar_forecast,
+        battery_capacity_kwh=battery_capacity_kwh,
+        max_power_kw=max_power_kw
+    )
+
+
+def warmup(kernel_threads: Optional[int] = None):
+    """
+    Import and exercise the optimizer once; process pool initializer.
+
+    kernel_threads caps the fitness kernel's threads in this process, so
+    several workers don't oversubscribe the CPUs.
+    """
+    if kernel_threads is not None:
+        ga_kernels.set_threads(kernel_threads)
+    ga_kernels.warmup()
+    run_schedule_optimization(
+        price_forecast=[0.1] * 24,
+        load_forecast=[0.0] * 24,
+        population_size=10,
+        generations=1
+    )
+    logger.info("Genetic optimizer ready")
+
+
 def create_default_optimizer() -> GeneticOptimizer:
     """Create optimizer with default configuration"""
     return GeneticOptimizer()
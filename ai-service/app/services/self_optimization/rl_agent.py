@@ -482,6 +482,22 @@ class RLAgent:
         action, _ = self.model.predict(observation, deterministic=True)
         return float(action[0]), {'source': self.config.algorithm}
 
+    def predict_batch(self, observations: np.ndarray) -> Tuple[np.ndarray, Dict]:
+        """
+        Predict actions for several observations in one forward pass.
+
+        Args:
+            observations: (batch, observation_dim) array
+
+        Returns:
+            Tuple of (actions, info), one action per row
+        """
+        if self.model is None:
+            return np.random.uniform(-1, 1, len(observations)), {'source': 'random'}
+
+        actions, _ = self.model.predict(observations, deterministic=True)
+        return actions.reshape(len(observations), -1)[:, 0], {'source': self.config.algorithm}
+
     def load(self, path: Optional[str] = None) -> bool:
         """Load trained model"""
         if not SB3_AVAILABLE:
@@ -5,17 +5,30 @@ Speech-to-text, voice command detection, audio event analysis
 
 import logging
 import asyncio
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, BinaryIO, Union
 from pathlib import Path
 import numpy as np
 import io
 import tempfile
+import shutil
 import os
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Raw bytes or a readable binary file object (e.g. an upload's spooled file)
+AudioInput = Union[bytes, BinaryIO]
+
+# Chunk size used when copying file objects to disk
+SPOOL_CHUNK_SIZE = 1 << 20
+
 
 class WhisperService:
     """OpenAI Whisper audio transcription service."""
@@ -55,6 +68,32 @@ class WhisperService:
             "socorro": "help",
         }
 
+        # Vocabulary normalized once as (lowercased, original) pairs, and a
+        # single automaton over every command phrase and alert keyword
+        self._phrases = [
+            (phrase.lower(), phrase)
+            for phrase in (*self.voice_commands, *self.alert_keywords)
+        ]
+        self._phrase_matcher = self._build_phrase_matcher()
+
+    def _build_phrase_matcher(self):
+        """Build an Aho-Corasick automaton over commands and alert keywords."""
+        if not AHOCORASICK_AVAILABLE:
+            return None
+
+        automaton = ahocorasick.Automaton()
+        for normalized, phrase in self._phrases:
+            automaton.add_word(normalized, phrase)
+        automaton.make_automaton()
+        return automaton
+
+    def _match_phrases(self, text: str) -> set:
+        """Return every command phrase and alert keyword occurring in lowercased text."""
+        if self._phrase_matcher is not None:
+            return {phrase for _, phrase in self._phrase_matcher.iter(text)}
+
+        return {phrase for normalized, phrase in self._phrases if normalized in text}
+
     async def load_model(self):
         """Load Whisper model."""
         try:
@@ -76,16 +115,85 @@ class WhisperService:
             logger.error(f"Failed to load Whisper model: {e}")
             self.is_loaded = False
 
+    async def warmup(self, iters: int = 2):
+        """
+        Transcribe a short silent buffer so the first real request does not
+        pay for device initialization and kernel compilation.
+
+        Args:
+            iters: Number of dummy transcriptions
+        """
+        if not self.is_loaded:
+            return
+
+        # 1 second of silence at Whisper's native 16 kHz sample rate
+        silence = np.zeros(16000, dtype=np.float32)
+
+        try:
+            loop = asyncio.get_event_loop()
+            for _ in range(iters):
+                await loop.run_in_executor(
+                    None,
+                    lambda: self.model.transcribe(
+                        silence,
+                        language=settings.whisper_language,
+                        task="transcribe",
+                    )
+                )
+            logger.info(f"Whisper warmup complete ({iters} iterations)")
+
+        except Exception as e:
+            logger.warning(f"Whisper warmup failed: {e}")
+
+    def _spool_to_tempfile(self, audio: AudioInput) -> str:
+        """Write audio bytes or a file object to a temp file and return its path."""
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+            if isinstance(audio, (bytes, bytearray, memoryview)):
+                f.write(audio)
+            else:
+                shutil.copyfileobj(audio, f, SPOOL_CHUNK_SIZE)
+            return f.name
+
+    async def _transcribe_file(self, path: str, lang: str) -> Dict[str, Any]:
+        """Run Whisper on an audio file already on disk."""
+        # Transcribe in thread pool
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(
+            None,
+            lambda: self.model.transcribe(
+                path,
+                language=lang,
+                task="transcribe",
+            )
+        )
+
+        # Extract segments
+        segments = [
+            {
+                "start": seg["start"],
+                "end": seg["end"],
+                "text": seg["text"].strip(),
+            }
+            for seg in result.get("segments", [])
+        ]
+
+        return {
+            "text": result["text"].strip(),
+            "language": result.get("language", lang),
+            "segments": segments,
+            "duration": segments[-1]["end"] if segments else 0,
+        }
+
     async def transcribe(
         self,
-        audio_data: bytes,
+        audio_data: AudioInput,
         language: str = None,
     ) -> Dict[str, Any]:
         """
         Transcribe audio to text.
 
         Args:
-            audio_data: Audio file bytes (wav, mp3, etc.)
+            audio_data: Audio file bytes or file object (wav, mp3, etc.)
             language: Language code (default: Portuguese)
 
         Returns:
@@ -97,38 +205,11 @@ class WhisperService:
         lang = language or settings.whisper_language
 
         # Write audio to temp file
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-            f.write(audio_data)
-            temp_path = f.name
+        loop = asyncio.get_event_loop()
+        temp_path = await loop.run_in_executor(None, self._spool_to_tempfile, audio_data)
 
         try:
-            # Transcribe in thread pool
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                lambda: self.model.transcribe(
-                    temp_path,
-                    language=lang,
-                    task="transcribe",
-                )
-            )
-
-            # Extract segments
-            segments = [
-                {
-                    "start": seg["start"],
-                    "end": seg["end"],
-                    "text": seg["text"].strip(),
-                }
-                for seg in result.get("segments", [])
-            ]
-
-            return {
-                "text": result["text"].strip(),
-                "language": result.get("language", lang),
-                "segments": segments,
-                "duration": segments[-1]["end"] if segments else 0,
-            }
+            return await self._transcribe_file(temp_path, lang)
 
         finally:
             # Clean up temp file
@@ -136,35 +217,40 @@ class WhisperService:
 
     async def detect_voice_command(
         self,
-        audio_data: bytes,
+        audio_data: AudioInput,
     ) -> Dict[str, Any]:
         """
         Detect voice commands in audio.
 
         Args:
-            audio_data: Audio file bytes
+            audio_data: Audio file bytes or file object
 
         Returns:
             Detected command and confidence
         """
         result = await self.transcribe(audio_data)
-        text = result["text"].lower()
+        # Normalize the transcript once; matching and the exact-phrase check
+        # below all work on this copy
+        text = result["text"].strip().lower()
+
+        # One scan of the transcript finds every phrase and keyword
+        matched = self._match_phrases(text)
 
         detected_commands = []
 
         # Check for matching commands
         for phrase, command in self.voice_commands.items():
-            if phrase in text:
+            if phrase in matched:
                 detected_commands.append({
                     "command": command,
                     "trigger_phrase": phrase,
-                    "confidence": 0.9 if phrase == text.strip() else 0.7,
+                    "confidence": 0.9 if phrase == text else 0.7,
                 })
 
         # Check for alert keywords
         detected_alerts = []
         for keyword, alert_type in self.alert_keywords.items():
-            if keyword in text:
+            if keyword in matched:
                 detected_alerts.append({
                     "type": alert_type,
                     "keyword": keyword,
@@ -181,13 +267,13 @@ class WhisperService:
 
     async def analyze_audio_event(
         self,
-        audio_data: bytes,
+        audio_data: AudioInput,
     ) -> Dict[str, Any]:
         """
         Analyze audio for events (speech, noise, silence).
 
         Args:
-            audio_data: Audio file bytes
+            audio_data: Audio file bytes or file object
 
         Returns:
             Audio event analysis
@@ -196,9 +282,8 @@ class WhisperService:
         import soundfile as sf
 
         # Load audio
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-            f.write(audio_data)
-            temp_path = f.name
+        loop = asyncio.get_event_loop()
+        temp_path = await loop.run_in_executor(None, self._spool_to_tempfile, audio_data)
 
         try:
             # Load with librosa
@@ -228,7 +313,7 @@ class WhisperService:
             transcription = None
             if audio_type == "speech":
                 try:
-                    result = await self.transcribe(audio_data)
+                    result = await self._transcribe_file(temp_path, settings.whisper_language)
                     transcription = result["text"]
                 except:
                     pass
@@ -0,0 +1,122 @@
+"""
+YOLOv8 Micro-Batcher
+Coalesces concurrent detection requests into a single batched forward pass
+"""
+
+import asyncio
+import logging
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# (images, min confidence, class filter or None) -> one (N, 6) array per image
+# with rows [x1, y1, x2, y2, confidence, class_id]
+PredictFn = Callable[[List[np.ndarray], float, Optional[List[int]]], List[np.ndarray]]
+
+
+class YOLOBatcher:
+    """
+    Micro-batching queue in front of a YOLO model.
+
+    Requests wait at most max_wait_ms for company; the first request starts
+    the window and it closes early once max_batch images are queued. Each
+    batch runs once at the lowest requested confidence over the union of
+    requested classes, and every caller gets its boxes re-filtered to its
+    own confidence and classes. NMS is per class, so this matches running
+    each request on its own.
+    """
+
+    def __init__(self, predict_fn: PredictFn, max_batch: int = 16, max_wait_ms: float = 5.0):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(
+        self,
+        image: np.ndarray,
+        confidence: float,
+        classes: Optional[Sequence[int]] = None,
+    ) -> np.ndarray:
+        """
+        Queue one image and wait for its detections.
+
+        Returns:
+            (N, 6) array of [x1, y1, x2, y2, confidence, class_id] rows
+        """
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, future, confidence, classes))
+        return await future
+
+    async def stop(self):
+        """Cancel the batching task, failing any requests still queued."""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        while not self._queue.empty():
+            _, future, _, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("YOLO batcher stopped"))
+
+    async def _run(self):
+        """Drain the queue into batches until cancelled."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Callers that gave up (e.g. client disconnected) don't need inference
+            batch = [item for item in batch if not item[1].cancelled()]
+            if batch:
+                await self._predict(loop, batch)
+
+    async def _predict(self, loop: asyncio.AbstractEventLoop, batch: List[Tuple]):
+        """Run one forward pass for the batch and resolve its futures."""
+        images = [image for image, _, _, _ in batch]
+        min_conf = min(conf for _, _, conf, _ in batch)
+        if any(classes is None for _, _, _, classes in batch):
+            union_classes = None
+        else:
+            union_classes = sorted({c for _, _, _, classes in batch for c in classes})
+
+        try:
+            outputs = await loop.run_in_executor(
+                None, self.predict_fn, images, min_conf, union_classes
+            )
+        except Exception as e:
+            logger.error(f"YOLO batch of {len(batch)} failed: {e}")
+            for _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, conf, classes), boxes in zip(batch, outputs):
+            keep = boxes[:, 4] >= conf
+            if classes is not None:
+                keep &= np.isin(boxes[:, 5], classes)
+            if not future.done():
+                future.set_result(boxes[keep])
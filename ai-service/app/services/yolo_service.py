@@ -3,19 +3,55 @@ YOLOv8 Person Detection Service
 Detects persons, vehicles, and objects in camera frames
 """
 
+import hashlib
 import logging
 import asyncio
+import shutil
+from functools import lru_cache
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
+import cv2
 import numpy as np
-from PIL import Image
-import io
-import torch
 
 from app.config import settings
+from app.services.yolo_batcher import YOLOBatcher
 
 logger = logging.getLogger(__name__)
 
+# Network input size (square); the TensorRT engine is exported at this size
+INPUT_SIZE = 640
+LETTERBOX_FILL = 114
+
+# Zone masks kept by _zone_mask. The polygon comes from the client and a
+# mask can be as large as the frame (~3.7 MB at 1920x1920), so keep this
+# to roughly the number of cameras sending zones
+ZONE_MASK_CACHE_SIZE = 16
+
+
+@lru_cache(maxsize=ZONE_MASK_CACHE_SIZE)
+def _zone_mask(
+    height: int,
+    width: int,
+    polygon: Tuple[Tuple[int, int], ...],
+) -> Tuple[np.ndarray, int, int]:
+    """
+    Rasterize a zone polygon for point-in-zone tests.
+
+    The mask only covers the polygon's bounding box clipped to the image,
+    so memory scales with the zone rather than the frame. Cached because
+    a camera keeps sending the same zone at the same resolution.
+
+    Returns:
+        (mask, x0, y0): boolean mask and the image coordinates of its origin
+    """
+    points = np.array(polygon, dtype=np.int32)
+    x0, y0 = np.clip(points.min(axis=0), 0, (width, height))
+    x1, y1 = np.clip(points.max(axis=0) + 1, 0, (width, height))
+
+    mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+    cv2.fillPoly(mask, [points - (x0, y0)], 1)
+    return mask.view(bool), int(x0), int(y0)
+
 
 class YOLOService:
     """YOLOv8 object detection service."""
@@ -23,7 +59,19 @@ class YOLOService:
     def __init__(self):
         self.model = None
         self.is_loaded = False
-        self.device = "cuda" if settings.use_gpu and torch.cuda.is_available() else "cpu"
+        self.device = "cpu"  # resolved in load_model() once torch is imported
+        self.engine_precision = "fp32"
+        self.trt_version = None
+
+        # Pinned host buffer for GPU input batches, allocated on first use
+        self._input_buffer = None
+
+        # Concurrent requests share forward passes through the batcher
+        self.batcher = YOLOBatcher(
+            self._predict_batch,
+            max_batch=settings.yolo_max_batch,
+            max_wait_ms=settings.yolo_batch_wait_ms,
+        )
 
         # Class names for COCO dataset (YOLOv8 default)
         self.person_class_id = 0  # 'person' in COCO
@@ -43,8 +91,10 @@ class YOLOService:
     async def load_model(self):
         """Load YOLOv8 model."""
         try:
+            import torch
             from ultralytics import YOLO
 
+            self.device = "cuda" if settings.use_gpu and torch.cuda.is_available() else "cpu"
             model_path = settings.yolo_model
             logger.info(f"Loading YOLOv8 model: {model_path} on {self.device}")
 
@@ -58,6 +108,15 @@ class YOLOService:
             if self.device == "cuda":
                 self.model.to(self.device)
 
+                # Swap in a TensorRT FP16 engine; keep PyTorch if that fails
+                if settings.yolo_tensorrt:
+                    try:
+                        self.model = await loop.run_in_executor(
+                            None, self._load_engine
+                        )
+                    except Exception as e:
+                        logger.warning(f"TensorRT engine unavailable, using PyTorch: {e}")
+
             self.is_loaded = True
             logger.info(f"YOLOv8 model loaded successfully on {self.device}")
 
@@ -65,9 +124,155 @@ class YOLOService:
             logger.error(f"Failed to load YOLOv8 model: {e}")
             self.is_loaded = False
 
+    def _load_engine(self):
+        """
+        Load the TensorRT FP16 engine for the current checkpoint, exporting
+        it first if needed.
+
+        Engines are only valid for the GPU and CUDA build they were built
+        on, so the cached file is keyed by (weights hash, GPU UUID, CUDA
+        version) under models_dir and conversion happens once per key.
+        """
+        import torch
+        from ultralytics import YOLO
+
+        weights = Path(getattr(self.model, "ckpt_path", None) or settings.yolo_model)
+        digest = hashlib.sha256()
+        with open(weights, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        gpu_uuid = torch.cuda.get_device_properties(settings.gpu_device).uuid
+        key = hashlib.sha256(
+            f"{digest.hexdigest()}:{gpu_uuid}:{torch.version.cuda}:{settings.yolo_max_batch}".encode()
+        ).hexdigest()[:16]
+
+        engine_path = Path(settings.models_dir) / f"{weights.stem}-{key}.engine"
+        if not engine_path.exists():
+            logger.info(f"Exporting TensorRT FP16 engine to {engine_path} (one-time)")
+            exported = self.model.export(
+                format="engine",
+                half=True,
+                dynamic=True,
+                workspace=4,
+                imgsz=INPUT_SIZE,
+                batch=settings.yolo_max_batch,
+                device=settings.gpu_device,
+            )
+            engine_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(exported, engine_path)
+
+        engine = YOLO(str(engine_path), task="detect")
+        import tensorrt  # installed by the Ultralytics exporter if missing
+
+        self.engine_precision = "fp16"
+        self.trt_version = tensorrt.__version__
+        logger.info(f"Loaded TensorRT {self.trt_version} engine {engine_path.name}")
+        return engine
+
+    async def warmup(self, iters: int = 3):
+        """
+        Run dummy inferences so CUDA context setup, cuDNN autotuning and
+        kernel compilation happen at startup instead of on the first request.
+
+        Args:
+            iters: Number of dummy forward passes
+        """
+        if not self.is_loaded:
+            return
+
+        size = settings.max_image_size
+        dummy = np.zeros((size, size, 3), dtype=np.uint8)
+
+        try:
+            loop = asyncio.get_event_loop()
+            for _ in range(iters):
+                await loop.run_in_executor(
+                    None, self._predict_batch, [dummy], settings.yolo_confidence, None
+                )
+            logger.info(f"YOLOv8 warmup complete ({iters} iterations)")
+
+        except Exception as e:
+            logger.warning(f"YOLOv8 warmup failed: {e}")
+
+    def _predict_batch(
+        self,
+        images: List[np.ndarray],
+        confidence: float,
+        classes: Optional[List[int]],
+    ) -> List[np.ndarray]:
+        """Run one forward pass; returns [x1, y1, x2, y2, conf, cls] rows per image."""
+        if self.device == "cuda":
+            source, transforms = self._letterbox_to_device(images)
+        else:
+            source = images
+
+        results = self.model(
+            source,
+            conf=confidence,
+            iou=settings.yolo_iou_threshold,
+            classes=classes,
+            verbose=False,
+        )
+        boxes = [result.boxes.data.cpu().numpy() for result in results]
+
+        if self.device == "cuda":
+            for image_boxes, (gain, left, top), image in zip(boxes, transforms, images):
+                height, width = image.shape[:2]
+                image_boxes[:, [0, 2]] = ((image_boxes[:, [0, 2]] - left) / gain).clip(0, width)
+                image_boxes[:, [1, 3]] = ((image_boxes[:, [1, 3]] - top) / gain).clip(0, height)
+        return boxes
+
+    def _letterbox_to_device(self, images: List[np.ndarray]):
+        """
+        Letterbox a batch into the pinned input buffer and copy it to the GPU.
+
+        Does what Ultralytics' LetterBox does for a fixed-size input, but
+        writes straight into one page-locked (max_batch, 640, 640, 3) buffer
+        that is reused for every batch, so the host-to-device copy is a
+        single async DMA instead of a fresh pageable allocation per request.
+        The batcher runs one forward pass at a time, so one buffer is enough.
+
+        Returns:
+            (tensor, transforms): float RGB NCHW tensor in [0, 1] on the GPU
+            and the (gain, left, top) per image to map boxes back
+        """
+        import torch
+
+        if self._input_buffer is None:
+            self._input_buffer = torch.empty(
+                (settings.yolo_max_batch, INPUT_SIZE, INPUT_SIZE, 3), dtype=torch.uint8
+            ).pin_memory()
+
+        batch = self._input_buffer[:len(images)]
+        host = batch.numpy()
+        host.fill(LETTERBOX_FILL)
+
+        transforms = []
+        for i, image in enumerate(images):
+            height, width = image.shape[:2]
+            gain = min(INPUT_SIZE / height, INPUT_SIZE / width)
+            new_width, new_height = round(width * gain), round(height * gain)
+            left = round((INPUT_SIZE - new_width) / 2 - 0.1)
+            top = round((INPUT_SIZE - new_height) / 2 - 0.1)
+
+            if (new_width, new_height) != (width, height):
+                image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+            host[i, top:top + new_height, left:left + new_width] = image
+            transforms.append((gain, left, top))
+
+        # The buffer is only rewritten by the next batch, after this one's
+        # results have been synchronised back to the host
+        tensor = batch.to(self.device, non_blocking=True)
+        tensor = tensor.permute(0, 3, 1, 2).flip(1).contiguous().float().div_(255)
+        return tensor, transforms
+
+    async def close(self):
+        """Stop the request batcher."""
+        await self.batcher.stop()
+
     async def detect_objects(
         self,
-        image: Image.Image,
+        image: np.ndarray,
         confidence: float = None,
         classes: List[int] = None,
     ) -> Dict[str, Any]:
@@ -75,7 +280,7 @@ class YOLOService:
         Detect objects in an image.
 
         Args:
-            image: PIL Image to process
+            image: uint8 HWC image in BGR order
             confidence: Minimum confidence threshold
             classes: List of class IDs to detect (None = all)
 
@@ -88,56 +293,40 @@ class YOLOService:
         conf = confidence or settings.yolo_confidence
 
         # Resize if too large
-        if max(image.size) > settings.max_image_size:
-            ratio = settings.max_image_size / max(image.size)
-            new_size = (int(image.width * ratio), int(image.height * ratio))
-            image = image.resize(new_size, Image.LANCZOS)
-
-        # Run inference
-        loop = asyncio.get_event_loop()
-        results = await loop.run_in_executor(
-            None,
-            lambda: self.model(
-                image,
-                conf=conf,
-                iou=settings.yolo_iou_threshold,
-                classes=classes,
-                verbose=False,
-            )
-        )
+        height, width = image.shape[:2]
+        if max(height, width) > settings.max_image_size:
+            ratio = settings.max_image_size / max(height, width)
+            width, height = int(width * ratio), int(height * ratio)
+            image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+
+        # Run inference (batched with other in-flight requests)
+        boxes = await self.batcher.submit(image, conf, classes)
 
         # Process results
+        names = self.model.names
         detections = []
-        for result in results:
-            boxes = result.boxes
-            for i, box in enumerate(boxes):
-                class_id = int(box.cls[0])
-                class_name = result.names[class_id]
-                confidence_score = float(box.conf[0])
-
-                # Get bounding box coordinates
-                x1, y1, x2, y2 = box.xyxy[0].tolist()
-
-                detections.append({
-                    "class_id": class_id,
-                    "class_name": class_name,
-                    "confidence": round(confidence_score, 3),
-                    "bbox": {
-                        "x1": round(x1),
-                        "y1": round(y1),
-                        "x2": round(x2),
-                        "y2": round(y2),
-                        "width": round(x2 - x1),
-                        "height": round(y2 - y1),
-                    },
-                    "center": {
-                        "x": round((x1 + x2) / 2),
-                        "y": round((y1 + y2) / 2),
-                    }
-                })
+        for x1, y1, x2, y2, confidence_score, class_id in boxes.tolist():
+            class_id = int(class_id)
+            detections.append({
+                "class_id": class_id,
+                "class_name": names[class_id],
+                "confidence": round(confidence_score, 3),
+                "bbox": {
+                    "x1": round(x1),
+                    "y1": round(y1),
+                    "x2": round(x2),
+                    "y2": round(y2),
+                    "width": round(x2 - x1),
+                    "height": round(y2 - y1),
+                },
+                "center": {
+                    "x": round((x1 + x2) / 2),
+                    "y": round((y1 + y2) / 2),
+                }
+            })
 
         return {
-            "image_size": {"width": image.width, "height": image.height},
+            "image_size": {"width": width, "height": height},
             "detections": detections,
             "count": len(detections),
             "persons": len([d for d in detections if d["class_id"] == 0]),
@@ -146,7 +335,7 @@ class YOLOService:
 
     async def detect_persons(
         self,
-        image: Image.Image,
+        image: np.ndarray,
         confidence: float = None,
     ) -> Dict[str, Any]:
         """Detect only persons in an image."""
@@ -158,7 +347,7 @@ class YOLOService:
 
     async def detect_in_zone(
         self,
-        image: Image.Image,
+        image: np.ndarray,
         zone_polygon: List[Tuple[int, int]],
         confidence: float = None,
     ) -> Dict[str, Any]:
@@ -166,7 +355,7 @@ class YOLOService:
         Detect objects within a specific zone (polygon).
 
         Args:
-            image: PIL Image
+            image: uint8 HWC image in BGR order
             zone_polygon: List of (x, y) points defining the zone
             confidence: Minimum confidence
 
@@ -174,16 +363,24 @@ class YOLOService:
             Detections filtered to only those within the zone
         """
         results = await self.detect_objects(image, confidence)
+        detections = results["detections"]
 
-        # Filter detections to those inside the zone
-        from shapely.geometry import Point, Polygon
+        # Filter detections to those whose center falls on the zone mask
+        polygon = tuple((round(x), round(y)) for x, y in zone_polygon)
+        size = results["image_size"]
+        mask, x0, y0 = _zone_mask(size["height"], size["width"], polygon)
 
-        zone = Polygon(zone_polygon)
+        centers = np.array(
+            [(d["center"]["x"] - x0, d["center"]["y"] - y0) for d in detections],
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        cx, cy = centers[:, 0], centers[:, 1]
+        inside = (cx >= 0) & (cx < mask.shape[1]) & (cy >= 0) & (cy < mask.shape[0])
+        inside[inside] = mask[cy[inside], cx[inside]]
 
         in_zone = []
-        for detection in results["detections"]:
-            center = Point(detection["center"]["x"], detection["center"]["y"])
-            if zone.contains(center):
+        for detection, hit in zip(detections, inside.tolist()):
+            if hit:
                 detection["in_zone"] = True
                 in_zone.append(detection)
 
@@ -197,14 +394,14 @@ class YOLOService:
 
     async def analyze_frame_sequence(
         self,
-        frames: List[Image.Image],
+        frames: List[np.ndarray],
         confidence: float = None,
     ) -> Dict[str, Any]:
         """
         Analyze a sequence of frames for motion/tracking.
 
         Args:
-            frames: List of PIL Images
+            frames: List of uint8 HWC images in BGR order
             confidence: Minimum confidence
 
         Returns:
@@ -0,0 +1,36 @@
+"""Tests for the genetic schedule optimizer."""
+import random
+
+import pytest
+
+pytest.importorskip("deap")
+
+from app.services.self_optimization.genetic_optimizer import (
+    GeneticOptimizer,
+    OptimizationConfig,
+)
+
+PRICES = [0.08] * 6 + [0.15] * 3 + [0.25] * 12 + [0.15] + [0.08] * 2
+LOADS = [20.0] * 8 + [45.0] * 12 + [25.0] * 4
+SOLAR = [0.0] * 7 + [15.0] * 10 + [0.0] * 7
+
+
+def _optimize(cache_size):
+    random.seed(0)
+    config = OptimizationConfig(population_size=100, generations=50, fitness_cache_size=cache_size)
+    return GeneticOptimizer(config).optimize_schedule(PRICES, LOADS, SOLAR)
+
+
+@pytest.mark.parametrize("cache_size", [0, 150, 300, 1000])
+def test_small_fitness_cache_matches_unbounded(cache_size):
+    # Evicting must never drop a fitness the current batch still needs,
+    # and the cache size must not change the search itself
+    result = _optimize(cache_size)
+    reference = _optimize(10**9)
+
+    assert result.best_individual.to_list() == reference.best_individual.to_list()
+    assert result.fitness_evaluations >= reference.fitness_evaluations
+    assert (
+        result.fitness_evaluations + result.fitness_cache_hits
+        == reference.fitness_evaluations + reference.fitness_cache_hits
+    )